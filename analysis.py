@@ -0,0 +1,869 @@
+"""Analyses of the aggregated benchmark results loaded by plot_util.CSVFile."""
+
+import collections
+import math
+import numpy
+import os
+import pandas
+
+# Columns identifying a microbenchmark configuration, excluding the algorithm.
+MICROBENCH_CONFIG = [
+    "ds", "max_key", "u_rate", "rq_rate", "rq_threads", "rq_size",
+    "wrk_threads"
+]
+
+# Columns identifying a macrobenchmark configuration, excluding the algorithm.
+MACROBENCH_CONFIG = ["workload", "datastructure", "nthreads"]
+
+
+def split_list(df):
+    """Returns a copy of microbenchmark data with the 'list' column ('<ds>-<alg>')
+    split into separate 'ds' and 'algorithm' columns."""
+    df = df.copy()
+    names = df["list"].astype(str).str.split("-", n=1)
+    df["ds"] = names.str[0]
+    df["algorithm"] = names.str[1]
+    return df
+
+
+def compute_speedup(df, baseline, value, algorithm, configuration):
+    """ Computes the speedup of every algorithm over a baseline algorithm.
+
+    All configurations are handled at once: the data is pivoted into a
+    (configuration x algorithm) table, so that every algorithm is aligned with
+    the baseline on the configuration columns rather than on row positions.
+
+    Arguments:
+        df: The results, with one row per (configuration, algorithm).
+        baseline: The algorithm to compare against.
+        value: The column to compare (e.g., 'tot_thruput').
+        algorithm: The column naming the algorithm.
+        configuration: The columns identifying a configuration.
+
+    Returns:
+        A data frame indexed by configuration with one column per algorithm,
+        holding value / baseline value (NaN where either is missing).
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    table = df.pivot_table(index=configuration,
+                           columns=algorithm,
+                           values=value,
+                           aggfunc="mean",
+                           observed=True)
+    if baseline not in table.columns:
+        raise ValueError("No results for baseline '{}'".format(baseline))
+    table = table.div(table[baseline], axis=0)
+    table.columns = [str(c) for c in table.columns]
+    return table
+
+
+def format_speedup(table, columns=None):
+    """Formats a speedup table for printing, with one row per algorithm."""
+    table = table.T
+    if columns is not None:
+        table = table.reindex(columns=columns)
+    return table.to_string(float_format="{:.3}".format, na_rep="-")
+
+
+def write_speedup(table, filepath):
+    """Writes a speedup table to a .csv file in long form (one row per
+    configuration and algorithm)."""
+    long = table.stack().rename("speedup").reset_index()
+    long = long.rename(columns={long.columns[-2]: "algorithm"})
+    long.to_csv(filepath, index=False)
+
+
+def summarize_trials(df,
+                     value,
+                     configuration,
+                     confidence=0.95,
+                     n_boot=1000,
+                     cv_threshold=0.05,
+                     seed=0):
+    """ Summarizes the trials of every configuration.
+
+    Arguments:
+        df: Per-trial results (e.g., the '.trials.csv' written by ingest.py).
+        value: The column to summarize (e.g., 'tot_thruput').
+        configuration: The columns identifying a configuration.
+        confidence: Confidence level of the bootstrapped interval of the mean.
+        n_boot: Number of bootstrap resamples.
+        cv_threshold: Configurations whose coefficient of variation exceeds this
+            value are flagged as unstable.
+        seed: Seed of the bootstrap, so that results are reproducible.
+
+    Returns:
+        A data frame indexed by configuration with the columns n, mean, std,
+        median, min, max, ci_low, ci_high, cv and unstable.
+    """
+    rng = numpy.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    configuration = [c for c in configuration if c in df.columns]
+    grouped = df.groupby(configuration, observed=True, sort=True)[value]
+    summary = grouped.agg(["count", "mean", "std", "median", "min", "max"])
+    summary = summary.rename(columns={"count": "n"})
+    ci_low = []
+    ci_high = []
+    for _, values in grouped:
+        low, high = bootstrap_ci(values.to_numpy(dtype=float), rng, alpha,
+                                 n_boot)
+        ci_low.append(low)
+        ci_high.append(high)
+    summary["ci_low"] = ci_low
+    summary["ci_high"] = ci_high
+    summary["cv"] = summary["std"] / summary["mean"]
+    summary["unstable"] = summary["cv"] > cv_threshold
+    return summary
+
+
+def bootstrap_ci(values, rng, alpha, n_boot):
+    """Returns the (alpha, 1 - alpha) percentile bootstrap interval of the mean."""
+    if len(values) == 0:
+        return numpy.nan, numpy.nan
+    if len(values) == 1:
+        return values[0], values[0]
+    samples = rng.choice(values, size=(n_boot, len(values)), replace=True)
+    means = samples.mean(axis=1)
+    return tuple(numpy.quantile(means, [alpha, 1 - alpha]))
+
+
+# Outcomes of `trial_decision`.
+MORE_TRIALS = "more"
+CONVERGED = "converged"
+CAPPED = "capped"
+
+
+def trial_decision(values, min_trials, max_trials, max_ci_width,
+                   confidence=0.95):
+    """ Decides whether a configuration needs more trials.
+
+    A configuration has converged once the Student's t confidence interval of its
+    mean is narrower than max_ci_width relative to the mean. The bootstrap of
+    `summarize_trials` is not used here because it understates the width of the
+    interval with the handful of trials this is meant for.
+
+    Arguments:
+        values: The measurements of the trials so far (e.g., 'tot_thruput').
+        min_trials: Number of trials always performed.
+        max_trials: Number of trials after which no more are added.
+        max_ci_width: Target width of the interval, as a fraction of the mean.
+        confidence: Confidence level of the interval.
+
+    Returns:
+        A pair (decision, width) where decision is MORE_TRIALS, CONVERGED or
+        CAPPED and width is the relative width of the interval (nan with fewer
+        than two trials).
+    """
+    width = relative_ci_width(values, confidence)
+    if len(values) < min_trials:
+        return MORE_TRIALS, width
+    if width <= max_ci_width:
+        return CONVERGED, width
+    if len(values) >= max_trials:
+        return CAPPED, width
+    return MORE_TRIALS, width
+
+
+def relative_ci_width(values, confidence=0.95):
+    """Returns the width of the Student's t confidence interval of the mean of
+    values, relative to the mean (inf if the mean is 0)."""
+    values = numpy.asarray(values, dtype=float)
+    if len(values) < 2:
+        return numpy.nan
+    mean = values.mean()
+    width = 2 * student_t_quantile(
+        (1 + confidence) / 2, len(values) - 1) * values.std(ddof=1) / numpy.sqrt(
+            len(values))
+    if mean == 0:
+        return 0.0 if width == 0 else numpy.inf
+    return width / abs(mean)
+
+
+def student_t_quantile(p, df):
+    """Quantile of Student's t distribution with df degrees of freedom, for
+    0.5 <= p < 1 (found by bisection of its cdf)."""
+    low = 0.0
+    high = 1.0
+    while student_t_cdf(high, df) < p:
+        high *= 2
+    for _ in range(100):
+        mid = (low + high) / 2
+        if student_t_cdf(mid, df) < p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def student_t_cdf(t, df):
+    tail = betainc(df / 2, 0.5, df / (df + t * t)) / 2
+    return 1 - tail if t >= 0 else tail
+
+
+def plan_trials(df, value, configuration, min_trials, max_trials, max_ci_width,
+                confidence=0.95):
+    """ Applies `trial_decision` to every configuration of per-trial results.
+
+    Returns:
+        A data frame indexed by configuration with the columns n, ci_width and
+        decision.
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    rows = []
+    index = []
+    for key, values in df.groupby(configuration, observed=True,
+                                  sort=True)[value]:
+        decision, width = trial_decision(values.to_numpy(dtype=float),
+                                         min_trials, max_trials, max_ci_width,
+                                         confidence)
+        index.append(key if isinstance(key, tuple) else (key,))
+        rows.append({"n": len(values), "ci_width": width, "decision": decision})
+    index = pandas.MultiIndex.from_tuples(index, names=configuration)
+    if len(configuration) == 1:
+        index = index.get_level_values(0)
+    return pandas.DataFrame(rows, index=index)
+
+
+def welch_ttest(a, b):
+    """ Welch's two-sided t-test for a difference between the means of two samples
+        with possibly unequal variances.
+
+    Returns:
+        A pair (t, p), or (nan, nan) if either sample has fewer than two values.
+    """
+    a = numpy.asarray(a, dtype=float)
+    b = numpy.asarray(b, dtype=float)
+    if len(a) < 2 or len(b) < 2:
+        return numpy.nan, numpy.nan
+    va = a.var(ddof=1) / len(a)
+    vb = b.var(ddof=1) / len(b)
+    diff = b.mean() - a.mean()
+    if va + vb == 0:
+        return (0.0, 1.0) if diff == 0 else (numpy.copysign(numpy.inf,
+                                                            diff), 0.0)
+    t = diff / numpy.sqrt(va + vb)
+    df = (va + vb)**2 / (va**2 / (len(a) - 1) + vb**2 / (len(b) - 1))
+    return t, betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = numpy.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) +
+        a * numpy.log(x) + b * numpy.log(1 - x))
+    # The continued fraction converges quickly for x < (a + 1) / (a + b + 2);
+    # otherwise use the symmetry I_x(a, b) = 1 - I_{1-x}(b, a).
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+
+def _betacf(a, b, x, max_iterations=200, eps=1e-12):
+    # Modified Lentz's method for the continued fraction of the incomplete beta.
+    tiny = 1e-300
+    c = 1.0
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iterations + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((a + m2 - 1) * (a + m2))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < eps:
+            break
+    return h
+
+
+def compare_trials(baseline,
+                   candidate,
+                   value,
+                   configuration,
+                   higher_is_better=True):
+    """ Compares the trials of two result sets, configuration by configuration.
+
+    Arguments:
+        baseline: Per-trial results of the reference run.
+        candidate: Per-trial results of the run being checked.
+        value: The column to compare.
+        configuration: The columns identifying a configuration.
+        higher_is_better: Whether larger values of the column are improvements
+            (e.g., throughput) or regressions (e.g., latency).
+
+    Returns:
+        A data frame with one row per configuration present in both result sets,
+        holding the means, the relative change of the mean, the p-value of
+        Welch's t-test and the signed 'improvement' (the relative change, negated
+        when lower values are better).
+    """
+    configuration = [
+        c for c in configuration
+        if c in baseline.columns and c in candidate.columns
+    ]
+    base = {k: v[value].to_numpy() for k, v in
+            baseline.groupby(configuration, observed=True)}
+    rows = []
+    for key, group in candidate.groupby(configuration, observed=True):
+        if key not in base:
+            continue
+        a = base[key]
+        b = group[value].to_numpy()
+        _, p = welch_ttest(a, b)
+        change = ((b.mean() - a.mean()) /
+                  a.mean() if a.mean() != 0 else numpy.nan)
+        row = dict(zip(configuration, key))
+        row.update({
+            "metric": value,
+            "baseline_n": len(a),
+            "baseline_mean": a.mean(),
+            "candidate_n": len(b),
+            "candidate_mean": b.mean(),
+            "change": change,
+            "improvement": change if higher_is_better else -change,
+            "p_value": p,
+        })
+        rows.append(row)
+    return pandas.DataFrame(rows)
+
+
+def jain_fairness(values):
+    """ Jain's fairness index, (sum x)^2 / (n * sum x^2), of the given values.
+
+    It is 1 when all values are equal and 1/n when a single value is non-zero.
+    """
+    values = numpy.asarray(values, dtype=float)
+    squares = (values * values).sum()
+    if len(values) == 0 or squares == 0:
+        return numpy.nan
+    return values.sum()**2 / (len(values) * squares)
+
+
+def summarize_threads(df, value, configuration):
+    """ Summarizes how evenly a per-thread statistic is spread over the threads
+        of every trial.
+
+    Arguments:
+        df: Per-thread results (e.g., the '.threads.csv' written by ingest.py).
+        value: The per-thread column to summarize (e.g., 'operations').
+        configuration: The columns identifying a configuration.
+
+    Returns:
+        A data frame indexed by configuration and trial with the columns jain
+        (see `jain_fairness`), cv, min_ratio and max_ratio (the lowest and
+        highest per-thread value relative to the mean), and work_mean and
+        rq_mean (the mean over worker and range query threads).
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    rows = []
+    keys = []
+    for key, group in df.groupby(configuration + ["trial"],
+                                 observed=True,
+                                 sort=True):
+        values = group[value].to_numpy(dtype=float)
+        mean = values.mean()
+        role = group["role"].to_numpy()
+        rows.append({
+            "jain": jain_fairness(values),
+            "cv": values.std() / mean if mean else numpy.nan,
+            "min_ratio": values.min() / mean if mean else numpy.nan,
+            "max_ratio": values.max() / mean if mean else numpy.nan,
+            "work_mean": _mean(values[role == "work"]),
+            "rq_mean": _mean(values[role == "rq"]),
+        })
+        keys.append(key)
+    index = pandas.MultiIndex.from_tuples(keys,
+                                          names=configuration + ["trial"])
+    return pandas.DataFrame(rows, index=index)
+
+
+def _mean(values):
+    return values.mean() if len(values) > 0 else numpy.nan
+
+
+def parse_cpulist(cpulist):
+    """Parses a list of logical processors such as '0-3,8,10-11' (the format of
+    Linux's cpulist files and of the '-bind' argument of the benchmarks)."""
+    cpus = []
+    for part in cpulist.strip().split(","):
+        if part == "":
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def read_numa_topology(root="/sys/devices/system/node"):
+    """ Reads which NUMA node every logical processor of this machine belongs to.
+
+    Returns:
+        A dictionary mapping logical processor to node, empty if the topology is
+        not available.
+    """
+    topology = {}
+    if not os.path.isdir(root):
+        return topology
+    for entry in os.listdir(root):
+        if not (entry.startswith("node") and entry[4:].isdigit()):
+            continue
+        with open(os.path.join(root, entry, "cpulist"), "r") as f:
+            for cpu in parse_cpulist(f.read()):
+                topology[cpu] = int(entry[4:])
+    return topology
+
+
+def read_cpu_topology(root="/sys/devices/system/cpu",
+                      cpuinfo="/proc/cpuinfo"):
+    """ Reads the sockets, physical cores and logical processors of this machine.
+
+    Returns:
+        A dictionary with the counts sockets, cores, logical_cpus and numa_nodes
+        and the model name of the processor ('' if unknown). Without the sysfs
+        topology, the machine is taken to have one socket and no hyperthreading.
+    """
+    cpus = []
+    try:
+        with open(os.path.join(root, "online"), "r") as f:
+            cpus = parse_cpulist(f.read())
+    except OSError:
+        pass
+    packages = set()
+    cores = set()
+    for cpu in cpus:
+        path = os.path.join(root, "cpu{}".format(cpu), "topology")
+        try:
+            with open(os.path.join(path, "physical_package_id"), "r") as f:
+                package = int(f.read())
+            with open(os.path.join(path, "core_id"), "r") as f:
+                core = int(f.read())
+        except (OSError, ValueError):
+            continue
+        packages.add(package)
+        cores.add((package, core))
+    logical = len(cpus) or os.cpu_count() or 1
+    model = ""
+    try:
+        with open(cpuinfo, "r") as f:
+            for line in f:
+                key, sep, value = line.partition(":")
+                if sep and key.strip() == "model name":
+                    model = value.strip()
+                    break
+    except OSError:
+        pass
+    return {
+        "sockets": len(packages) or 1,
+        "cores": len(cores) or logical,
+        "logical_cpus": logical,
+        "numa_nodes": len(set(read_numa_topology().values())) or 1,
+        "model": model,
+    }
+
+
+def aggregate_numa(df, value, configuration, topology):
+    """ Aggregates a per-thread statistic by the NUMA node each thread was bound to.
+
+    Arguments:
+        df: Per-thread results, with the logical processor of every thread in the
+            'cpu' column (see ACTUAL_THREAD_BINDINGS).
+        value: The per-thread column to aggregate.
+        configuration: The columns identifying a configuration.
+        topology: Mapping from logical processor to NUMA node (see
+            `read_numa_topology`). Unbound or unknown processors go to node -1.
+
+    Returns:
+        A data frame indexed by configuration, node and role with the number of
+        threads, the total and the per-thread mean of the value (averaged over
+        trials), and share, the node's fraction of the total of its run.
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    df = df.assign(node=df["cpu"].map(lambda c: topology.get(c, -1)))
+    per_trial = df.groupby(configuration + ["trial", "node", "role"],
+                           observed=True)[value].agg(["count", "sum", "mean"])
+    per_trial["share"] = per_trial["sum"] / per_trial.groupby(
+        configuration + ["trial"], observed=True)["sum"].transform("sum")
+    per_node = per_trial.groupby(configuration + ["node", "role"],
+                                 observed=True).mean()
+    return per_node.rename(columns={"count": "threads", "sum": "total"})
+
+
+def derive_counter_metrics(df):
+    """ Adds metrics derived from the per-operation hardware counters written by
+        ingest.py (see ingest.PAPI_COLUMNS).
+
+    Arguments:
+        df: Results with the l1_dcm, l2_tcm, l3_tcm, res_stl, tot_cyc and tot_ins
+            columns, each already divided by the number of operations.
+
+    Returns:
+        A copy of df with the columns ipc (instructions per cycle) and
+        stall_fraction (fraction of cycles stalled on any resource). The counter
+        columns themselves are the misses, stall cycles, cycles and instructions
+        per operation. Metrics whose counters are unavailable are NaN.
+    """
+    df = df.copy()
+    cycles = df["tot_cyc"].where(df["tot_cyc"] > 0)
+    df["ipc"] = df["tot_ins"] / cycles
+    df["stall_fraction"] = df["res_stl"] / cycles
+    return df
+
+
+# Range query techniques compared by `compare_memory`: the bundles, vCAS, RLU
+# and EBR-RQ (lockfree).
+MEMORY_ALGORITHMS = ["bundle", "vcas", "rlu", "lockfree"]
+
+# Columns of the table returned by `compare_memory`.
+MEMORY_METRICS = [
+    "keys", "steady_rss_kb", "peak_rss_kb", "bytes_per_key",
+    "node_bytes_per_key", "garbage_per_key", "tot_thruput",
+    "throughput_per_gb"
+]
+
+
+def derive_memory_metrics(df):
+    """ Adds metrics relating the memory statistics written by ingest.py (see
+        ingest.MEMORY_COLUMNS) to the number of keys and the throughput.
+
+    Arguments:
+        df: Microbenchmark results with the memory columns.
+
+    Returns:
+        A copy of df with the columns keys (keys in the data structure at the
+        end of the trial, or half the key range it was prefilled with if that
+        was not printed), bytes_per_key (steady resident set size per key),
+        node_bytes_per_key (size of the nodes reachable from the data structure,
+        including those only reachable through bundles, per key),
+        garbage_per_key (retired objects left in limbo bags per key) and
+        throughput_per_gb (total throughput per GiB of steady resident set).
+        Metrics whose statistics are unavailable are NaN.
+    """
+    df = df.copy()
+    keys = df["ds_size"].where(df["ds_size"] > 0, df["max_key"] / 2)
+    df["keys"] = keys
+    rss = df["steady_rss_kb"].where(df["steady_rss_kb"] > 0) * 1024
+    df["bytes_per_key"] = rss / keys
+    nodes = numpy.maximum(df["reachable_nodes"], keys)
+    df["node_bytes_per_key"] = df["node_size"] * nodes / keys
+    df["garbage_per_key"] = df["garbage"] / keys
+    df["throughput_per_gb"] = df["tot_thruput"] / (rss / 2**30)
+    return df
+
+
+def compare_memory(df,
+                   configuration,
+                   algorithms=MEMORY_ALGORITHMS,
+                   baseline="bundle"):
+    """ Compares the memory footprint and the throughput per byte of range query
+        techniques.
+
+    Arguments:
+        df: Microbenchmark results with 'algorithm' and memory columns (see
+            `split_list` and `derive_memory_metrics`).
+        configuration: The columns identifying a configuration.
+        algorithms: The algorithms to compare.
+        baseline: The algorithm the others are compared against (always
+            included, even if it is not in algorithms).
+
+    Returns:
+        A data frame indexed by configuration and algorithm with the columns of
+        MEMORY_METRICS, followed by bytes_per_key_ratio and
+        throughput_per_gb_ratio, the ratios of these metrics to those of the
+        baseline in the same configuration (NaN where either is missing).
+
+    Raises:
+        ValueError: If there are no results for the baseline.
+    """
+    df = df[df["algorithm"].isin(list(algorithms) + [baseline])]
+    if not (df["algorithm"] == baseline).any():
+        raise ValueError("No results for baseline '{}'".format(baseline))
+    df = derive_memory_metrics(df)
+    configuration = [c for c in configuration if c in df.columns]
+    table = df.groupby(configuration + ["algorithm"], observed=True,
+                       sort=True)[MEMORY_METRICS].mean()
+    others = table.index.droplevel("algorithm")
+    for metric in ["bytes_per_key", "throughput_per_gb"]:
+        base = table[metric].xs(baseline, level="algorithm")
+        table[metric + "_ratio"] = (table[metric].to_numpy() /
+                                    base.reindex(others).to_numpy())
+    return table
+
+
+# Summary of a throughput time series (see `steady_state`). warmup is the number
+# of leading samples discarded as warm-up, mean the mean of the others, drift
+# the relative change of the fitted linear trend over them, stalls the number of
+# them below stall_ratio times the median, and stationary whether the drift is
+# within max_drift.
+SteadyState = collections.namedtuple(
+    "SteadyState", ["warmup", "mean", "drift", "stalls", "stationary"])
+
+
+def detect_warmup(values, batch_size=5):
+    """ Detects the warm-up of a time series with the MSER-5 rule.
+
+    The series is split into batches of batch_size samples, and the number of
+    leading batches d to discard is the one that minimizes the squared standard
+    error of the mean of the remaining batch means, var(means[d:]) / (n - d).
+    Only the first half of the series is considered as warm-up, since
+    truncating more leaves too few samples to estimate the steady state.
+
+    Returns:
+        The number of leading samples to discard.
+    """
+    values = numpy.asarray(values, dtype=float)
+    nbatches = len(values) // batch_size
+    if nbatches < 4:
+        return 0
+    means = values[:nbatches * batch_size].reshape(nbatches,
+                                                   batch_size).mean(axis=1)
+    errors = [means[d:].var() / (nbatches - d) for d in range(nbatches // 2)]
+    return int(numpy.argmin(errors)) * batch_size
+
+
+def steady_state(time, values, max_drift=0.1, stall_ratio=0.5):
+    """ Trims the warm-up of a time series and checks that the rest is stationary.
+
+    Arguments:
+        time: The time of every sample.
+        values: The value of every sample (e.g., the throughput of the interval
+            ending at that time).
+        max_drift: Largest relative change of the linear trend of the steady
+            state, from its first to its last sample, for the run to count as
+            stationary.
+        stall_ratio: Samples below this fraction of the median of the steady
+            state count as stalls.
+
+    Returns:
+        A SteadyState, or None if there are fewer than two samples.
+    """
+    time = numpy.asarray(time, dtype=float)
+    values = numpy.asarray(values, dtype=float)
+    if len(values) < 2:
+        return None
+    warmup = detect_warmup(values)
+    time = time[warmup:]
+    values = values[warmup:]
+    mean = values.mean()
+    slope = numpy.polyfit(time, values, 1)[0] if time[-1] > time[0] else 0.0
+    drift = slope * (time[-1] - time[0]) / mean if mean else 0.0
+    stalls = int((values < stall_ratio * numpy.median(values)).sum())
+    return SteadyState(warmup, float(mean), float(drift), stalls,
+                       bool(abs(drift) <= max_drift))
+
+
+# Scalability models fitted by `fit_scalability`.
+USL = "usl"
+AMDAHL = "amdahl"
+
+# Parameters of the Universal Scalability Law
+#     X(N) = throughput * N / (1 + contention * (N - 1) + coherency * N * (N - 1))
+# fitted to the throughput X(N) at N threads. throughput is the (extrapolated)
+# throughput of a single thread, contention the serialized fraction of the
+# work and coherency the cost of keeping data consistent between every pair of
+# threads. Amdahl's law is the special case coherency = 0. r2 is the
+# coefficient of determination of the fit.
+ScalabilityFit = collections.namedtuple(
+    "ScalabilityFit",
+    ["model", "throughput", "contention", "coherency", "r2"])
+
+
+def fit_usl(threads, throughput, model=USL):
+    """ Fits the Universal Scalability Law (or Amdahl's law) to measurements.
+
+    Rewritten as N / X(N) = a + b * (N - 1) + c * N * (N - 1), with
+    throughput = 1 / a, contention = b / a and coherency = c / a, the model is
+    linear in a, b and c, which are found by least squares. Every equation is
+    weighted by X(N)^2 / N, so that its residual approximates the error in
+    throughput rather than in N / X(N), which would let the largest thread
+    counts dominate the fit. Negative
+    coefficients have no physical meaning, so the best fit with some of them
+    fixed at 0 is used instead when the unconstrained fit has any.
+
+    Arguments:
+        threads: The thread counts that were run (counts below 1 are ignored).
+        throughput: The throughput measured at every thread count (values that
+            are not positive are ignored).
+        model: USL, or AMDAHL to leave out coherency.
+
+    Returns:
+        A ScalabilityFit, or None if there are too few measurements (three for
+        USL and two for AMDAHL).
+    """
+    n = numpy.asarray(threads, dtype=float)
+    x = numpy.asarray(throughput, dtype=float)
+    keep = (n >= 1) & (x > 0) & numpy.isfinite(x)
+    n = n[keep]
+    x = x[keep]
+    nterms = 3 if model == USL else 2
+    if len(numpy.unique(n)) < nterms:
+        return None
+    weights = x * x / n
+    weights = weights / weights.max()
+    terms = [numpy.ones_like(n), n - 1, n * (n - 1)]
+    best = None
+    # Every subset of the contention and coherency terms, from most to least
+    # flexible; the constant term is always fitted.
+    for free in [(0, 1, 2), (0, 2), (0, 1), (0,)]:
+        if max(free) >= nterms:
+            continue
+        coef = numpy.zeros(3)
+        coef[list(free)] = numpy.linalg.lstsq(
+            numpy.column_stack([terms[i] * weights for i in free]),
+            n / x * weights,
+            rcond=None)[0]
+        if coef[0] <= 0 or coef[1] < 0 or coef[2] < 0:
+            continue
+        fit = ScalabilityFit(model, float(1 / coef[0]),
+                             float(coef[1] / coef[0]),
+                             float(coef[2] / coef[0]), 0.0)
+        error = ((predict_throughput(fit, n) - x)**2).sum()
+        if best is None or error < best[0]:
+            best = (error, fit)
+    if best is None:
+        return None
+    error, fit = best
+    total = ((x - x.mean())**2).sum()
+    return fit._replace(r2=float(1 - error / total) if total > 0 else 1.0)
+
+
+def predict_throughput(fit, threads):
+    """Returns the throughput a ScalabilityFit predicts at the given thread
+    counts."""
+    n = numpy.asarray(threads, dtype=float)
+    return fit.throughput * n / (1 + fit.contention * (n - 1) +
+                                 fit.coherency * n * (n - 1))
+
+
+def peak_concurrency(fit):
+    """ Returns the thread count at which a ScalabilityFit peaks, along with the
+        throughput it reaches there.
+
+    With coherency > 0, throughput peaks at sqrt((1 - contention) / coherency)
+    threads and declines beyond. Otherwise it only approaches its limit,
+    throughput / contention, as the number of threads grows, and the thread
+    count is inf.
+    """
+    if fit.coherency > 0 and fit.contention < 1:
+        n = math.sqrt((1 - fit.contention) / fit.coherency)
+        return max(n, 1.0), float(predict_throughput(fit, max(n, 1.0)))
+    if fit.coherency > 0:
+        return 1.0, fit.throughput
+    if fit.contention > 0:
+        return numpy.inf, fit.throughput / fit.contention
+    return numpy.inf, numpy.inf
+
+
+def fit_scalability(df, value, threads, configuration, model=USL, predict=()):
+    """ Fits a scalability model to every configuration of the results.
+
+    Arguments:
+        df: The results, with one row per configuration and thread count.
+        value: The column to fit (e.g., 'tot_thruput').
+        threads: The column holding the thread count (e.g., 'wrk_threads').
+        configuration: The columns identifying a curve (e.g., 'list', 'max_key',
+            'u_rate' and 'rq_rate').
+        model: USL or AMDAHL (see `fit_usl`).
+        predict: Thread counts at which to predict the value.
+
+    Returns:
+        A data frame indexed by configuration with the columns n (number of
+        thread counts), throughput, contention, coherency, r2, peak_threads and
+        peak_value (see `peak_concurrency`), and one column 'predicted_<N>' per
+        thread count in predict. Configurations that cannot be fitted are left
+        out.
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    rows = []
+    index = []
+    for key, group in df.groupby(configuration, observed=True, sort=True):
+        group = group.groupby(threads)[value].mean()
+        fit = fit_usl(group.index.to_numpy(), group.to_numpy(), model)
+        if fit is None:
+            continue
+        peak, peak_value = peak_concurrency(fit)
+        row = {
+            "n": len(group),
+            "throughput": fit.throughput,
+            "contention": fit.contention,
+            "coherency": fit.coherency,
+            "r2": fit.r2,
+            "peak_threads": peak,
+            "peak_value": peak_value,
+        }
+        for t, v in zip(predict, predict_throughput(fit, list(predict))):
+            row["predicted_{}".format(t)] = v
+        index.append(key if isinstance(key, tuple) else (key,))
+        rows.append(row)
+    if len(rows) == 0:
+        return pandas.DataFrame()
+    index = pandas.MultiIndex.from_tuples(index, names=configuration)
+    if len(configuration) == 1:
+        index = index.get_level_values(0)
+    return pandas.DataFrame(rows, index=index)
+
+
+def normalize_throughput(df, value, threads, topology):
+    """ Normalizes throughput by the hardware of the machine that measured it, so
+        that machines of different sizes and clock speeds can be compared.
+
+    Arguments:
+        df: The results, with a 'machine' column.
+        value: The column to normalize (e.g., 'tot_thruput').
+        threads: The columns adding up to the number of threads of a run (e.g.,
+            'wrk_threads' and 'rq_threads').
+        topology: A data frame indexed by machine with the columns cores and
+            cpu_freq_ghz (see ingest.TOPOLOGY_COLUMNS).
+
+    Returns:
+        A copy of df with the columns cores_used (threads, up to the number of
+        physical cores), <value>_per_core, <value>_per_ghz and
+        <value>_per_core_ghz. Machines without a topology get NaN.
+    """
+    df = df.copy()
+    hardware = topology.reindex(df["machine"].astype(str))
+    cores = hardware["cores"].to_numpy(dtype=float)
+    ghz = hardware["cpu_freq_ghz"].to_numpy(dtype=float)
+    nthreads = df[threads].sum(axis=1).to_numpy(dtype=float)
+    df["cores_used"] = numpy.minimum(numpy.maximum(nthreads, 1), cores)
+    df[value + "_per_core"] = df[value] / df["cores_used"]
+    df[value + "_per_ghz"] = df[value] / ghz
+    df[value + "_per_core_ghz"] = df[value] / (df["cores_used"] * ghz)
+    return df
+
+
+def scaling_shape(df, value, threads, configuration, topology):
+    """ Describes how throughput scales with the number of threads independently
+        of the speed and size of the machine.
+
+    Arguments:
+        df: The results, with one row per configuration and thread count.
+        value: The column to describe (e.g., 'tot_thruput').
+        threads: The column holding the thread count (e.g., 'wrk_threads').
+        configuration: The columns identifying a curve, including 'machine'.
+        topology: A data frame indexed by machine with the column cores.
+
+    Returns:
+        A copy of df with the columns relative_<value> (value over its value at
+        the fewest threads of the same curve) and core_fraction (threads over
+        the physical cores of the machine, NaN if unknown).
+    """
+    configuration = [c for c in configuration if c in df.columns]
+    df = df.sort_values(configuration + [threads], kind="stable")
+    first = df.groupby(configuration, observed=True)[value].transform("first")
+    df["relative_" + value] = df[value] / first.where(first > 0)
+    cores = topology["cores"].reindex(df["machine"].astype(str))
+    df["core_fraction"] = df[threads].to_numpy(dtype=float) / cores.to_numpy(
+        dtype=float)
+    return df
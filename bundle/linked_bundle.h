@@ -337,12 +337,12 @@ class LinkedBundle {
     std::stringstream ss;
     ss << "(ts=" << ts << ") : ";
     long i = 0;
-    while (curr != nullptr && curr != nullptr) {
+    while (curr != nullptr && curr->next_ != nullptr) {
       ss << "<" << curr->ts_ << "," << curr->ptr_ << "," << curr->next_ << ">"
          << "-->";
       curr = curr->next_;
     }
-    if (curr == nullptr) {
+    if (curr != nullptr) {
       ss << "(tail)<" << curr->ts_ << "," << curr->ptr_ << ","
          << reinterpret_cast<long>(curr->next_.load(std::memory_order_relaxed))
          << ">";
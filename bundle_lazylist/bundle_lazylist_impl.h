@@ -84,6 +84,8 @@ bundle_lazylist<K, V, RecManager>::bundle_lazylist(const int numProcesses,
 template <typename K, typename V, class RecManager>
 bundle_lazylist<K, V, RecManager>::~bundle_lazylist() {
   const int dummyTid = 0;
+  // Stops the background cleanup (if any) before freeing the nodes it walks.
+  delete rqProvider;
   nodeptr curr = head;
   while (curr->key < KEY_MAX) {
     nodeptr next = curr->next;
@@ -91,7 +93,6 @@ bundle_lazylist<K, V, RecManager>::~bundle_lazylist() {
     curr = next;
   }
   recordmgr->deallocate(dummyTid, curr);
-  delete rqProvider;
   recordmgr->printStatus();
   delete recordmgr;
 #ifdef USE_DEBUGCOUNTERS
@@ -385,7 +386,7 @@ void bundle_lazylist<K, V, RecManager>::cleanup(int tid) {
     recordmgr->enterQuiescentState(tid);
     return;
   }
-  BUNDLE_CLEAN_BUNDLE(&head->rqbundle);
+  BUNDLE_CLEAN_BUNDLE(head->rqbundle);
   for (nodeptr curr = head->next; curr->key != KEY_MAX; curr = curr->next) {
     BUNDLE_CLEAN_BUNDLE(curr->rqbundle);
   }
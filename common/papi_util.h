@@ -24,7 +24,7 @@ string all_cpu_counters_strings[] = {
     "PAPI_L3_TCM",
     "PAPI_RES_STL",
     "PAPI_TOT_CYC",
-    "PAPI_TOT_ISR" //,
+    "PAPI_TOT_INS" //,
 //    "PAPI_TLB_DM",
 };
 const int nall_cpu_counters = sizeof(all_cpu_counters) / sizeof(all_cpu_counters[0]);
@@ -0,0 +1,190 @@
+import analysis
+import ingest
+from plot_util import *
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+# Columns identifying a configuration across snapshots.
+COMPARE_CONFIG = [
+    "list", "max_key", "u_rate", "rq_rate", "wrk_threads", "rq_threads",
+    "rq_size"
+]
+
+# Metrics for which lower values are better.
+LATENCY_METRICS = ["u_latency", "c_latency", "rq_latency"]
+
+# Result snapshots to compare. runscript.sh moves the previous results to
+# data.old before starting a new run, so by default the latest run is compared
+# against the one before it.
+flags.DEFINE_string("baseline_dir", "./microbench/data.old",
+                    "Location of the microbenchmark data used as reference")
+flags.DEFINE_list(
+    "candidate_dirs", ["./microbench/data"],
+    "Locations of the microbenchmark data checked against the baseline")
+flags.DEFINE_list(
+    "experiments", None,
+    "Experiments to compare (defaults to all experiments present in every snapshot)"
+)
+flags.DEFINE_list(
+    "datastructures", None,
+    "Data structures to compare (defaults to all data structures found in the baseline)"
+)
+flags.DEFINE_integer(
+    "ntrials", 3,
+    "Number of trials per experiment (used when generating .csv files)")
+flags.DEFINE_integer(
+    "ingest_processes",
+    None,
+    "Number of worker processes used to parse raw trial output (defaults to the number of cores)",
+)
+
+# What counts as a regression.
+flags.DEFINE_list(
+    "metrics", ["tot_thruput", "u_thruput", "rq_thruput"] + LATENCY_METRICS,
+    "Per-trial columns to compare")
+flags.DEFINE_float(
+    "threshold", 0.05,
+    "Relative change of the mean beyond which a significant change is reported as a regression"
+)
+flags.DEFINE_float("alpha", 0.05,
+                   "Significance level of Welch's t-test")
+flags.DEFINE_integer("top", 20,
+                     "Number of changes to print from each end of the ranking")
+flags.DEFINE_string("report_csv", None,
+                    "If set, writes the full ranked comparison to this .csv file")
+
+
+def load_trials(datadir, experiment, ds, ntrials):
+    """Loads the per-trial results of a data structure, generating them from the raw
+    output if needed. Returns None if the snapshot has no results for it."""
+    dirpath = os.path.join(datadir, experiment)
+    if not os.path.isdir(dirpath):
+        return None
+    csvfile = CSVFile.get_or_gen_csv(dirpath, ds, ntrials,
+                                     FLAGS.ingest_processes)
+    trialsfile = ingest.trials_path(csvfile)
+    if not os.path.exists(trialsfile):
+        return None
+    return CSVFile.load(trialsfile).df
+
+
+def compare_snapshots(baseline_dir, candidate_dir, experiments, datastructures,
+                      metrics, ntrials):
+    """ Compares every configuration shared by two result snapshots.
+
+    Returns:
+        A data frame with one row per (experiment, configuration, metric) as
+        returned by analysis.compare_trials.
+    """
+    results = []
+    for experiment in experiments:
+        for ds in datastructures:
+            baseline = load_trials(baseline_dir, experiment, ds, ntrials)
+            candidate = load_trials(candidate_dir, experiment, ds, ntrials)
+            if baseline is None or candidate is None:
+                print("Skipping {}/{}: missing from one of the snapshots".format(
+                    experiment, ds))
+                continue
+            for metric in metrics:
+                result = analysis.compare_trials(
+                    baseline,
+                    candidate,
+                    metric,
+                    COMPARE_CONFIG,
+                    higher_is_better=metric not in LATENCY_METRICS)
+                if result.empty:
+                    continue
+                result.insert(0, "experiment", experiment)
+                results.append(result)
+    if len(results) == 0:
+        return pandas.DataFrame()
+    return pandas.concat(results, ignore_index=True)
+
+
+def classify(report, threshold, alpha):
+    """Labels every row of a comparison as 'regression', 'improvement' or
+    'unchanged' and ranks them from the worst regression to the best improvement."""
+    significant = report["p_value"] < alpha
+    report["verdict"] = "unchanged"
+    report.loc[significant & (report["improvement"] < -threshold),
+               "verdict"] = "regression"
+    report.loc[significant & (report["improvement"] > threshold),
+               "verdict"] = "improvement"
+    return report.sort_values("improvement", kind="stable").reset_index(
+        drop=True)
+
+
+def default_experiments(baseline_dir, candidate_dirs):
+    experiments = None
+    for d in [baseline_dir] + candidate_dirs:
+        found = {e for e in os.listdir(d) if os.path.isdir(os.path.join(d, e))}
+        experiments = found if experiments is None else experiments & found
+    return sorted(experiments)
+
+
+def default_datastructures(baseline_dir, experiments):
+    datastructures = set()
+    for experiment in experiments:
+        datastructures.update(
+            ingest.find_datastructures(os.path.join(baseline_dir, experiment)))
+    return sorted(datastructures)
+
+
+def main(argv):
+    experiments = FLAGS.experiments
+    if experiments is None:
+        experiments = default_experiments(FLAGS.baseline_dir,
+                                          FLAGS.candidate_dirs)
+    datastructures = FLAGS.datastructures
+    if datastructures is None:
+        datastructures = default_datastructures(FLAGS.baseline_dir,
+                                                experiments)
+    print("Experiments to compare: " + str(experiments))
+    print("Data structures: " + str(datastructures))
+
+    reports = []
+    for candidate_dir in FLAGS.candidate_dirs:
+        report = compare_snapshots(FLAGS.baseline_dir, candidate_dir,
+                                   experiments, datastructures, FLAGS.metrics,
+                                   FLAGS.ntrials)
+        if report.empty:
+            print("No configurations shared by {} and {}".format(
+                FLAGS.baseline_dir, candidate_dir))
+            continue
+        report.insert(0, "candidate", candidate_dir)
+        reports.append(report)
+    if len(reports) == 0:
+        return 0
+    report = classify(pandas.concat(reports, ignore_index=True),
+                      FLAGS.threshold, FLAGS.alpha)
+
+    regressions = report[report["verdict"] == "regression"]
+    improvements = report[report["verdict"] == "improvement"]
+    print("Compared {} (configuration, metric) pairs: {} regressions, "
+          "{} improvements (threshold={:.1%}, alpha={})".format(
+              len(report), len(regressions), len(improvements),
+              FLAGS.threshold, FLAGS.alpha))
+    formatters = {
+        "change": "{:+.1%}".format,
+        "improvement": "{:+.1%}".format,
+        "p_value": "{:.3g}".format,
+    }
+    if len(regressions) > 0:
+        print("\nRegressions (worst first):")
+        print(
+            regressions.head(FLAGS.top).to_string(index=False,
+                                                  formatters=formatters))
+    if len(improvements) > 0:
+        print("\nImprovements (best first):")
+        print(improvements.iloc[::-1].head(FLAGS.top).to_string(
+            index=False, formatters=formatters))
+    if FLAGS.report_csv is not None:
+        report.to_csv(FLAGS.report_csv, index=False)
+        print("\nFull report written to " + FLAGS.report_csv)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    app.run(main)
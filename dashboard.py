@@ -0,0 +1,455 @@
+"""Serves live dashboards of the microbenchmark results while a sweep is running.
+
+The results directory is polled for trial files that are new or have changed
+since the last poll, and only those are parsed (see ingest.parse_trial), so the
+in-memory index stays current for the whole length of a sweep. The page served
+at http://<host>:<port>/ plots throughput and latency against the number of
+threads for one configuration at a time, with the colors and labels of
+plotconfig, and lists alerts about trials that deserve attention:
+
+    validation: The trial printed "Validation FAILURE".
+    collapse:   The throughput of a finished trial is below --collapse_ratio
+                times the median of the other trials of its configuration, or
+                is 0.
+    stalled:    An unfinished trial has not written anything for
+                --stall_seconds.
+"""
+
+import asyncio
+import collections
+import ingest
+import json
+import os
+import re
+import statistics
+import time
+import urllib.parse
+import plotly.graph_objects as go
+import plotly.offline
+from plot_util import plotconfig
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("microbench_dir", "./microbench/data",
+                    "Location of the microbenchmark data to watch")
+flags.DEFINE_string("host", "127.0.0.1", "Address the server listens on")
+flags.DEFINE_integer("port", 8050, "Port the server listens on")
+flags.DEFINE_float("poll_seconds", 2.0,
+                   "Interval between two scans of the results directory")
+flags.DEFINE_float(
+    "collapse_ratio", 0.5,
+    "Finished trials whose throughput is below this fraction of the median of the other trials of their configuration are reported"
+)
+flags.DEFINE_float(
+    "stall_seconds", 600,
+    "Unfinished trials whose output has not changed for this long are reported")
+
+# Columns identifying the configurations plotted together in one dashboard, and
+# the columns of every indexed trial.
+GROUP_COLUMNS = [
+    "experiment", "ds", "max_key", "u_rate", "rq_rate", "rq_size",
+    "rq_threads"
+]
+LATENCY_METRICS = ["u_latency", "c_latency", "rq_latency"]
+
+# An alert about a trial.
+Alert = collections.namedtuple("Alert", ["time", "kind", "file", "message"])
+
+_ALG_RE = "[.]([^.]+)[.]{}[.]k[0-9]"
+
+
+class ResultIndex:
+    """ Parsed trials of a results directory, updated incrementally.
+
+    Trials are kept as rows keyed by their path relative to the directory. A row
+    holds the GROUP_COLUMNS, 'alg', 'wrk_threads', 'trial', 'complete',
+    'validation_failed', 'tot_thruput' and LATENCY_METRICS.
+    """
+
+    def __init__(self, datadir, collapse_ratio, stall_seconds):
+        self.datadir = datadir
+        self.collapse_ratio = collapse_ratio
+        self.stall_seconds = stall_seconds
+        self.rows = {}
+        self.alerts = []
+        self.version = 0  # Incremented whenever the index changes.
+        self._signatures = {}
+        self._alerted = set()
+
+    def refresh(self):
+        """ Parses the trial files that appeared or changed since the last call.
+
+        Returns:
+            The number of files that were (re)parsed.
+        """
+        return self.apply(self.scan())
+
+    def scan(self):
+        """ Finds and parses the trial files that appeared or changed since the
+            last scan, without modifying the index (so that it can run in another
+            thread than the readers of the index).
+
+        Returns:
+            A pair (parsed, seen): the new rows keyed by file (None if a file
+            could not be parsed) and the set of all files found.
+        """
+        seen = set()
+        parsed = {}
+        for dirpath, _, filenames in os.walk(self.datadir):
+            for f in filenames:
+                if not (f.startswith("step") and f.endswith(".out")):
+                    continue
+                path = os.path.join(dirpath, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # Removed since it was listed.
+                key = os.path.relpath(path, self.datadir)
+                seen.add(key)
+                signature = (st.st_mtime_ns, st.st_size)
+                if self._signatures.get(key) != signature:
+                    self._signatures[key] = signature
+                    parsed[key] = self._parse(key)
+        return parsed, seen
+
+    def apply(self, changes):
+        """ Updates the index with the result of `scan` and checks the changed
+            trials for alerts.
+
+        Returns:
+            The number of files that were (re)parsed.
+        """
+        parsed, seen = changes
+        removed = [key for key in self.rows if key not in seen]
+        for key in removed:
+            del self.rows[key]
+        for key in [k for k in self._signatures if k not in seen]:
+            del self._signatures[key]
+        for key, row in parsed.items():
+            if row is not None:
+                self.rows[key] = row
+        for key in parsed:
+            if key in self.rows:
+                self._check(key)
+        self._check_stalled()
+        if parsed or removed:
+            self.version += 1
+        return len(parsed)
+
+    def _parse(self, key):
+        parts = key.split(os.sep)
+        if len(parts) != 3:
+            return None
+        experiment, alg, filename = parts
+        m = re.search(_ALG_RE.format(re.escape(alg)), filename)
+        if m is None:
+            return None
+        try:
+            trial = ingest.parse_trial(os.path.join(self.datadir, key))
+        except (OSError, ValueError):
+            return None  # Partially written; parsed again once it changes.
+        row = {
+            "experiment": experiment,
+            "ds": m.group(1),
+            "alg": alg,
+            "max_key": trial.get("MAXKEY", 0),
+            "u_rate": trial.get("INS", 0) + trial.get("DEL", 0),
+            "rq_rate": trial.get("RQ", 0),
+            "rq_size": trial.get("RQSIZE", 0),
+            "rq_threads": trial.get("RQ_THREADS", 0),
+            "wrk_threads": trial.get("WORK_THREADS", 0),
+            "trial": ingest.trial_number(filename),
+            "complete": trial["complete"],
+            "validation_failed": trial["validation_failed"],
+            "tot_thruput": trial["tot_thruput"],
+        }
+        for metric in LATENCY_METRICS:
+            row[metric] = trial[metric]
+        return row
+
+    def _alert(self, kind, key, message):
+        if (kind, key) in self._alerted:
+            return
+        self._alerted.add((kind, key))
+        self.alerts.append(Alert(time.time(), kind, key, message))
+        print("ALERT ({}): {}: {}".format(kind, key, message))
+
+    def _check(self, key):
+        row = self.rows[key]
+        if row["validation_failed"]:
+            self._alert("validation", key, "Validation FAILURE")
+        if not row["complete"]:
+            return
+        if row["tot_thruput"] <= 0:
+            self._alert("collapse", key, "throughput is 0")
+            return
+        others = [
+            r["tot_thruput"] for k, r in self.rows.items()
+            if k != key and r["complete"] and _same_configuration(r, row)
+        ]
+        if len(others) > 0:
+            median = statistics.median(others)
+            if row["tot_thruput"] < self.collapse_ratio * median:
+                self._alert(
+                    "collapse", key,
+                    "throughput {} is {:.0%} of the median of the other trials ({})"
+                    .format(row["tot_thruput"], row["tot_thruput"] / median,
+                            median))
+
+    def _check_stalled(self):
+        now = time.time_ns()
+        for key, row in self.rows.items():
+            idle = (now - self._signatures[key][0]) / 1e9
+            if not row["complete"] and idle > self.stall_seconds:
+                self._alert("stalled", key,
+                            "no output for {:.0f}s".format(idle))
+
+    def groups(self):
+        """Returns the distinct values of GROUP_COLUMNS, sorted."""
+        return sorted({
+            tuple(row[c] for c in GROUP_COLUMNS) for row in self.rows.values()
+        })
+
+    def select(self, group):
+        """Returns the finished trials of a group (see `groups`)."""
+        return [
+            row for row in self.rows.values() if row["complete"] and
+            tuple(row[c] for c in GROUP_COLUMNS) == tuple(group)
+        ]
+
+
+def _same_configuration(a, b):
+    return all(a[c] == b[c] for c in GROUP_COLUMNS + ["alg", "wrk_threads"])
+
+
+def group_label(group):
+    values = dict(zip(GROUP_COLUMNS, group))
+    return ("{experiment} / {ds} / k={max_key} u={u_rate:g} rq={rq_rate:g} "
+            "rqsize={rq_size} nrq={rq_threads}".format(**values))
+
+
+def build_figure(rows, metric, ytitle, scale=1.0):
+    """ Plots the mean of a metric against the number of worker threads, with one
+        line per algorithm and error bars showing the standard deviation.
+    """
+    fig = go.Figure(
+        layout={
+            "xaxis": {
+                "title": {
+                    "text": "Worker threads"
+                }
+            },
+            "yaxis": {
+                "title": {
+                    "text": ytitle
+                }
+            },
+            "plot_bgcolor": "white",
+            "margin": {
+                "l": 60,
+                "r": 10,
+                "t": 10,
+                "b": 50
+            },
+        })
+    by_alg = collections.defaultdict(lambda: collections.defaultdict(list))
+    for row in rows:
+        by_alg[row["alg"]][row["wrk_threads"]].append(row[metric] * scale)
+    for alg in [a for a in plotconfig if a in by_alg
+               ] + sorted(a for a in by_alg if a not in plotconfig):
+        points = sorted(by_alg[alg].items())
+        config = plotconfig.get(alg, {})
+        fig.add_trace(
+            go.Scatter(
+                x=[threads for threads, _ in points],
+                y=[statistics.mean(values) for _, values in points],
+                error_y={
+                    "type":
+                        "data",
+                    "array": [
+                        statistics.stdev(values) if len(values) > 1 else 0
+                        for _, values in points
+                    ],
+                },
+                name=config.get("label", alg),
+                mode="markers+lines",
+                marker={
+                    "symbol": config.get("symbol", 0),
+                    "color": config.get("color"),
+                    "size": 10,
+                    "line": {
+                        "color": "black",
+                        "width": 1
+                    },
+                },
+                line={"color": config.get("color")},
+            ))
+    return fig
+
+
+def state(index, group_id, latency):
+    """ Returns everything the page shows, as a dictionary that is sent as JSON.
+
+    Arguments:
+        index: The ResultIndex.
+        group_id: Position of the selected group in index.groups().
+        latency: The latency metric to plot (one of LATENCY_METRICS).
+    """
+    groups = index.groups()
+    result = {
+        "version": index.version,
+        "trials": len(index.rows),
+        "complete": sum(1 for r in index.rows.values() if r["complete"]),
+        "groups": [group_label(g) for g in groups],
+        "alerts": [a._asdict() for a in reversed(index.alerts)],
+    }
+    if 0 <= group_id < len(groups):
+        rows = index.select(groups[group_id])
+        result["throughput"] = json.loads(
+            build_figure(rows, "tot_thruput", "Mops/s", 1e-6).to_json())
+        result["latency"] = json.loads(
+            build_figure(rows, latency, latency + " (ns)").to_json())
+    return result
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Microbenchmark results</title>
+<script src="/plotly.js"></script>
+<style>
+body { font-family: sans-serif; margin: 1em; }
+.alert { color: #b00; font-family: monospace; }
+.plots { display: flex; flex-wrap: wrap; }
+.plots div { width: 48%%; min-width: 400px; height: 420px; }
+</style>
+</head>
+<body>
+<div id="status"></div>
+<p>
+<select id="group"></select>
+<select id="latency">
+<option>rq_latency</option><option>u_latency</option><option>c_latency</option>
+</select>
+</p>
+<div class="plots"><div id="throughput"></div><div id="latency_plot"></div></div>
+<h3>Alerts</h3>
+<div id="alerts"></div>
+<script>
+const group = document.getElementById("group");
+const latency = document.getElementById("latency");
+async function update() {
+  const response = await fetch("/api/state?group=" + Math.max(group.selectedIndex, 0) +
+                               "&latency=" + latency.value);
+  const state = await response.json();
+  document.getElementById("status").textContent =
+      state.complete + " of " + state.trials + " trials finished";
+  if (group.options.length != state.groups.length) {
+    const selected = group.selectedIndex;
+    group.innerHTML = "";
+    for (const label of state.groups) group.add(new Option(label));
+    group.selectedIndex = Math.max(selected, 0);
+  }
+  if (state.throughput) {
+    Plotly.react("throughput", state.throughput.data, state.throughput.layout);
+    Plotly.react("latency_plot", state.latency.data, state.latency.layout);
+  }
+  const alerts = document.getElementById("alerts");
+  alerts.innerHTML = "";
+  for (const a of state.alerts) {
+    const line = document.createElement("div");
+    line.className = "alert";
+    line.textContent = new Date(a.time * 1000).toLocaleTimeString() + " [" +
+                       a.kind + "] " + a.file + ": " + a.message;
+    alerts.appendChild(line);
+  }
+}
+group.onchange = update;
+latency.onchange = update;
+update();
+setInterval(update, %d);
+</script>
+</body>
+</html>
+"""
+
+
+async def watch(index, interval):
+    """Refreshes the index every interval seconds, parsing in a worker thread."""
+    loop = asyncio.get_running_loop()
+    while True:
+        parsed = index.apply(await loop.run_in_executor(None, index.scan))
+        if parsed > 0:
+            print("Parsed {} trial files ({} indexed)".format(
+                parsed, len(index.rows)))
+        await asyncio.sleep(interval)
+
+
+def make_handler(index, interval):
+    """Returns the connection handler of the HTTP server."""
+    plotlyjs = plotly.offline.get_plotlyjs().encode()
+    page = (PAGE % int(interval * 1000)).encode()
+
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed.
+            parts = request.decode(errors="replace").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, ctype, body = "405 Method Not Allowed", "text/plain", b""
+            else:
+                url = urllib.parse.urlsplit(parts[1])
+                query = urllib.parse.parse_qs(url.query)
+                if url.path == "/":
+                    status, ctype, body = "200 OK", "text/html", page
+                elif url.path == "/plotly.js":
+                    status, ctype, body = "200 OK", "application/javascript", plotlyjs
+                elif url.path == "/api/state":
+                    latency = query.get("latency", ["rq_latency"])[0]
+                    if latency not in LATENCY_METRICS:
+                        latency = "rq_latency"
+                    try:
+                        group_id = int(query.get("group", ["0"])[0])
+                    except ValueError:
+                        group_id = 0
+                    status, ctype = "200 OK", "application/json"
+                    body = json.dumps(state(index, group_id,
+                                            latency)).encode()
+                else:
+                    status, ctype, body = "404 Not Found", "text/plain", b""
+            writer.write("HTTP/1.1 {}\r\nContent-Type: {}\r\n"
+                         "Content-Length: {}\r\nConnection: close\r\n\r\n".format(
+                             status, ctype, len(body)).encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(index, host, port, interval):
+    server = await asyncio.start_server(make_handler(index, interval), host,
+                                        port)
+    print("Serving dashboards of {} at http://{}:{}/".format(
+        index.datadir, host, port))
+    async with server:
+        await asyncio.gather(server.serve_forever(), watch(index, interval))
+
+
+def main(argv):
+    index = ResultIndex(FLAGS.microbench_dir, FLAGS.collapse_ratio,
+                        FLAGS.stall_seconds)
+    try:
+        asyncio.run(serve(index, FLAGS.host, FLAGS.port, FLAGS.poll_seconds))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -0,0 +1,382 @@
+"""Generates the microbenchmark experiment list from a declarative spec.
+
+The experiments are declared in microbench/experiments.toml. This script expands
+them into microbench/experiment_list.txt (one 'u rq rqsize k nrq nwork ds alg'
+line per configuration, the format read by runscript.sh and runner.py), and
+plot.py reads the same spec to know which experiments, data structures and key
+ranges to plot.
+
+Every experiment assigns values to the axes u, rq, rqsize, k, nrq and nwork,
+either as a list or as a range table such as '{min = 1e4, max = 1e7, points = 4,
+log = true}'. The value "threads" stands for the thread counts of config.mk. The
+configurations are chosen according to the experiment's 'sampling':
+
+    full:   The cartesian product of all axes (the default).
+    sparse: A base configuration (the first value of every axis, or 'base'),
+            plus every other value of one axis at a time.
+    lhs:    'samples' configurations drawn by Latin hypercube sampling, which
+            covers every axis evenly with few configurations. Ranges are sampled
+            continuously (log-uniformly with 'log = true').
+
+Axes listed in 'keep' are left out of the sampling and run in full with every
+sampled configuration (e.g., keep = ["nwork"] keeps complete scalability
+curves). Every configuration is run with all supported pairs of data structure
+and technique, so that the techniques are always compared on the same points.
+
+Besides 'rqtechniques', an experiment may list 'relaxations' and
+'cleanup_delays' to run the bundle variants built by `make relax` and `make
+cleanup` (see microbench/bundle.mk): every relaxation T adds the technique
+'relax<T>' and every delay d (in microseconds) the technique 'delay<d>'.
+"""
+
+import collections
+import itertools
+import math
+import os
+import random
+import sys
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+# Axes of a configuration, in the order of experiment_list.txt.
+AXES = ["u", "rq", "rqsize", "k", "nrq", "nwork"]
+# Configurations are generated with the first of these axes varying slowest,
+# then the data structure and technique, and 'nwork' varying fastest (the order
+# of the loops of experiment_list_generate.sh).
+_OUTER_AXES = ["rqsize", "rq", "u", "k", "nrq"]
+
+SAMPLING_MODES = ["full", "sparse", "lhs"]
+
+# Prefixes of the bundle variants generated from 'relaxations' and
+# 'cleanup_delays', which are looked up in the 'supported' tables without the
+# value that follows them.
+RELAXATION_PREFIX = "relax"
+CLEANUP_DELAY_PREFIX = "delay"
+
+# A line of experiment_list.txt.
+Configuration = collections.namedtuple(
+    "Configuration", ["u", "rq", "rqsize", "k", "nrq", "nwork", "ds", "alg"])
+
+
+def read_config_mk(filepath):
+    """ Reads the variables assigned in config.mk (which is valid in both make and
+        bash), stripping the quotes around their values.
+    """
+    config = {}
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            config[key.strip()] = value
+    return config
+
+
+def load_spec(filepath):
+    """Loads an experiment spec, checking the fields that the generator relies on."""
+    with open(filepath, "rb") as f:
+        spec = tomllib.load(f)
+    names = set()
+    for experiment in spec.get("experiments", []):
+        name = experiment.get("name")
+        if name is None or name in names:
+            raise ValueError(
+                "{}: every experiment needs a unique name".format(filepath))
+        names.add(name)
+        sampling = experiment.get("sampling", "full")
+        if sampling not in SAMPLING_MODES:
+            raise ValueError("{}: unknown sampling '{}' in {}".format(
+                filepath, sampling, name))
+        if sampling == "lhs" and "samples" not in experiment:
+            raise ValueError("{}: lhs sampling needs 'samples' in {}".format(
+                filepath, name))
+        for axis in experiment.get("keep", []):
+            if axis not in AXES:
+                raise ValueError("{}: cannot keep unknown axis '{}' in {}".format(
+                    filepath, axis, name))
+        for field in ["relaxations", "cleanup_delays"]:
+            if not all(
+                    isinstance(v, int) and v >= 0
+                    for v in experiment.get(field, [])):
+                raise ValueError(
+                    "{}: '{}' must be non-negative integers in {}".format(
+                        filepath, field, name))
+    return spec
+
+
+def thread_counts(maxthreads, threadincrement):
+    """Returns the thread counts of config.mk: 0, 1, every multiple of
+    threadincrement and maxthreads (as experiment_list_generate.sh did)."""
+    counts = [0]
+    if threadincrement != 1:
+        counts.append(1)
+    counts += list(range(threadincrement, maxthreads, threadincrement))
+    counts.append(maxthreads)
+    return counts
+
+
+def axis_values(spec, experiment, axis, threads):
+    """ Returns the values an experiment assigns to an axis.
+
+    Returns:
+        Either a list of values, or a range table with 'min', 'max' and optionally
+        'points' and 'log' (only when the axis is sampled by lhs).
+    """
+    if axis in experiment:
+        values = experiment[axis]
+    elif axis == "k":
+        values = spec["ksizes"]
+    else:
+        raise ValueError("Experiment {} does not set '{}'".format(
+            experiment["name"], axis))
+    if values == "threads":
+        return list(threads)
+    if isinstance(values, dict):
+        return values
+    return list(values)
+
+
+def expand_range(values):
+    """Returns the 'points' evenly spaced integers of a range table (geometrically
+    spaced with 'log = true'), or the values themselves if they are a list."""
+    if not isinstance(values, dict):
+        return values
+    low = values["min"]
+    high = values["max"]
+    points = values.get("points", 2)
+    if points == 1:
+        return [int(low)]
+    result = []
+    for i in range(points):
+        if values.get("log", False):
+            value = low * (high / low)**(i / (points - 1))
+        else:
+            value = low + (high - low) * i / (points - 1)
+        result.append(int(round(value)))
+    return list(dict.fromkeys(result))
+
+
+def _full(axes):
+    names = list(axes.keys())
+    return [
+        dict(zip(names, point))
+        for point in itertools.product(*[expand_range(axes[n]) for n in names])
+    ]
+
+
+def _sparse(axes, base):
+    names = list(axes.keys())
+    expanded = {n: expand_range(axes[n]) for n in names}
+    center = {n: base.get(n, expanded[n][0]) for n in names}
+    points = [center]
+    for n in names:
+        for value in expanded[n]:
+            if value != center[n]:
+                points.append(dict(center, **{n: value}))
+    return points
+
+
+def _lhs(axes, samples, rng):
+    # Every axis is split into 'samples' strata, each of which is sampled once;
+    # the strata of different axes are matched by random permutations.
+    points = [{} for _ in range(samples)]
+    for name, values in axes.items():
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        for point, stratum in zip(points, strata):
+            u = (stratum + rng.random()) / samples
+            if isinstance(values, dict):
+                low = values["min"]
+                high = values["max"]
+                if values.get("log", False):
+                    value = math.exp(
+                        math.log(low) + u * (math.log(high) - math.log(low)))
+                else:
+                    value = low + u * (high - low)
+                point[name] = int(round(value))
+            else:
+                point[name] = values[min(int(u * len(values)), len(values) - 1)]
+    return points
+
+
+def sample_points(spec, experiment, threads):
+    """ Chooses the points (assignments of AXES) of an experiment according to its
+        sampling mode, before any filtering.
+    """
+    axes = {
+        a: axis_values(spec, experiment, a, threads)
+        for a in _OUTER_AXES + ["nwork"]
+    }
+    keep = experiment.get("keep", [])
+    sampled = {a: v for a, v in axes.items() if a not in keep}
+    sampling = experiment.get("sampling", "full")
+    if sampling == "full":
+        points = _full(sampled)
+    elif sampling == "sparse":
+        points = _sparse(sampled, experiment.get("base", {}))
+    else:
+        rng = random.Random(experiment.get("seed", 0))
+        points = _lhs(sampled, experiment["samples"], rng)
+    kept = _full({a: axes[a] for a in keep})
+    return [dict(p, **k) for p in points for k in kept]
+
+
+def techniques(spec, experiment):
+    """Returns the techniques an experiment runs: its 'rqtechniques' followed by
+    the bundle variants of its 'relaxations' and 'cleanup_delays'."""
+    result = list(experiment.get("rqtechniques", spec["rqtechniques"]))
+    result += [
+        RELAXATION_PREFIX + str(t) for t in experiment.get("relaxations", [])
+    ]
+    result += [
+        CLEANUP_DELAY_PREFIX + str(d)
+        for d in experiment.get("cleanup_delays", [])
+    ]
+    return list(dict.fromkeys(result))
+
+
+def technique_family(alg):
+    """Returns the name under which a technique appears in the 'supported' tables,
+    i.e., 'relax' and 'delay' for the bundle variants (e.g., 'relax50')."""
+    for prefix in [RELAXATION_PREFIX, CLEANUP_DELAY_PREFIX]:
+        if alg.startswith(prefix) and alg[len(prefix):].isdigit():
+            return prefix
+    return alg
+
+
+def is_supported(spec, ds, alg, k):
+    """Whether a data structure supports a technique and is run at a key range,
+    according to the 'supported' tables of the spec (see supported.inc)."""
+    supported = spec.get("supported", {})
+    techniques = supported.get("techniques", {})
+    alg = technique_family(alg)
+    if alg in techniques and ds not in techniques[alg]:
+        return False
+    ksizes = supported.get("ksizes", {})
+    if str(k) in ksizes and ds not in ksizes[str(k)]:
+        return False
+    return True
+
+
+def is_excluded(point, excludes):
+    """Whether a point matches all fields of any of the 'exclude' entries of an
+    experiment."""
+    for exclude in excludes:
+        if all(point[axis] in (values if isinstance(values, list) else [values])
+               for axis, values in exclude.items()):
+            return True
+    return False
+
+
+def expand_experiment(spec, experiment, maxthreads, threadincrement):
+    """ Expands an experiment of the spec into its configurations.
+
+    Points without any thread, with more threads than maxthreads or with more
+    than 100% of updates and range queries, as well as unsupported pairs of
+    data structure and technique, are left out.
+
+    Returns:
+        A list of Configuration, in the order they should be run.
+    """
+    threads = thread_counts(maxthreads, threadincrement)
+    groups = collections.OrderedDict()
+    for point in sample_points(spec, experiment, threads):
+        if point["nwork"] == 0 and point["nrq"] == 0:
+            continue
+        if point["nwork"] + point["nrq"] > maxthreads:
+            print("WARNING ({}): skipping {} threads, more than maxthreads".format(
+                experiment["name"], point["nwork"] + point["nrq"]))
+            continue
+        if 2 * point["u"] + point["rq"] > 100:
+            continue
+        if is_excluded(point, experiment.get("exclude", [])):
+            continue
+        outer = tuple(point[a] for a in _OUTER_AXES)
+        nworks = groups.setdefault(outer, [])
+        if point["nwork"] not in nworks:
+            nworks.append(point["nwork"])
+
+    datastructures = experiment.get("datastructures", spec["datastructures"])
+    configurations = []
+    for outer, nworks in groups.items():
+        point = dict(zip(_OUTER_AXES, outer))
+        for ds in datastructures:
+            for alg in techniques(spec, experiment):
+                if not is_supported(spec, ds, alg, point["k"]):
+                    continue
+                for nwork in nworks:
+                    configurations.append(
+                        Configuration(point["u"], point["rq"], point["rqsize"],
+                                      point["k"], point["nrq"], nwork, ds, alg))
+    return configurations
+
+
+def generate(spec, maxthreads, threadincrement):
+    """ Expands every experiment of the spec.
+
+    Returns:
+        A list of pairs (name, configurations), in the order of the spec.
+    """
+    return [(e["name"],
+             expand_experiment(spec, e, maxthreads, threadincrement))
+            for e in spec.get("experiments", [])]
+
+
+def write_experiment_list(experiments, filepath):
+    """ Writes experiment_list.txt, starting every experiment with the 'prepare'
+        line that names its directory.
+    """
+    with open(filepath + ".tmp", "w") as f:
+        for name, configurations in experiments:
+            f.write("0 0 0 0 0 0 {} prepare\n".format(name))
+            for c in configurations:
+                f.write(" ".join(str(v) for v in c) + "\n")
+    os.replace(filepath + ".tmp", filepath)
+
+
+def plot_configs(spec, maxthreads, threadincrement):
+    """ Returns what plot.py needs to know about the experiments of a spec.
+
+    Returns:
+        A pair (experiments, configs) where experiments are the names of the
+        experiments prefixed with 'run_' and configs holds the 'datastructures'
+        and 'ksizes' that were generated.
+    """
+    experiments = []
+    datastructures = []
+    ksizes = []
+    for name, configurations in generate(spec, maxthreads, threadincrement):
+        experiments.append("run_" + name)
+        for c in configurations:
+            if c.ds not in datastructures:
+                datastructures.append(c.ds)
+            if c.k not in ksizes:
+                ksizes.append(c.k)
+    return experiments, {"datastructures": datastructures, "ksizes": ksizes}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print("Incorrect number of arguments (expected 3, actual={}).".format(
+            len(sys.argv) - 1))
+        print("Usage: {} <spec> <config.mk> <experiment_list>".format(
+            sys.argv[0]))
+        sys.exit(1)
+    config = read_config_mk(sys.argv[2])
+    experiments = generate(load_spec(sys.argv[1]), int(config["maxthreads"]),
+                           int(config["threadincrement"]))
+    for name, configurations in experiments:
+        print("Generated {} configurations for {}.".format(
+            len(configurations), name))
+    write_experiment_list(experiments, sys.argv[3])
+    print("Total experiment lines generated: {}".format(
+        sum(len(c) + 1 for _, c in experiments)))
@@ -0,0 +1,367 @@
+"""Merges the microbenchmark results of several machines into one store.
+
+Every source is a results directory (e.g., a copy of ./microbench/data from one
+machine). The trials of each experiment and data structure are ingested as
+usual, and the rows of all sources are merged into '<store>/<experiment>/<ds>.csv',
+keyed by the machine that ran them (the hostname in the trial file names). The
+topology recorded by runner.py on every machine ('topology.<machine>.json', see
+ingest.machine_topology) is gathered in '<store>/machines.csv' and used to
+normalize throughput per core and per GHz, and to express thread counts as a
+fraction of the cores of the machine, so that the scaling of machines of
+different generations can be compared (see analysis.normalize_throughput and
+analysis.scaling_shape). The scalability model fitted to every curve of every
+machine is written to '<store>/scaling.csv'.
+
+The merged files are read like any other results, e.g.,
+CSVFile.load(store_path).query(machine="host", max_key=10000).
+"""
+
+import analysis
+import experiments as experiment_spec
+import ingest
+import socket
+from plot_util import *
+from plotly.subplots import make_subplots
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+# Columns identifying a curve of throughput against worker threads on a machine.
+CURVE_CONFIG = [
+    "machine", "list", "max_key", "u_rate", "rq_rate", "rq_threads", "rq_size"
+]
+
+# Hardware columns added to every row of the store.
+HARDWARE_COLUMNS = ["sockets", "cores", "cpu_freq_ghz"]
+
+# Value plotted for every --normalize choice, with its axis title.
+NORMALIZATIONS = {
+    "none": ("tot_thruput", "Mops/s", 1e-6),
+    "core": ("tot_thruput_per_core", "Mops/s per core", 1e-6),
+    "ghz": ("tot_thruput_per_ghz", "Mops/s per GHz", 1e-6),
+    "core_ghz": ("tot_thruput_per_core_ghz", "Mops/s per core-GHz", 1e-6),
+}
+
+# Dash patterns telling the machines of a figure apart.
+DASHES = ["solid", "dash", "dot", "dashdot", "longdash", "longdashdot"]
+
+flags.DEFINE_list(
+    "sources", ["./microbench/data"],
+    "Results directories to merge, optionally as 'machine=path' to name the machine of results whose trial files do not (e.g., .csv files without their raw data)"
+)
+flags.DEFINE_string("store", "./federated",
+                    "Directory where the merged results are written")
+flags.DEFINE_list(
+    "experiments", None,
+    "Experiments to merge (defaults to all experiments present in any source)")
+flags.DEFINE_list(
+    "datastructures", None,
+    "Data structures to merge (defaults to all data structures found)")
+flags.DEFINE_integer(
+    "ntrials", 3,
+    "Number of trials per experiment (used when generating .csv files)")
+flags.DEFINE_integer(
+    "ingest_processes",
+    None,
+    "Number of worker processes used to parse raw trial output (defaults to the number of cores)",
+)
+flags.DEFINE_enum("normalize", "core", list(NORMALIZATIONS.keys()),
+                  "How throughput is normalized in the figures")
+flags.DEFINE_enum(
+    "scalability_model", "usl", ["usl", "amdahl"],
+    "Model fitted to every curve: the Universal Scalability Law or Amdahl's law")
+flags.DEFINE_bool(
+    "save_plots", False,
+    "Save a figure of the normalized throughput and the scaling shape of every configuration under --save_dir"
+)
+flags.DEFINE_string("save_dir", "./figures", "Directory where to save plots")
+flags.DEFINE_string(
+    "capture_topology", None,
+    "If set, only records the topology of this machine (see --config and --machine) in this results directory, e.g., for results not run by runner.py"
+)
+flags.DEFINE_string("config", "./config.mk",
+                    "Configuration the trials of --capture_topology were run with")
+flags.DEFINE_string(
+    "machine", None,
+    "Machine name used by --capture_topology (defaults to the hostname)")
+
+
+def parse_source(source):
+    """Splits a --sources entry into (machine, path); machine is None unless given."""
+    machine, sep, path = source.partition("=")
+    if not sep:
+        return None, source
+    return machine, path
+
+
+def load_topologies(sources):
+    """ Gathers the topologies recorded in the given results directories.
+
+    Returns:
+        A data frame indexed by machine with the columns of
+        ingest.TOPOLOGY_COLUMNS. A machine recorded by several sources keeps
+        the topology of the last one.
+    """
+    topologies = {}
+    for _, path in sources:
+        topologies.update(ingest.read_topologies(path))
+    columns = ingest.TOPOLOGY_COLUMNS
+    table = pandas.DataFrame([[t.get(c) for c in columns]
+                              for t in topologies.values()],
+                             columns=columns)
+    return table.set_index("machine")
+
+
+def load_source(path, machine, experiment, ds, ntrials):
+    """Loads the results of a data structure from one source, or None if it has
+    none. Rows without a machine are attributed to the given one."""
+    dirpath = os.path.join(path, experiment)
+    if not os.path.isdir(dirpath):
+        return None
+    if len(ingest.find_trials(dirpath, ds)) == 0 and not os.path.exists(
+            os.path.join(dirpath, ds + ".csv")):
+        return None
+    csvfile = CSVFile.get_or_gen_csv(dirpath, ds, ntrials,
+                                     FLAGS.ingest_processes)
+    df = pandas.read_csv(csvfile, sep=",", index_col=False)
+    if "machine" not in df.columns:
+        df["machine"] = numpy.nan
+    df["machine"] = df["machine"].astype(object)
+    if machine is not None:
+        df.loc[df["machine"].isna() | (df["machine"] == ""),
+               "machine"] = machine
+    return df
+
+
+def federate(sources, experiment, ds, ntrials, topology):
+    """ Merges the results of a data structure from all sources and adds the
+        hardware-normalized metrics.
+
+    Configurations run by the same machine in several sources keep the row of
+    the last source.
+
+    Returns:
+        The merged data frame (see `analysis.normalize_throughput` and
+        `analysis.scaling_shape` for the added columns), or None if no source
+        has results for it.
+    """
+    frames = []
+    for machine, path in sources:
+        df = load_source(path, machine, experiment, ds, ntrials)
+        if df is not None:
+            frames.append(df)
+    if len(frames) == 0:
+        return None
+    df = pandas.concat(frames, ignore_index=True)
+    df = df[df["machine"].notna() & (df["machine"] != "")].copy()
+    df["machine"] = df["machine"].astype(str)
+    before = len(df)
+    df = df.drop_duplicates(CURVE_CONFIG + ["wrk_threads"], keep="last")
+    if len(df) < before:
+        print("Note: {} configurations of {}/{} found in several sources, "
+              "keeping the last one".format(before - len(df), experiment, ds))
+    unknown = sorted(set(df["machine"]) - set(topology.index))
+    if len(unknown) > 0:
+        print("Warning: no topology for {} ({}/{}), their normalized values "
+              "are empty. See --capture_topology.".format(
+                  ", ".join(unknown), experiment, ds))
+    hardware = topology.reindex(df["machine"])[HARDWARE_COLUMNS]
+    for c in HARDWARE_COLUMNS:
+        df[c] = hardware[c].to_numpy()
+    df = analysis.normalize_throughput(df, "tot_thruput",
+                                       ["wrk_threads", "rq_threads"], topology)
+    return analysis.scaling_shape(df, "tot_thruput", "wrk_threads",
+                                  CURVE_CONFIG, topology)
+
+
+def fit_machines(df, topology, model):
+    """ Fits the scalability model to every curve of every machine.
+
+    Returns:
+        The fits (see analysis.fit_scalability), with peak_core_fraction, the
+        thread count of the peak over the physical cores of the machine.
+    """
+    fits = analysis.fit_scalability(df, "tot_thruput", "wrk_threads",
+                                    CURVE_CONFIG, model)
+    if fits.empty:
+        return fits
+    machines = fits.index.get_level_values("machine")
+    cores = topology["cores"].reindex(machines).to_numpy(dtype=float)
+    fits["peak_core_fraction"] = fits["peak_threads"].to_numpy() / cores
+    return fits
+
+
+def write_csv(df, filepath):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    df.to_csv(filepath + ".tmp", index=False)
+    os.replace(filepath + ".tmp", filepath)
+
+
+def store_file(store, experiment, ds):
+    """Returns where the merged results of a data structure are written."""
+    return os.path.join(store, experiment, ds + ".csv")
+
+
+def plot_machines(csvfile, experiment, ds, normalize, save_dir):
+    """ Saves one figure per configuration of a merged data structure, with the
+        normalized throughput against the number of worker threads on the left
+        and the throughput relative to the fewest threads against the fraction
+        of the cores in use on the right. Every algorithm has its color and
+        every machine its dash pattern.
+    """
+    value, title, scale = NORMALIZATIONS[normalize]
+    data = CSVFile.load(csvfile).df
+    machines = sorted(set(data["machine"].astype(str)))
+    configuration = [c for c in CURVE_CONFIG if c not in ["machine", "list"]]
+    for key, group in data.groupby(configuration, observed=True):
+        if group["wrk_threads"].nunique() < 2:
+            continue
+        config = dict(zip(configuration, key))
+        reset_base_config()
+        fig = make_subplots(rows=1,
+                            cols=2,
+                            horizontal_spacing=0.08,
+                            subplot_titles=[title, "Relative to fewest threads"])
+        layout_["legend"] = {
+            "font": legend_font_,
+            "orientation": "v",
+            "x": 1.05,
+            "y": 1
+        }
+        layout_["autosize"] = False
+        layout_["width"] = 1600
+        layout_["height"] = 550
+        fig.update_layout(layout_)
+        fig.update_xaxes(title_text="Worker threads", row=1, col=1)
+        fig.update_xaxes(title_text="Fraction of cores", row=1, col=2)
+        fig.update_xaxes(tickfont=axis_font_,
+                         tickfont_size=24,
+                         gridcolor="black",
+                         linecolor="black",
+                         linewidth=4,
+                         mirror=True)
+        fig.update_yaxes(tickfont=axis_font_,
+                         tickfont_size=24,
+                         nticks=5,
+                         gridcolor="black",
+                         linecolor="black",
+                         linewidth=4,
+                         mirror=True)
+        for (machine, name), curve in group.groupby(["machine", "list"],
+                                                    observed=True):
+            curve = curve.sort_values("wrk_threads")
+            alg = str(name).split("-", 1)[-1]
+            style = plotconfig.get(alg, {})
+            color = style.get("color", COLORS[len(alg) % len(COLORS)])
+            dash = DASHES[machines.index(str(machine)) % len(DASHES)]
+            label = "<b>{} ({})</b>".format(style.get("label", alg), machine)
+            for col, (x, y) in enumerate(
+                [(curve["wrk_threads"], curve[value] * scale),
+                 (curve["core_fraction"], curve["relative_tot_thruput"])]):
+                fig.add_scatter(
+                    x=list(x),
+                    y=list(y),
+                    name=label,
+                    mode="lines+markers",
+                    marker={
+                        "color": update_opacity(color, 1),
+                        "size": 12,
+                        "line": {
+                            "width": 2,
+                            "color": "black"
+                        },
+                    },
+                    line={
+                        "width": 4,
+                        "dash": dash,
+                        "color": update_opacity(color, 1)
+                    },
+                    showlegend=(col == 0),
+                    legendgroup=label,
+                    row=1,
+                    col=col + 1,
+                )
+        outdir = os.path.join(save_dir, "federated", experiment, ds)
+        os.makedirs(outdir, exist_ok=True)
+        filename = "update{:g}_rq{:g}_maxkey{}_nrq{}_rqsize{}.html".format(
+            config["u_rate"], config["rq_rate"], config["max_key"],
+            config["rq_threads"], config["rq_size"])
+        fig.write_html(os.path.join(outdir, filename))
+
+
+def default_experiments(sources):
+    found = set()
+    for _, path in sources:
+        found.update(e for e in os.listdir(path)
+                     if os.path.isdir(os.path.join(path, e)))
+    return sorted(found)
+
+
+def default_datastructures(sources, experiments):
+    datastructures = set()
+    for _, path in sources:
+        for experiment in experiments:
+            dirpath = os.path.join(path, experiment)
+            if os.path.isdir(dirpath):
+                datastructures.update(ingest.find_datastructures(dirpath))
+    return sorted(datastructures)
+
+
+def main(argv):
+    if FLAGS.capture_topology is not None:
+        topology = ingest.machine_topology(
+            FLAGS.machine or socket.gethostname(),
+            experiment_spec.read_config_mk(FLAGS.config))
+        ingest.write_topology(FLAGS.capture_topology, topology)
+        print("Topology written to " + ingest.topology_path(
+            FLAGS.capture_topology, topology["machine"]))
+        return 0
+
+    sources = [parse_source(s) for s in FLAGS.sources]
+    experiments = FLAGS.experiments
+    if experiments is None:
+        experiments = default_experiments(sources)
+    datastructures = FLAGS.datastructures
+    if datastructures is None:
+        datastructures = default_datastructures(sources, experiments)
+    print("Experiments to merge: " + str(experiments))
+    print("Data structures: " + str(datastructures))
+
+    topology = load_topologies(sources)
+    os.makedirs(FLAGS.store, exist_ok=True)
+    topology.reset_index().to_csv(os.path.join(FLAGS.store, "machines.csv"),
+                                  index=False)
+    print("Machines with a topology:")
+    print(topology[["sockets", "cores", "logical_cpus",
+                    "cpu_freq_ghz"]].to_string())
+
+    fits = []
+    for experiment in experiments:
+        for ds in datastructures:
+            df = federate(sources, experiment, ds, FLAGS.ntrials, topology)
+            if df is None or df.empty:
+                continue
+            csvfile = store_file(FLAGS.store, experiment, ds)
+            write_csv(df, csvfile)
+            print("{}/{}: {} rows from {}".format(
+                experiment, ds, len(df),
+                ", ".join(sorted(set(df["machine"])))))
+            table = fit_machines(df, topology, FLAGS.scalability_model)
+            if not table.empty:
+                fits.append(
+                    pandas.concat({experiment: table}, names=["experiment"]))
+            if FLAGS.save_plots:
+                plot_machines(csvfile, experiment, ds, FLAGS.normalize,
+                              FLAGS.save_dir)
+    if len(fits) > 0:
+        fits = pandas.concat(fits)
+        fits.to_csv(os.path.join(FLAGS.store, "scaling.csv"))
+        print("\nScaling shape of every machine (see scaling.csv):")
+        print(fits[["contention", "coherency",
+                    "peak_core_fraction"]].to_string(float_format="{:.3g}".format))
+    return 0
+
+
+if __name__ == "__main__":
+    app.run(main)
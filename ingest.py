@@ -0,0 +1,1255 @@
+"""Parses the raw output of the microbenchmark into the .csv files consumed by plot.py.
+
+Each trial file is read exactly once and the configuration block (everything
+before "BEGIN RUNNING") and the statistics (everything after "END RUNNING") are
+extracted in a single pass.
+
+The summary of the macrobenchmark (written by `macrobench/runscript.sh`) is
+parsed by `gen_macrobench_csv`.
+"""
+
+import analysis
+import collections
+import hashlib
+import json
+import multiprocessing
+import numpy
+import os
+import re
+import sys
+
+# Columns of the .csv file produced for every data structure, one row per
+# configuration averaged over its trials: the configuration (list name, key range,
+# update and range query percentages, thread counts and range query size), the
+# latencies and throughputs, and the remaining statistics of STAT_KEYS.
+MICROBENCH_COLUMNS = [
+    "list",
+    "max_key",
+    "u_rate",
+    "rq_rate",
+    "wrk_threads",
+    "rq_threads",
+    "rq_size",
+    "u_latency",
+    "c_latency",
+    "rq_latency",
+    "tot_thruput",
+    "u_thruput",
+    "c_thruput",
+    "rq_thruput",
+    "rq_len",
+    "avg_in_announce",
+    "avg_in_bags",
+    "reachable_nodes",
+    "avg_bundle_size",
+    "tot_restarts",
+    "avg_retries",
+    "avg_traversals",
+]
+
+# Columns of the .trials.csv file, which keeps the values of every trial.
+TRIAL_COLUMNS = MICROBENCH_COLUMNS[:7] + [
+    "trial",
+    "file",
+    "u_latency",
+    "c_latency",
+    "rq_latency",
+    "tot_thruput",
+    "u_thruput",
+    "c_thruput",
+    "rq_thruput",
+    "rq_len",
+    "avg_in_announce",
+    "avg_in_bags",
+    "reachable_nodes",
+    "avg_bundle_size",
+    "tot_restarts",
+    "avg_retries",
+    "avg_traversals",
+]
+
+def _parse_int_list(value):
+    return [int(v) for v in value.strip().split(",") if v.strip()]
+
+
+# Configuration printed by main.cpp before the trial starts.
+CONFIG_KEYS = {
+    "ACTUAL_THREAD_BINDINGS": _parse_int_list,
+    "MAXKEY": int,
+    "WORK_THREADS": int,
+    "INS": float,
+    "DEL": float,
+    "RQSIZE": int,
+    "RQ": float,
+    "RQ_THREADS": int,
+    "SAMPLE_MILLIS": int,
+    "BUNDLE_TIMESTAMP_RELAXATION": int,
+    "BUNDLE_CLEANUP_SLEEP": int,
+}
+
+# Configuration of the bundle variants (see microbench/bundle.mk), written after
+# the other columns of both .csv files (empty unless the variant sets it).
+BUNDLE_KEYS = {
+    "BUNDLE_TIMESTAMP_RELAXATION": "relaxation",
+    "BUNDLE_CLEANUP_SLEEP": "cleanup_delay",
+}
+BUNDLE_COLUMNS = list(BUNDLE_KEYS.values())
+
+# Maps the name of a statistic printed after the trial (i.e., the text preceding
+# the '=' or ':' on its line) to the field it is stored in.
+STAT_KEYS = {
+    "average latency_updates total": "u_latency",
+    "average latency_searches total": "c_latency",
+    "average latency_rqs total": "rq_latency",
+    "total throughput": "tot_thruput",
+    "update throughput": "u_thruput",
+    "rq throughput": "rq_thruput",
+    "average length_rqs total": "rq_len",
+    "average visited_in_announcements total": "avg_in_announce",
+    "average visited_in_bags total": "avg_in_bags",
+    "sum bundle_restarts total": "tot_restarts",
+    "average bundle_retries total": "avg_retries",
+    "average bundle_traversals total": "avg_traversals",
+    # Printed by builds with BUNDLE_PRINT_BUNDLE_STATS.
+    "total reachable nodes": "reachable_nodes",
+    "average bundle size": "avg_bundle_size",
+}
+
+# Object sizes in bytes, printed on the 'sizes:' line of the configuration (see
+# microbench/data_structures.h). Nodes of RLU and the bundles include their
+# header.
+SIZES_PREFIX = "sizes:"
+SIZE_KEYS = {
+    "node": "node_size",
+    "descriptor": "descriptor_size",
+}
+
+# Statistics about the memory of the trial. 'data structure size' counts the
+# keys in the data structure at the end of the trial, and the resident set
+# sizes (in kB) are appended to the output by runner.py, which samples them
+# while the trial runs.
+MEMORY_KEYS = {
+    "data structure size": "ds_size",
+    "peak rss kb": "peak_rss_kb",
+    "steady rss kb": "steady_rss_kb",
+}
+
+# Counts printed by the record manager for every type of object when the data
+# structure is deleted, added up over the types: the retired objects still
+# waiting in limbo bags and those that could not be reclaimed.
+RECLAIM_KEYS = {
+    "reclaim": "garbage",
+    "unreclaimed": "unreclaimed",
+}
+
+# Memory columns written after the bundle configuration columns of both .csv
+# files (empty if unavailable, e.g., for trials not run by runner.py).
+MEMORY_COLUMNS = list(SIZE_KEYS.values()) + list(
+    MEMORY_KEYS.values()) + list(RECLAIM_KEYS.values())
+
+# Hardware of the machine that ran the trials of a results directory, recorded by
+# runner.py in 'topology.<machine>.json' (see `machine_topology`).
+TOPOLOGY_COLUMNS = [
+    "machine", "sockets", "cores", "logical_cpus", "numa_nodes",
+    "cpu_freq_ghz", "maxthreads", "model"
+]
+
+# Maps the hardware counters printed between PAPI_BEGIN_MARKER and PAPI_END_MARKER
+# (see papi_print_counters in common/papi_util_impl.h), which are already divided
+# by the number of operations, to their fields. Older builds printed
+# PAPI_TOT_INS under the name PAPI_TOT_ISR.
+PAPI_KEYS = {
+    "PAPI_L1_DCM": "l1_dcm",
+    "PAPI_L2_TCM": "l2_tcm",
+    "PAPI_L3_TCM": "l3_tcm",
+    "PAPI_RES_STL": "res_stl",
+    "PAPI_TOT_CYC": "tot_cyc",
+    "PAPI_TOT_INS": "tot_ins",
+    "PAPI_TOT_ISR": "tot_ins",
+}
+
+# Counter columns written after the percentile columns (empty if unavailable).
+PAPI_COLUMNS = list(dict.fromkeys(PAPI_KEYS.values()))
+
+# Maps the name of a statistic printed with BY_THREAD granularity (without the
+# trailing ' by_thread') to the column holding its per-thread values.
+THREAD_STAT_KEYS = {
+    "sum num_operations": "operations",
+}
+
+# Columns of the .threads.csv file, which keeps the per-thread statistics of every
+# trial (one row per trial and thread).
+THREAD_COLUMNS = MICROBENCH_COLUMNS[:7] + [
+    "trial",
+    "thread",
+    "role",
+    "cpu",
+] + list(THREAD_STAT_KEYS.values())
+
+# Per-thread statistics of a trial: values[t, i] is the value of the statistic
+# names[i] for thread t.
+ThreadStats = collections.namedtuple("ThreadStats", ["names", "values"])
+
+# Throughputs of every interval between the samples printed by main.cpp with
+# -sample (see `time_series`).
+SERIES_COLUMNS = ["tot_thruput", "u_thruput", "c_thruput", "rq_thruput"]
+
+# Time series of a trial: values[s, i] is the throughput SERIES_COLUMNS[i] over
+# the interval ending time[s] milliseconds after the start of the trial.
+TimeSeries = collections.namedtuple("TimeSeries", ["time", "names", "values"])
+
+# Steady state of the total throughput of a trial with samples (see
+# analysis.steady_state), written after the other columns of the .trials.csv
+# (empty if the trial has no samples). warmup_ms is the time discarded as
+# warm-up and steady_thruput the mean throughput after it.
+STEADY_COLUMNS = [
+    "warmup_ms", "steady_thruput", "drift", "stalls", "stationary"
+]
+
+# Columns of the .samples.csv file, which keeps the time series of every trial
+# (one row per trial and sample). 'steady' is 0 for the samples discarded as
+# warm-up.
+SAMPLE_COLUMNS = MICROBENCH_COLUMNS[:7] + ["trial", "time_ms"
+                                          ] + SERIES_COLUMNS + ["steady"]
+
+# Maps the name of a statistic printed as a histogram (see PRINT_HISTOGRAM_LOG and
+# PRINT_HISTOGRAM_LIN in common/stats.h) to the prefix of the percentile fields
+# derived from it (e.g., 'u_latency_p99').
+HISTOGRAM_KEYS = {
+    "latency_updates": "u_latency",
+    "latency_searches": "c_latency",
+    "latency_rqs": "rq_latency",
+    "length_rqs": "rq_len",
+}
+
+# Percentiles derived from every histogram.
+PERCENTILES = [50, 99, 99.9]
+
+
+def percentile_column(prefix, percentile):
+    """Returns the name of a percentile field (e.g., 'rq_latency_p999' for 99.9)."""
+    return "{}_p{}".format(prefix, str(percentile).replace(".", ""))
+
+
+# Percentile columns written after MICROBENCH_COLUMNS and TRIAL_COLUMNS.
+PERCENTILE_COLUMNS = [
+    percentile_column(prefix, p)
+    for prefix in HISTOGRAM_KEYS.values()
+    for p in PERCENTILES
+]
+
+# A histogram rebuilt from the output: bucket i counts the values between lower[i]
+# and upper[i].
+Histogram = collections.namedtuple("Histogram", ["lower", "upper", "counts"])
+
+BEGIN_MARKER = "BEGIN RUNNING"
+END_MARKER = "END RUNNING"
+COMPLETE_MARKER = "end delete ds"
+VALIDATION_FAILURE_MARKER = "Validation FAILURE"
+PAPI_BEGIN_MARKER = "begin papi_print_counters"
+PAPI_END_MARKER = "end papi_print_counters"
+SAMPLE_PREFIX = "sample "
+
+# Bump whenever the content of parsed trials changes, invalidating existing caches.
+CACHE_VERSION = 9
+
+_STEP_RE = re.compile(r"step[0-9]+[.]")
+_TRIAL_RE = re.compile(r"[.]trial.*")
+_TRIAL_NUM_RE = re.compile(r"[.]trial([0-9]+)")
+
+
+def parse_trial(filepath):
+    """ Parses the output of a single microbenchmark trial.
+
+    Arguments:
+        filepath: Path to the .out file written by runscript.sh.
+
+    Returns:
+        A dictionary containing the configuration (keyed by the names in
+        CONFIG_KEYS) and the statistics (keyed by the values of STAT_KEYS), along
+        with a boolean 'complete' indicating whether the run finished and a
+        boolean 'validation_failed' indicating whether it reported a failed
+        validation. Hardware counters are keyed by the values of PAPI_KEYS and
+        the memory statistics by MEMORY_COLUMNS (None if unavailable). The
+        histograms of HISTOGRAM_KEYS are kept under 'histograms' and the
+        per-thread values of THREAD_STAT_KEYS under 'by_thread', as plain lists
+        (see `to_histogram` and `thread_stats`), and the counters sampled with
+        -sample under 'samples', as lists of [elapsed microseconds, searches,
+        rqs, updates] (see `time_series`), so that parsed trials can be cached
+        as JSON.
+    """
+    with open(filepath, "r", errors="replace") as f:
+        return _parse_lines(f)
+
+
+def _parse_lines(lines):
+    trial = {
+        "complete": False,
+        "validation_failed": False,
+        "histograms": {},
+        "by_thread": {},
+        "samples": []
+    }
+    for k in STAT_KEYS.values():
+        trial[k] = 0
+    for k in PAPI_COLUMNS + MEMORY_COLUMNS:
+        trial[k] = None
+    running = False
+    done = False
+    papi = False
+    by_thread = None  # Per-thread values of the stat printed one thread per line.
+    for line in lines:
+        if line.startswith(VALIDATION_FAILURE_MARKER):
+            trial["validation_failed"] = True
+            continue
+        if not done:
+            if BEGIN_MARKER in line:
+                running = True
+            elif END_MARKER in line:
+                done = True
+            elif line.startswith(SIZES_PREFIX):
+                for word in line[len(SIZES_PREFIX):].split():
+                    key, _, value = word.partition("=")
+                    if key in SIZE_KEYS:
+                        trial[SIZE_KEYS[key]] = _to_number(value)
+            elif not running:
+                key, sep, value = line.partition("=")
+                if sep and key in CONFIG_KEYS:
+                    trial[key] = CONFIG_KEYS[key](value.strip())
+            continue
+
+        # Skip blank lines and the indented bucket lines of histograms.
+        if line[:1] in (" ", "\n", ""):
+            continue
+        if line.startswith(COMPLETE_MARKER):
+            trial["complete"] = True
+            continue
+        if papi:
+            key, sep, value = line.partition("=")
+            if key in PAPI_KEYS:
+                value = float(value)
+                # Counters that are not supported by the hardware are printed as -1.
+                trial[PAPI_KEYS[key]] = value if value >= 0 else None
+            elif line.startswith(PAPI_END_MARKER):
+                papi = False
+            continue
+        if line.startswith(PAPI_BEGIN_MARKER):
+            papi = True
+            continue
+        if line.startswith(SAMPLE_PREFIX):
+            sample = line.split()[1:]
+            if len(sample) == 4:
+                trial["samples"].append([int(v) for v in sample])
+            continue
+        if "histogram of " in line:
+            name, histogram = parse_histogram(line)
+            if name in HISTOGRAM_KEYS:
+                trial["histograms"][name] = histogram
+            continue
+        key, sep, value = line.rpartition("=")
+        if by_thread is not None and key.startswith("thread "):
+            by_thread.append(sum(_to_number(v) for v in value.split()))
+            continue
+        by_thread = None
+        if not sep:
+            key, sep, value = line.partition(":")
+        key = key.strip()
+        if key.endswith(" by_thread"):
+            # Printed either as 'sum x by_thread=v0 v1 ...' or as a header
+            # followed by one 'thread N=v' line per thread.
+            field = THREAD_STAT_KEYS.get(key[:-len(" by_thread")])
+            if field is not None:
+                trial["by_thread"][field] = [
+                    _to_number(v) for v in value.split()
+                ]
+                by_thread = trial["by_thread"][field] if not sep else None
+            continue
+        field = STAT_KEYS.get(key, MEMORY_KEYS.get(key))
+        if field is not None:
+            trial[field] = _to_number(value)
+        elif key in RECLAIM_KEYS:
+            field = RECLAIM_KEYS[key]
+            trial[field] = (trial[field] or 0) + _to_number(value)
+    return trial
+
+
+def parse_histogram(line):
+    """ Parses the first line of a histogram printed by common/stats.h, e.g.,
+        'log histogram of none latency_rqs full_data=1:0 2:5 4:12'.
+
+    The line lists a bound and the count of every bucket. A log histogram labels
+    bucket i with its lower bound 2^i (values are bucketed by their floor log2):
+    bucket i > 0 holds the values in [2^i, 2^(i+1)) and bucket 0 those in [0, 2).
+    A linear histogram labels every bucket with its upper bound, and all of its
+    buckets have the same width.
+
+    Returns:
+        A pair (name, histogram), where histogram is a dictionary of 'lower',
+        'upper' and 'counts' lists.
+    """
+    head, _, buckets = line.partition("=")
+    words = head.split()
+    name = words[4] if len(words) > 4 else ""
+    bounds = []
+    counts = []
+    for bucket in buckets.split():
+        bound, _, count = bucket.partition(":")
+        bounds.append(float(bound))
+        counts.append(int(count))
+    if words[0] == "log":
+        lower = [0.0] + bounds[1:]
+        upper = [2 * b for b in bounds]
+    else:
+        upper = bounds
+        width = upper[1] - upper[0] if len(upper) > 1 else 0.0
+        lower = [u - width for u in upper]
+    return name, {"lower": lower, "upper": upper, "counts": counts}
+
+
+def to_histogram(histogram):
+    """Converts a histogram kept by a parsed trial into NumPy arrays."""
+    return Histogram(numpy.asarray(histogram["lower"], dtype=float),
+                     numpy.asarray(histogram["upper"], dtype=float),
+                     numpy.asarray(histogram["counts"], dtype=numpy.int64))
+
+
+def merge_histograms(histograms):
+    """ Adds up histograms with the same buckets (log histograms may only differ
+        in how many trailing empty buckets were omitted).
+
+    Returns:
+        The merged Histogram, or None if the buckets do not line up.
+    """
+    if len(histograms) == 0:
+        return None
+    longest = max(histograms, key=lambda h: len(h.upper))
+    counts = numpy.zeros(len(longest.upper), dtype=numpy.int64)
+    for h in histograms:
+        n = len(h.upper)
+        if not (numpy.array_equal(h.upper, longest.upper[:n]) and
+                numpy.array_equal(h.lower, longest.lower[:n])):
+            return None
+        counts[:n] += h.counts
+    return Histogram(longest.lower, longest.upper, counts)
+
+
+def histogram_percentiles(histogram, percentiles=PERCENTILES):
+    """ Estimates percentiles from a histogram, interpolating linearly within the
+        bucket that contains each of them.
+
+    Returns:
+        An array with one value per percentile (NaN if the histogram is empty).
+    """
+    total = histogram.counts.sum()
+    if total == 0:
+        return numpy.full(len(percentiles), numpy.nan)
+    cumulative = numpy.cumsum(histogram.counts)
+    ranks = numpy.asarray(percentiles, dtype=float) / 100 * total
+    i = numpy.minimum(numpy.searchsorted(cumulative, ranks, side="left"),
+                      len(cumulative) - 1)
+    before = cumulative[i] - histogram.counts[i]
+    fraction = (ranks - before) / numpy.maximum(histogram.counts[i], 1)
+    return histogram.lower[i] + fraction * (histogram.upper[i] -
+                                            histogram.lower[i])
+
+
+def _percentile_fields(histograms):
+    # Percentile fields of the given histograms (keyed by stat name), 0 if missing.
+    fields = {c: 0 for c in PERCENTILE_COLUMNS}
+    for name, histogram in histograms.items():
+        if histogram is None:
+            continue
+        values = histogram_percentiles(histogram)
+        for p, v in zip(PERCENTILES, values):
+            if not numpy.isnan(v):
+                fields[percentile_column(HISTOGRAM_KEYS[name], p)] = int(
+                    round(v))
+    return fields
+
+
+def thread_stats(trial):
+    """ Returns the per-thread statistics of a parsed trial as a ThreadStats array.
+
+    Only the threads of the run (WORK_THREADS worker threads followed by
+    RQ_THREADS range query threads) are kept; GSTATS also prints its unused slots.
+    Statistics that were not printed are 0.
+    """
+    nthreads = trial.get("WORK_THREADS", 0) + trial.get("RQ_THREADS", 0)
+    if nthreads == 0:
+        nthreads = max([len(v) for v in trial["by_thread"].values()] + [0])
+    names = list(THREAD_STAT_KEYS.values())
+    values = numpy.zeros((nthreads, len(names)))
+    for i, name in enumerate(names):
+        v = trial["by_thread"].get(name, [])[:nthreads]
+        values[:len(v), i] = v
+    return ThreadStats(names, values)
+
+
+def time_series(trial):
+    """ Returns the throughput of a parsed trial over time as a TimeSeries.
+
+    The counters printed with -sample are cumulative, so the throughput of every
+    interval is the difference between consecutive samples (the first interval
+    starts at 0) divided by its length. The series is empty if the trial was run
+    without -sample.
+    """
+    samples = numpy.asarray(trial.get("samples", []),
+                            dtype=float).reshape(-1, 4)
+    counts = numpy.vstack([numpy.zeros((1, 4)), samples])
+    seconds = numpy.diff(counts[:, 0]) / 1e6
+    ops = numpy.diff(counts[:, 1:], axis=0)
+    rates = ops / numpy.maximum(seconds, 1e-6)[:, numpy.newaxis]
+    searches, rqs, updates = rates.T
+    values = numpy.column_stack([searches + rqs + updates, updates, searches,
+                                 rqs])
+    return TimeSeries(samples[:, 0] / 1000, SERIES_COLUMNS, values)
+
+
+def steady_state(trial):
+    """Applies analysis.steady_state to the total throughput of a parsed trial,
+    returning None if it has fewer than two samples."""
+    series = time_series(trial)
+    return analysis.steady_state(series.time, series.values[:, 0])
+
+
+def _steady_fields(trial):
+    fields = {c: None for c in STEADY_COLUMNS}
+    state = steady_state(trial)
+    if state is None:
+        return fields
+    time = time_series(trial).time
+    fields["warmup_ms"] = time[state.warmup - 1] if state.warmup > 0 else 0
+    fields["steady_thruput"] = state.mean
+    fields["drift"] = state.drift
+    fields["stalls"] = state.stalls
+    fields["stationary"] = state.stationary
+    return fields
+
+
+def _format_steady(column, value):
+    if value is None:
+        return ""
+    if column == "drift":
+        return "{:.4f}".format(value)
+    return str(int(value))
+
+
+def _bundle_fields(trial):
+    return {c: trial.get(k) for k, c in BUNDLE_KEYS.items()}
+
+
+def _format_bundle(value):
+    return "" if value is None else str(value)
+
+
+def _memory_fields(trials):
+    # Means of the memory statistics over the trials that have them.
+    fields = {}
+    for c in MEMORY_COLUMNS:
+        values = [t[c] for t in trials if t.get(c) is not None]
+        fields[c] = sum(values) / len(values) if values else None
+    return fields
+
+
+def _format_memory(value):
+    return "" if value is None else str(int(round(value)))
+
+
+def _parse_with_digest(filepath):
+    with open(filepath, "rb") as f:
+        contents = f.read()
+    trial = _parse_lines(
+        contents.decode(errors="replace").splitlines(keepends=True))
+    return hashlib.sha1(contents).hexdigest(), trial
+
+
+def _to_number(value):
+    # Only the leading number counts (e.g., '4979 nodes in data structure').
+    words = value.split()
+    value = words[0] if words else ""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return 0
+
+
+def machine_name(filepath, listname):
+    """Returns the name of the machine that ran a trial, i.e., the hostname in its
+    file name ('step<N>.<machine>.<listname>.<alg>...'), or '' if it has none."""
+    m = re.match(r"step[0-9]+[.](.*)[.]" + re.escape(listname) + r"[.]",
+                 os.path.basename(filepath))
+    return m.group(1) if m else ""
+
+
+def trial_root(filepath):
+    """Returns the name shared by all trials of the same configuration."""
+    dirname, filename = os.path.split(filepath)
+    filename = _TRIAL_RE.sub("", _STEP_RE.sub("", filename, count=1))
+    return os.path.join(os.path.basename(dirname), filename)
+
+
+def trial_number(filepath):
+    """Returns the trial number in the name of a trial file (0 if there is none)."""
+    m = _TRIAL_NUM_RE.search(os.path.basename(filepath))
+    return int(m.group(1)) if m else 0
+
+
+def list_name(filepath, listname):
+    """Returns the '<ds>-<alg>' name of the list that produced the given file."""
+    m = re.match(r".*[.]" + re.escape(listname) + r"[.]([^.]*)",
+                 os.path.basename(filepath))
+    return listname + "-" + (m.group(1) if m else "")
+
+
+def find_trials(datadir, listname):
+    """Finds all trial output files for the given data structure, ordered by the
+    algorithm directory they belong to and then by name."""
+    files = []
+    pattern = "." + listname + "."
+    for algo in sorted(os.listdir(datadir)):
+        algodir = os.path.join(datadir, algo)
+        if not os.path.isdir(algodir):
+            continue
+        for f in sorted(os.listdir(algodir)):
+            if pattern in f and f.endswith(".out"):
+                files.append(os.path.join(algodir, f))
+    return files
+
+
+def find_datastructures(datadir):
+    """Returns the sorted names of all data structures with trial output files in
+    the given experiment directory."""
+    names = set()
+    for algo in sorted(os.listdir(datadir)):
+        algodir = os.path.join(datadir, algo)
+        if not os.path.isdir(algodir):
+            continue
+        ds_re = re.compile(r"[.]([^.]+)[.]" + re.escape(algo) + r"[.]k[0-9]")
+        for f in os.listdir(algodir):
+            m = ds_re.search(f)
+            if m and f.endswith(".out"):
+                names.add(m.group(1))
+    return sorted(names)
+
+
+def parse_trials(files, processes=None, parser=parse_trial):
+    """ Parses the given trial files, fanning out across a pool of processes.
+
+    Arguments:
+        files: Paths of the trials to parse.
+        processes: Number of worker processes. Defaults to the number of cores on
+            the host; 1 parses serially in the calling process.
+        parser: Function applied to each file (must be picklable).
+
+    Returns:
+        The parsed trials, in the same order as files.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(files))
+    if processes <= 1:
+        return [parser(f) for f in files]
+    chunksize = max(1, len(files) // (processes * 4))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(parser, files, chunksize)
+
+
+def cache_path(datadir, listname):
+    """Returns where the parsed trials of a data structure are cached."""
+    return os.path.join(datadir, "." + listname + ".cache.json")
+
+
+def load_cache(datadir, listname):
+    """Loads the cache of parsed trials, or an empty one if it is missing or stale."""
+    empty = {"version": CACHE_VERSION, "trials": {}}
+    try:
+        with open(cache_path(datadir, listname), "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if cache.get("version") != CACHE_VERSION:
+        return empty
+    return cache
+
+
+def save_cache(datadir, listname, cache):
+    path = cache_path(datadir, listname)
+    with open(path + ".tmp", "w") as f:
+        json.dump(cache, f)
+    os.replace(path + ".tmp", path)
+
+
+def update_cache(datadir, files, cache, processes=None):
+    """ Brings a cache of parsed trials up to date with the files on disk.
+
+    Files whose size and modification time match the cache are not read. The
+    remaining files are parsed, and their content digest decides whether they
+    actually changed (e.g., a copied tree keeps its digests but not its mtimes).
+
+    Arguments:
+        datadir: Directory the cached paths are relative to.
+        files: Paths of all trials that currently exist.
+        cache: Cache returned by `load_cache`; updated in place.
+        processes: Number of worker processes used for parsing (see `parse_trials`).
+
+    Returns:
+        A pair (modified, changed), where modified indicates whether the cache
+        needs saving and changed whether any trial was added, removed or altered.
+    """
+    entries = cache["trials"]
+    current = {os.path.relpath(f, datadir): f for f in files}
+    removed = [k for k in entries if k not in current]
+    for k in removed:
+        del entries[k]
+
+    stale = []
+    stats = {}
+    for rel, f in current.items():
+        st = os.stat(f)
+        stats[rel] = (st.st_size, st.st_mtime_ns)
+        e = entries.get(rel)
+        if e is None or (e["size"], e["mtime_ns"]) != stats[rel]:
+            stale.append(rel)
+
+    changed = len(removed) > 0
+    parsed = parse_trials([current[rel] for rel in stale], processes,
+                          _parse_with_digest)
+    for rel, (digest, trial) in zip(stale, parsed):
+        e = entries.get(rel)
+        if e is None or e["sha1"] != digest:
+            changed = True
+        entries[rel] = {
+            "size": stats[rel][0],
+            "mtime_ns": stats[rel][1],
+            "sha1": digest,
+            "trial": trial,
+        }
+    return changed or len(stale) > 0, changed
+
+
+def _configuration(filepath, trial, listname):
+    return {
+        "list": list_name(filepath, listname),
+        "max_key": trial.get("MAXKEY", 0),
+        "u_rate": trial.get("INS", 0) + trial.get("DEL", 0),
+        "rq_rate": trial.get("RQ", 0),
+        "wrk_threads": trial.get("WORK_THREADS", 0),
+        "rq_threads": trial.get("RQ_THREADS", 0),
+        "rq_size": trial.get("RQSIZE", 0),
+        "machine": machine_name(filepath, listname),
+    }
+
+
+def aggregate_trials(files, trials, listname, ntrials):
+    """ Combines the trials of each configuration into a single row.
+
+    Arguments:
+        files: Paths of the parsed trials.
+        trials: Parsed trials (see `parse_trial`), in the same order as files.
+        listname: Name of the data structure.
+        ntrials: Number of trials expected per configuration. Configurations
+            with more trials (e.g., added by runner.py --adaptive) are fine.
+
+    Returns:
+        A list of rows, each a dictionary keyed by MICROBENCH_COLUMNS.
+    """
+    groups = {}
+    for filepath, trial in zip(files, trials):
+        groups.setdefault(trial_root(filepath), []).append((filepath, trial))
+
+    rows = []
+    for root, members in groups.items():
+        samples = [t for _, t in members if t["complete"]]
+        if len(samples) == 0:
+            print("Error: No samples collected: {}".format(root))
+            continue
+        elif len(samples) < ntrials:
+            print(
+                "Warning: unexpected number of samples ({}). Computing averages anyway: {}"
+                .format(len(samples), root))
+
+        states = [steady_state(t) for t in samples]
+        unsteady = [s for s in states if s is not None and not s.stationary]
+        if len(unsteady) > 0:
+            print("Warning: throughput is not stationary in {} of {} trials: {}"
+                  .format(len(unsteady), len(samples), root))
+
+        n = len(samples)
+        row = _configuration(members[0][0], members[0][1], listname)
+        for field in STAT_KEYS.values():
+            total = sum(t[field] for t in samples)
+            row[field] = total / n if isinstance(total, float) else total // n
+        row["c_thruput"] = sum(t["tot_thruput"] - t["u_thruput"] -
+                               t["rq_thruput"] for t in samples) // n
+        # Percentiles are taken over the histograms of all trials combined.
+        merged = {}
+        for name in HISTOGRAM_KEYS:
+            merged[name] = merge_histograms([
+                to_histogram(t["histograms"][name])
+                for t in samples
+                if name in t["histograms"]
+            ])
+        row.update(_percentile_fields(merged))
+        for field in PAPI_COLUMNS:
+            values = [t[field] for t in samples if t[field] is not None]
+            row[field] = sum(values) / len(values) if values else None
+        row.update(_bundle_fields(samples[0]))
+        row.update(_memory_fields(samples))
+        rows.append(row)
+    return rows
+
+
+def trial_rows(files, trials, listname):
+    """ Returns one row per completed trial, keyed by TRIAL_COLUMNS, so that the
+        variation between trials is not lost when they are averaged.
+
+    Arguments:
+        files: Paths of the parsed trials.
+        trials: Parsed trials (see `parse_trial`), in the same order as files.
+        listname: Name of the data structure.
+    """
+    rows = []
+    for filepath, trial in zip(files, trials):
+        if not trial["complete"]:
+            continue
+        row = _configuration(filepath, trial, listname)
+        row["trial"] = trial_number(filepath)
+        row["file"] = os.path.join(
+            os.path.basename(os.path.dirname(filepath)),
+            os.path.basename(filepath))
+        for field in STAT_KEYS.values():
+            row[field] = trial[field]
+        row["c_thruput"] = (trial["tot_thruput"] - trial["u_thruput"] -
+                            trial["rq_thruput"])
+        row.update(
+            _percentile_fields({
+                name: to_histogram(h)
+                for name, h in trial["histograms"].items()
+            }))
+        for field in PAPI_COLUMNS:
+            row[field] = trial[field]
+        row.update(_steady_fields(trial))
+        row.update(_bundle_fields(trial))
+        row.update(_memory_fields([trial]))
+        rows.append(row)
+    return rows
+
+
+def thread_rows(files, trials, listname):
+    """ Returns one row per thread of every completed trial, keyed by
+        THREAD_COLUMNS.
+
+    The 'role' of a thread is 'work' or 'rq', and 'cpu' is the logical processor
+    it was bound to according to ACTUAL_THREAD_BINDINGS (-1 if unknown).
+    """
+    rows = []
+    for filepath, trial in zip(files, trials):
+        if not trial["complete"] or len(trial["by_thread"]) == 0:
+            continue
+        config = _configuration(filepath, trial, listname)
+        config["trial"] = trial_number(filepath)
+        stats = thread_stats(trial)
+        bindings = trial.get("ACTUAL_THREAD_BINDINGS", [])
+        for t in range(stats.values.shape[0]):
+            row = dict(config)
+            row["thread"] = t
+            row["role"] = ("work" if t < trial.get("WORK_THREADS", t + 1) else
+                           "rq")
+            row["cpu"] = bindings[t] if t < len(bindings) else -1
+            for name, value in zip(stats.names, stats.values[t]):
+                row[name] = int(value)
+            rows.append(row)
+    return rows
+
+
+def sample_rows(files, trials, listname):
+    """ Returns one row per sample of every completed trial run with -sample,
+        keyed by SAMPLE_COLUMNS.
+    """
+    rows = []
+    for filepath, trial in zip(files, trials):
+        if not trial["complete"] or len(trial["samples"]) == 0:
+            continue
+        config = _configuration(filepath, trial, listname)
+        config["trial"] = trial_number(filepath)
+        series = time_series(trial)
+        state = steady_state(trial)
+        warmup = state.warmup if state is not None else 0
+        for s in range(len(series.time)):
+            row = dict(config)
+            row["time_ms"] = series.time[s]
+            for name, value in zip(series.names, series.values[s]):
+                row[name] = value
+            row["steady"] = int(s >= warmup)
+            rows.append(row)
+    return rows
+
+
+def samples_path(csvfile):
+    """Returns where the time series behind the given .csv file are saved."""
+    return os.path.splitext(csvfile)[0] + ".samples.csv"
+
+
+def write_samples_csv(rows, outfile):
+    """Writes the rows returned by `sample_rows`."""
+    with open(outfile, "w") as f:
+        f.write(",".join(SAMPLE_COLUMNS) + "\n")
+        for r in rows:
+            f.write(",".join(
+                "{:.3f}".format(r[c]) if c == "time_ms" else
+                str(int(r[c])) if c in SERIES_COLUMNS else str(r[c])
+                for c in SAMPLE_COLUMNS) + "\n")
+
+
+def threads_path(csvfile):
+    """Returns where the per-thread values behind the given .csv file are saved."""
+    return os.path.splitext(csvfile)[0] + ".threads.csv"
+
+
+def write_threads_csv(rows, outfile):
+    """Writes the rows returned by `thread_rows`."""
+    with open(outfile, "w") as f:
+        f.write(",".join(THREAD_COLUMNS) + "\n")
+        for r in rows:
+            f.write(",".join(str(r[c]) for c in THREAD_COLUMNS) + "\n")
+
+
+def trials_path(csvfile):
+    """Returns where the per-trial values behind the given .csv file are saved."""
+    return os.path.splitext(csvfile)[0] + ".trials.csv"
+
+
+def _format_counter(value):
+    return "" if value is None else "{:.4f}".format(value)
+
+
+def write_trials_csv(rows, outfile):
+    """Writes the rows returned by `trial_rows`."""
+    with open(outfile, "w") as f:
+        f.write(",".join(TRIAL_COLUMNS + PERCENTILE_COLUMNS + PAPI_COLUMNS +
+                         STEADY_COLUMNS + BUNDLE_COLUMNS + MEMORY_COLUMNS +
+                         ["machine"]) + "\n")
+        for r in rows:
+            f.write(",".join(
+                [str(r[c]) for c in TRIAL_COLUMNS + PERCENTILE_COLUMNS] +
+                [_format_counter(r[c]) for c in PAPI_COLUMNS] +
+                [_format_steady(c, r[c]) for c in STEADY_COLUMNS] +
+                [_format_bundle(r[c]) for c in BUNDLE_COLUMNS] +
+                [_format_memory(r[c]) for c in MEMORY_COLUMNS] +
+                [r["machine"]]) + "\n")
+
+
+def write_csv(rows, outfile):
+    """Writes the aggregated rows with the columns of MICROBENCH_COLUMNS, followed
+    by the percentile, hardware counter, bundle configuration and memory columns
+    and the machine that ran the trials."""
+    with open(outfile, "w") as f:
+        f.write(",".join(MICROBENCH_COLUMNS + PERCENTILE_COLUMNS +
+                         PAPI_COLUMNS + BUNDLE_COLUMNS + MEMORY_COLUMNS +
+                         ["machine"]) + "\n")
+        for r in rows:
+            f.write("{},{:d},{:.2f},{:.2f},{:d},{:d},{:d}".format(
+                r["list"], r["max_key"], r["u_rate"], r["rq_rate"],
+                r["wrk_threads"], r["rq_threads"], r["rq_size"]))
+            for c in MICROBENCH_COLUMNS[7:]:
+                if c == "avg_bundle_size":
+                    f.write(",{:.2f}".format(r[c]))
+                else:
+                    f.write(",{:d}".format(int(r[c])))
+            for c in PERCENTILE_COLUMNS:
+                f.write(",{:d}".format(r[c]))
+            for c in PAPI_COLUMNS:
+                f.write("," + _format_counter(r[c]))
+            for c in BUNDLE_COLUMNS:
+                f.write("," + _format_bundle(r[c]))
+            for c in MEMORY_COLUMNS:
+                f.write("," + _format_memory(r[c]))
+            f.write("," + r["machine"] + "\n")
+
+
+def gen_csv(datadir, ntrials, listname, outfile=None, processes=None):
+    """ Generates the .csv file for the given data structure (see `write_csv`).
+
+    Arguments:
+        datadir: Directory of an experiment, containing one directory per algorithm.
+        ntrials: Number of trials per configuration.
+        listname: Name of the data structure.
+        outfile: Where to write the result. Defaults to '<datadir>/<listname>.csv'.
+        processes: Number of worker processes used for parsing (see `parse_trials`).
+
+    Returns:
+        The path of the generated file.
+    """
+    return gen_csvs(datadir, ntrials, [listname], processes,
+                    {listname: outfile})[listname]
+
+
+def gen_csvs(datadir,
+             ntrials,
+             listnames,
+             processes=None,
+             outfiles=None,
+             use_cache=True):
+    """ Generates the .csv files of several data structures of one experiment,
+        parsing all of their trials with a single pool of processes.
+
+    Besides the averaged '<ds>.csv', the values of every trial are written to
+    '<ds>.trials.csv' (see `trials_path`) and the per-thread values of every
+    trial to '<ds>.threads.csv' (see `threads_path`). The time series of trials
+    run with -sample are written to '<ds>.samples.csv' (see `samples_path`).
+
+    When use_cache is set, parsed trials are kept in a cache next to the .csv
+    (see `cache_path`) so that only new or modified trial files are parsed, and
+    a .csv is only rewritten when the trials feeding it have changed.
+
+    Arguments:
+        datadir: Directory of an experiment, containing one directory per algorithm.
+        ntrials: Number of trials per configuration.
+        listnames: Names of the data structures.
+        processes: Number of worker processes used for parsing (see `parse_trials`).
+        outfiles: Optional mapping from data structure to output path.
+        use_cache: Whether to reuse and update the cache of parsed trials.
+
+    Returns:
+        A dictionary mapping each data structure to its generated file.
+    """
+    outfiles = dict(outfiles or {})
+    files = {ds: find_trials(datadir, ds) for ds in listnames}
+    for ds in listnames:
+        if outfiles.get(ds) is None:
+            outfiles[ds] = os.path.join(datadir, ds + ".csv")
+
+    if not use_cache:
+        allfiles = [f for ds in listnames for f in files[ds]]
+        parsed = dict(zip(allfiles, parse_trials(allfiles, processes)))
+        for ds in listnames:
+            _write_outputs(files[ds], [parsed[f] for f in files[ds]], ds,
+                           ntrials, outfiles[ds])
+        return outfiles
+
+    for ds in listnames:
+        if len(files[ds]) == 0 and os.path.exists(outfiles[ds]):
+            continue  # Keep .csv files whose raw data is not available.
+        cache = load_cache(datadir, ds)
+        modified, changed = update_cache(datadir, files[ds], cache, processes)
+        if modified:
+            save_cache(datadir, ds, cache)
+        if changed or not all(
+                os.path.exists(f) for f in [
+                    outfiles[ds],
+                    trials_path(outfiles[ds]),
+                    threads_path(outfiles[ds]),
+                    samples_path(outfiles[ds])
+                ]):
+            entries = cache["trials"]
+            trials = [
+                entries[os.path.relpath(f, datadir)]["trial"]
+                for f in files[ds]
+            ]
+            _write_outputs(files[ds], trials, ds, ntrials, outfiles[ds])
+    return outfiles
+
+
+def topology_path(datadir, machine):
+    """Returns where the topology of a machine is recorded in a results directory."""
+    return os.path.join(datadir, "topology." + machine + ".json")
+
+
+def machine_topology(machine, config):
+    """ Describes the hardware of this machine (see analysis.read_cpu_topology)
+        along with the settings of config.mk that the trials were run with.
+
+    Arguments:
+        machine: Name of the machine, as used in the names of its trial files.
+        config: Variables of config.mk (see experiments.read_config_mk).
+
+    Returns:
+        A dictionary keyed by TOPOLOGY_COLUMNS.
+    """
+    topology = analysis.read_cpu_topology()
+    topology["machine"] = machine
+    topology["cpu_freq_ghz"] = float(config.get("cpu_freq_ghz") or 0) or None
+    topology["maxthreads"] = int(config.get("maxthreads") or 0) or None
+    return {c: topology.get(c) for c in TOPOLOGY_COLUMNS}
+
+
+def write_topology(datadir, topology):
+    path = topology_path(datadir, topology["machine"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(topology, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def read_topologies(datadir):
+    """Returns the topologies recorded in a results directory, keyed by machine."""
+    topologies = {}
+    for f in sorted(os.listdir(datadir)):
+        if not (f.startswith("topology.") and f.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(datadir, f), "r") as fp:
+                topology = json.load(fp)
+        except (OSError, ValueError):
+            continue
+        topologies[topology.get("machine", f[len("topology."):-5])] = topology
+    return topologies
+
+
+# Columns of the macrobenchmark data.csv, in the order they are written.
+# Every row averages the trials of one configuration.
+MACROBENCH_CONFIG = ["workload", "datastructure", "rqalg", "nthreads"]
+MACROBENCH_STATS = [
+    "txn_cnt",
+    "abort_cnt",
+    "run_time",
+    "ixNumContains",
+    "ixTimeContains",
+    "ixNumInsert",
+    "ixTimeInsert",
+    "ixNumRemove",
+    "ixTimeRemove",
+    "ixNumRangeQuery",
+    "ixTimeRangeQuery",
+    "ixLenRangeQuery",
+    "ixTotalOps",
+    "ixTotalTime",
+    "ixThroughput",
+    "throughput",
+]
+# Sizes in bytes of the index nodes and descriptors, printed by newer builds of
+# DBx1000 and written after the other columns (empty if unavailable).
+MACROBENCH_SIZES = ["node_size", "descriptor_size"]
+MACROBENCH_COLUMNS = MACROBENCH_CONFIG[:3] + MACROBENCH_STATS[:-1] + [
+    "nthreads", "throughput"
+] + MACROBENCH_SIZES
+# Columns of data.trials.csv, which keeps the values of every trial.
+MACROBENCH_TRIAL_COLUMNS = MACROBENCH_CONFIG + [
+    "step", "trial"
+] + MACROBENCH_STATS + MACROBENCH_SIZES
+
+
+def parse_summary_line(line):
+    """ Parses a line of the macrobenchmark summary.txt, i.e., the 'key=value'
+        pairs written by runscript.sh followed by those of the '[summary]' line
+        printed by DBx1000.
+
+    Returns:
+        A dictionary mapping every key to its value, converted to int or float
+        when possible.
+    """
+    fields = {}
+    for pair in line.split(","):
+        key, sep, value = pair.partition("=")
+        if not sep:
+            continue
+        value = value.strip()
+        for convert in [int, float]:
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        fields[key.strip()] = value
+    return fields
+
+
+def parse_macrobench_summary(filepath):
+    """Returns the trials recorded in a macrobenchmark summary.txt, in order, as
+    returned by `parse_summary_line`. Lines of unfinished trials are skipped."""
+    trials = []
+    with open(filepath, "r", errors="replace") as f:
+        for line in f:
+            if "datastructure=" not in line:
+                continue
+            trial = parse_summary_line(line)
+            if all(c in trial for c in MACROBENCH_CONFIG + MACROBENCH_STATS):
+                trials.append(trial)
+    return trials
+
+
+def aggregate_macrobench(trials):
+    """ Averages the trials of every (workload, datastructure, rqalg, nthreads).
+
+    Returns:
+        A list of rows keyed by MACROBENCH_COLUMNS, in order of first appearance.
+    """
+    groups = collections.OrderedDict()
+    for trial in trials:
+        key = tuple(trial[c] for c in MACROBENCH_CONFIG)
+        groups.setdefault(key, []).append(trial)
+    rows = []
+    for key, samples in groups.items():
+        row = dict(zip(MACROBENCH_CONFIG, key))
+        for c in MACROBENCH_STATS:
+            row[c] = sum(t[c] for t in samples) / len(samples)
+        for c in MACROBENCH_SIZES:
+            sizes = [t[c] for t in samples if c in t]
+            row[c] = sizes[0] if sizes else None
+        rows.append(row)
+    return rows
+
+
+def _format_macrobench(row, columns):
+    return ",".join(
+        "" if row.get(c) is None else
+        str(row[c]) if isinstance(row[c], (str, int)) else "{:.4f}".format(
+            row[c]) for c in columns)
+
+
+def gen_macrobench_csv(datadir, outfile=None):
+    """ Generates the .csv file of a macrobenchmark run from its summary.txt.
+
+    The averages are written to 'data.csv' (with the columns of
+    MACROBENCH_COLUMNS) and the values of every trial to 'data.trials.csv' (see
+    `trials_path`). Both are only rewritten when summary.txt is newer than them.
+
+    Arguments:
+        datadir: Directory of the run (e.g., 'macrobench/data/rq_tpcc').
+        outfile: Where to write the result. Defaults to '<datadir>/data.csv'.
+
+    Returns:
+        The path of the generated file.
+    """
+    if outfile is None:
+        outfile = os.path.join(datadir, "data.csv")
+    summary = os.path.join(datadir, "summary.txt")
+    if not os.path.exists(summary):
+        return outfile  # Keep .csv files whose raw data is not available.
+    if all(
+            os.path.exists(f) and
+            os.path.getmtime(f) >= os.path.getmtime(summary)
+            for f in [outfile, trials_path(outfile)]):
+        return outfile
+    trials = parse_macrobench_summary(summary)
+    with open(trials_path(outfile), "w") as f:
+        f.write(",".join(MACROBENCH_TRIAL_COLUMNS) + "\n")
+        for t in trials:
+            f.write(_format_macrobench(t, MACROBENCH_TRIAL_COLUMNS) + "\n")
+    with open(outfile, "w") as f:
+        f.write(",".join(MACROBENCH_COLUMNS) + "\n")
+        for r in aggregate_macrobench(trials):
+            f.write(_format_macrobench(r, MACROBENCH_COLUMNS) + "\n")
+    return outfile
+
+
+def _write_outputs(files, trials, listname, ntrials, outfile):
+    write_trials_csv(trial_rows(files, trials, listname), trials_path(outfile))
+    write_threads_csv(thread_rows(files, trials, listname),
+                      threads_path(outfile))
+    write_samples_csv(sample_rows(files, trials, listname),
+                      samples_path(outfile))
+    write_csv(aggregate_trials(files, trials, listname, ntrials), outfile)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print(
+            "Incorrect number of arguments (expected at least 3, actual={})."
+            .format(len(sys.argv) - 1))
+        print("Usage: {} <datadir> <num_trials> <listname> [<listname>...]".
+              format(sys.argv[0]))
+        sys.exit(1)
+    gen_csvs(sys.argv[1], int(sys.argv[2]), sys.argv[3:])
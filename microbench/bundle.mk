@@ -21,3 +21,14 @@
 # ---------------------------
 # FLAGS += -DBUNDLE_CLEANUP_UPDATE
 # ------------------------.
+
+## Variants built by `make relax` and `make cleanup` (see Makefile) to study the
+## tuning of bundles. RELAXATIONS are the values of BUNDLE_TIMESTAMP_RELAXATION
+## (T), the number of updates a thread performs before it advances the global
+## timestamp; relaxation is only implemented by the unsafe bundle, whose T=1
+## and T=infinity are `rq_relax1` and `rq_ubundle`. CLEANUP_DELAYS are the values
+## of BUNDLE_CLEANUP_SLEEP (d), in microseconds, used with background cleanup.
+## Keep in sync with the 'relaxation' and 'cleanup' experiments of
+## experiments.toml.
+BUNDLE_RELAXATIONS = 1 2 5 50 100 1000
+BUNDLE_CLEANUP_DELAYS = 0 1000 5000 10000 100000
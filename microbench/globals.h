@@ -25,6 +25,7 @@ double RQ;
 int RQSIZE;
 int MAXKEY;
 int MILLIS_TO_RUN;
+int SAMPLE_MILLIS;
 bool PREFILL;
 int WORK_THREADS;
 int RQ_THREADS;
@@ -55,6 +55,7 @@ extern double RQ;
 extern int RQSIZE;
 extern int MAXKEY;
 extern int MILLIS_TO_RUN;
+extern int SAMPLE_MILLIS;
 extern bool PREFILL;
 extern int WORK_THREADS;
 extern int RQ_THREADS;
@@ -28,6 +28,8 @@ typedef long long test_type;
 #include <cstring>
 #include <ctime>
 #include <limits>
+#include <thread>
+#include <vector>
 #include "binding.h"
 #include "globals.h"
 #include "globals_extern.h"
@@ -108,6 +110,15 @@ const long long PREFILL_INTERVAL_MILLIS = 100;
 #define RQS_BETWEEN_TIME_CHECKS 10
 #endif
 
+// Operations completed by all threads since the start of the trial, sampled
+// every SAMPLE_MILLIS while it runs (see -sample).
+struct sample_t {
+  long long elapsedMicros;
+  long long searches;
+  long long rqs;
+  long long updates;
+};
+
 #ifdef USE_DEBUGCOUNTERS
 #define GET_COUNTERS ds->debugGetCounters()
 #define CLEAR_COUNTERS ds->clearCounters();
@@ -552,6 +563,33 @@ void *thread_rq(void *_id) {
   pthread_exit(NULL);
 }
 
+// Reads the operation counters of all threads while they are running. The
+// counters are read without synchronization, so a sample may miss operations
+// that are in progress; they are only used to see how throughput evolves.
+sample_t takeSample(DS_DECLARATION *ds) {
+  sample_t sample;
+  sample.elapsedMicros = chrono::duration_cast<chrono::microseconds>(
+                             chrono::high_resolution_clock::now() -
+                             glob.startTime)
+                             .count();
+#ifdef USE_DEBUGCOUNTERS
+  debugCounters *const counters = GET_COUNTERS;
+  sample.searches =
+      counters->findSuccess->getTotal() + counters->findFail->getTotal();
+  sample.rqs = counters->rqSuccess->getTotal() + counters->rqFail->getTotal();
+  sample.updates =
+      counters->insertSuccess->getTotal() + counters->insertFail->getTotal() +
+      counters->eraseSuccess->getTotal() + counters->eraseFail->getTotal();
+#else
+  sample.searches =
+      (long long)GSTATS_OBJECT_NAME.get_sum<long long>(num_searches);
+  sample.rqs = (long long)GSTATS_OBJECT_NAME.get_sum<long long>(num_rq);
+  sample.updates =
+      (long long)GSTATS_OBJECT_NAME.get_sum<long long>(num_updates);
+#endif
+  return sample;
+}
+
 void graph_trial() {
   // TODO: what do these lines do
   INIT_ALL;
@@ -610,6 +648,11 @@ void trial() {
   timespec tsNap;
   tsNap.tv_sec = 0;
   tsNap.tv_nsec = 10000000;  // 10ms
+  // samples are buffered and only printed once the trial is over
+  vector<sample_t> samples;
+  if (SAMPLE_MILLIS > 0 && MILLIS_TO_RUN > 0) {
+    samples.reserve(MILLIS_TO_RUN / SAMPLE_MILLIS + 1);
+  }
 
   // start all threads. All worker threads are scheduled first, then range query
   // threads.
@@ -656,7 +699,17 @@ void trial() {
   //      and exit(-1) if running doesn't hit 0.
 
   if (MILLIS_TO_RUN > 0) {
-    nanosleep(&tsExpected, NULL);
+    if (SAMPLE_MILLIS > 0) {
+      for (long next = SAMPLE_MILLIS; next <= MILLIS_TO_RUN;
+           next += SAMPLE_MILLIS) {
+        this_thread::sleep_until(glob.startTime + chrono::milliseconds(next));
+        samples.push_back(takeSample(ds));
+      }
+      this_thread::sleep_until(glob.startTime +
+                               chrono::milliseconds(MILLIS_TO_RUN));
+    } else {
+      nanosleep(&tsExpected, NULL);
+    }
     SOFTWARE_BARRIER;
     glob.done = true;
     __sync_synchronize();
@@ -729,6 +782,16 @@ void trial() {
   COUTATOMIC(((glob.elapsedMillis + glob.elapsedMillisNapping) / 1000.)
              << "s" << endl);
 
+  if (!samples.empty()) {
+    COUTATOMIC("samples (elapsed microseconds, searches, rqs, updates):"
+               << endl);
+    for (const sample_t &sample : samples) {
+      COUTATOMIC("sample " << sample.elapsedMicros << " " << sample.searches
+                           << " " << sample.rqs << " " << sample.updates
+                           << endl);
+    }
+  }
+
   papi_deinit_program();
   DEINIT_ALL;
 
@@ -895,6 +958,7 @@ int main(int argc, char **argv) {
   PREFILL = false;  // must be false, or else there's no way to specify no
                     // prefilling on the command line...
   MILLIS_TO_RUN = 1000;
+  SAMPLE_MILLIS = 0;
   RQ_THREADS = 0;
   WORK_THREADS = 4;
   RQSIZE = 0;
@@ -905,7 +969,7 @@ int main(int argc, char **argv) {
 
   // read command line args
   // example args: -i 25 -d 25 -k 10000 -rq 0 -rqsize 1000 -p -t 1000 -nrq 0
-  // -nwork 8
+  // -nwork 8 -sample 100
   for (int i = 1; i < argc; ++i) {
     if (strcmp(argv[i], "-i") == 0) {
       INS = atof(argv[++i]);
@@ -923,6 +987,8 @@ int main(int argc, char **argv) {
       WORK_THREADS = atoi(argv[++i]);
     } else if (strcmp(argv[i], "-t") == 0) {
       MILLIS_TO_RUN = atoi(argv[++i]);
+    } else if (strcmp(argv[i], "-sample") == 0) {
+      SAMPLE_MILLIS = atoi(argv[++i]);
     } else if (strcmp(argv[i], "-p") == 0) {
       PREFILL = true;
     } else if (strcmp(argv[i], "-bind") ==
@@ -946,6 +1012,7 @@ int main(int argc, char **argv) {
   PRINTS(POOL);
   PRINTI(PREFILL);
   PRINTI(MILLIS_TO_RUN);
+  PRINTI(SAMPLE_MILLIS);
   PRINTI(INS);
   PRINTI(DEL);
   PRINTI(RQ);
@@ -1,7 +1,13 @@
 import plotly.graph_objects as go
+import analysis
+import experiments
+import ingest
 from plot_util import *
+from plotly.colors import DEFAULT_PLOTLY_COLORS
 from plotly.subplots import make_subplots
+import functools
 import math
+import multiprocessing
 from absl import app
 from absl import flags
 
@@ -17,24 +23,49 @@ flags.DEFINE_string(
 
 # Whether or not to plot the macrobenchmark and where to find the data.
 flags.DEFINE_bool("macrobench", False, "Plot macrobenchmark results")
+flags.DEFINE_bool(
+    "macrobench_bars", True,
+    "With --macrobench, also plot the mean throughput of every range query algorithm per data structure as a bar chart"
+)
 flags.DEFINE_string(
     "macrobench_dir",
     "./macrobench/data",
     "Location of macrobenchmark data. If the folder corresponding to each experiment does not contain a .csv file, it will be automatically generated",
 )
 
+# Number of processes used to parse raw trial output when generating .csv files.
+flags.DEFINE_integer(
+    "ingest_processes",
+    None,
+    "Number of worker processes used to parse raw trial output (defaults to the number of cores)",
+)
+
 # Whether or not to save data as interactive HTML files and where to save it.
 flags.DEFINE_bool("save_plots", False, "Save plots as interactive HTML files")
 flags.DEFINE_string("save_dir", "./figures", "Directory where to save plots")
+flags.DEFINE_integer(
+    "render_processes",
+    None,
+    "Number of worker processes used to build and save figures (defaults to the number of cores)",
+)
 
 # Whether or not to include speedup information in output.
-flags.DEFINE_bool("print_speedup", False, "Print the speedup over unsafe")
+flags.DEFINE_bool("print_speedup", False,
+                  "Print the speedup over the baseline algorithm")
+flags.DEFINE_string(
+    "speedup_baseline", "unsafe",
+    "Algorithm (key of plotconfig) that speedups are computed against")
+flags.DEFINE_string(
+    "speedup_csv",
+    None,
+    "If set, writes the speedup of every algorithm over the baseline for all plotted configurations to this .csv file",
+)
 
 # Flags related to automatic config detection.
 flags.DEFINE_string(
-    "generate_script",
-    "microbench/experiment_list_generate.sh",
-    "Script used to generate experiments that is examined when detecting the configuration.",
+    "experiment_spec",
+    "microbench/experiments.toml",
+    "Spec the experiments were generated from, examined when detecting the configuration.",
 )
 flags.DEFINE_string(
     "runscript",
@@ -54,7 +85,7 @@ flags.DEFINE_bool(
 flags.DEFINE_bool(
     "detect_experiments",
     False,
-    "Automatically pull data structure and max key configurations from experiment_list_generate.sh",
+    "Automatically pull data structure and max key configurations from the experiment spec",
 )
 flags.DEFINE_bool(
     "detect_trials",
@@ -72,6 +103,63 @@ flags.DEFINE_list(
     [0, 2, 10, 50, 90, 100],
     "Rate of range query operations to use when plotting the 'workloads' experiment",
 )
+flags.DEFINE_bool(
+    "scalability_fits", False,
+    "Overlay the scalability model (see --scalability_model) fitted to every throughput curve of the 'workloads' experiment, and print its coefficients"
+)
+flags.DEFINE_enum(
+    "scalability_model", "usl", ["usl", "amdahl"],
+    "Model fitted with --scalability_fits: the Universal Scalability Law or Amdahl's law"
+)
+flags.DEFINE_list(
+    "predict_threads", [],
+    "With --scalability_fits, thread counts that were not run at which to predict throughput (added to the x-axis)"
+)
+flags.DEFINE_string(
+    "scalability_csv",
+    None,
+    "If set, writes the scalability model fitted to every throughput curve of the plotted experiments to this .csv file",
+)
+flags.DEFINE_string(
+    "memory_csv",
+    None,
+    "If set, writes the bytes per key and throughput per GiB of the bundles, vCAS, RLU and EBR-RQ for all plotted configurations to this .csv file (needs trials run by runner.py)",
+)
+flags.DEFINE_enum(
+    "memory_baseline", "bundle", analysis.MEMORY_ALGORITHMS,
+    "Algorithm that the ratios of --memory_csv are computed against")
+flags.DEFINE_list(
+    "latency_percentiles",
+    [],
+    "Latency percentiles (any of 50, 99, 99.9) to plot against the number of threads for the 'workloads' experiment",
+)
+flags.DEFINE_bool(
+    "hardware_counters", False,
+    "Plot the hardware counters of the 'workloads' experiment (collected with PAPI) next to throughput"
+)
+flags.DEFINE_bool(
+    "thread_heatmaps", False,
+    "Plot the per-thread throughput of the 'workloads' experiment as heatmaps")
+flags.DEFINE_bool(
+    "throughput_over_time", False,
+    "Plot the throughput of the 'workloads' experiment over the course of its trials (requires trials run with -sample)"
+)
+flags.DEFINE_bool(
+    "print_numa", False,
+    "Print the throughput of every NUMA node (requires per-thread statistics)")
+flags.DEFINE_multi_string(
+    "numa_node_cpus",
+    None,
+    "Logical processors of each NUMA node of the machine that ran the experiments, as one cpulist (e.g., '0-47') per node in node order. Defaults to the topology of this machine",
+)
+flags.DEFINE_integer(
+    "tuning_urate", 50,
+    "Rate of update operations to use when plotting the 'relaxation' and 'cleanup' experiments"
+)
+flags.DEFINE_integer(
+    "tuning_rqrate", 10,
+    "Rate of range query operations to use when plotting the 'relaxation' and 'cleanup' experiments"
+)
 flags.DEFINE_integer("rqsize_maxkey", 100000,
                      "Maximum key used when running the 'rq_size' experiment")
 flags.DEFINE_integer(
@@ -93,11 +181,73 @@ flags.DEFINE_integer(
     "ntrials", 3,
     "Number of trials per experiment (used for averaging results)")
 
+flags.DEFINE_bool(
+    "error_bands", True,
+    "Whether to draw the confidence interval of each line, computed from the individual trials"
+)
+flags.DEFINE_float(
+    "cv_threshold", 0.05,
+    "Configurations whose coefficient of variation across trials exceeds this value are reported as unstable"
+)
+
 flags.DEFINE_bool("legends", True, "Whether to show legends in the plots")
 flags.DEFINE_bool("yaxis_titles", True,
                   "Whether to include y-axis titles in the plots")
 
 
+def get_trial_summary(csvfile, value, x_axis, **criteria):
+    """ Summarizes the individual trials behind a .csv file generated by ingest.py.
+
+    Arguments:
+        csvfile: The .csv file holding the averaged results.
+        value: The column to summarize.
+        x_axis: The column that varies along a line (e.g., 'wrk_threads').
+        criteria: Selection of the rows to summarize (see `CSVFile.query`).
+
+    Returns:
+        The summary (see `analysis.summarize_trials`) indexed by list and x_axis,
+        normalized to millions, or None if the trials are not available.
+    """
+    trialsfile = ingest.trials_path(csvfile)
+    if not os.path.exists(trialsfile):
+        return None
+    trials = CSVFile.load(trialsfile,
+                          columns=list(criteria.keys()) +
+                          ["list", x_axis, value])
+    data = trials.query(**criteria)
+    if data.empty:
+        return None
+    summary = analysis.summarize_trials(data, value, ["list", x_axis],
+                                        cv_threshold=FLAGS.cv_threshold)
+    for c in ["mean", "std", "median", "min", "max", "ci_low", "ci_high"]:
+        summary[c] = summary[c] / 1000000
+    for (name, x), row in summary[summary["unstable"]].iterrows():
+        print("Warning: unstable configuration ({}, {}={}, {}): cv={:.3f}".
+              format(name, x_axis, x, criteria, row["cv"]))
+    return summary
+
+
+def add_error_band(fig, summary, name, x, color, **kwargs):
+    """Draws the confidence interval of the given list as a shaded band."""
+    if summary is None or name not in summary.index.get_level_values(0):
+        return
+    band = summary.xs(name, level=0).reindex(x)
+    band = band[band["ci_low"].notna()]
+    if band.empty:
+        return
+    xs = list(band.index)
+    fig.add_scatter(
+        x=xs + xs[::-1],
+        y=list(band["ci_high"]) + list(band["ci_low"])[::-1],
+        fill="toself",
+        fillcolor=update_opacity(color, 0.3),
+        line={"width": 0},
+        hoverinfo="skip",
+        showlegend=False,
+        **kwargs,
+    )
+
+
 def plot_workload(
     dirpath,
     ds,
@@ -111,8 +261,12 @@ def plot_workload(
     save=False,
     save_dir="",
 ):
-    """ Generates a plot showing throughput as a function of number of threads
+    """ Prepares a plot showing throughput as a function of number of threads
         for the given data structure. 
+
+    The data is loaded and sliced here; the figure itself is built by the
+    returned job (see `render_figures`), so that figures can be rendered in
+    parallel without every worker reloading the .csv file.
         
     Arguments:
         dirpath: A string indicating where the data to plot lives.
@@ -126,37 +280,108 @@ def plot_workload(
         legend: Whether or not to include legend.
         save: Whether or not to save plots to disk.
         save_dir: Where plots are saved to.
+
+    Returns:
+        A callable that builds and shows or saves the figure, or None if there
+        is no data to plot.
     """
-    reset_base_config()
     csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, "workloads"), ds,
-                                     ntrials)
-    csv = CSVFile(csvfile)
+                                     ntrials, FLAGS.ingest_processes)
+    csv = CSVFile.load(csvfile,
+                       columns=[
+                           "list", "max_key", "u_rate", "rq_rate",
+                           "wrk_threads", "tot_thruput"
+                       ])
 
     # Provide column labels for desired x and y axis
     x_axis = "wrk_threads"
     y_axis = "tot_thruput"
 
-    # Init data store
-    data = {}
-
-    # Ignores rows in .csv with the following label
-    ignore = ["ubundle"]
-    algos = [k for k in plotconfig.keys() if k not in ignore]
-
     # Read in data for each algorithm
-    count = 0
-    data = csv.getdata(["max_key", "u_rate", "rq_rate"],
-                       [max_key, u_rate, rq_rate])
+    data = csv.query(max_key=max_key, u_rate=u_rate, rq_rate=rq_rate)
     data[y_axis] = data[y_axis] / 1000000
 
     if data.empty:
         report_empty("ds={}, max_key={}, u_rate={}".format(
             ds, max_key, u_rate))
-        return  # If no data to plot, then don't
+        return None  # If no data to plot, then don't
+
+    bands = None
+    if FLAGS.error_bands:
+        bands = get_trial_summary(csvfile,
+                                  y_axis,
+                                  x_axis,
+                                  max_key=max_key,
+                                  u_rate=u_rate,
+                                  rq_rate=rq_rate)
+
+    # Print speedup for paper.
+    if FLAGS.print_speedup:
+        print_workload_speedup(data, ds, u_rate, threads, x_axis, y_axis)
+
+    fits = None
+    if FLAGS.scalability_fits:
+        threads = sorted(set(threads) | set(FLAGS.predict_threads))
+        fits = fit_workload(data, ds, u_rate, threads, x_axis, y_axis)
+
+    return functools.partial(render_workload, data, bands, fits, ds, max_key,
+                             u_rate, rq_rate, threads, ylabel, legend, save,
+                             save_dir)
+
 
-    if count == 0:
-        print('No data at given key range: ({}, {})'.format(ds, max_key))
-        return  # If no data to ploy, then don't
+def fit_workload(data, ds, u_rate, threads, x_axis, y_axis):
+    """ Fits the scalability model of --scalability_model to the throughput of
+        every algorithm and prints its coefficients.
+
+    Returns:
+        A dictionary mapping every fitted list to the throughput predicted at
+        each of the given thread counts.
+    """
+    fits = analysis.fit_scalability(data, y_axis, x_axis, ["list"],
+                                    FLAGS.scalability_model, threads)
+    if fits.empty:
+        return {}
+    columns = ["predicted_{}".format(t) for t in threads]
+    print("Fitted {} for {} @ {}% updates (throughput in Mops/s)\n".format(
+        FLAGS.scalability_model, ds, u_rate))
+    print(fits.drop(columns=columns).to_string(float_format="{:.4g}".format))
+    print("\n")
+    return {name: list(row[columns]) for name, row in fits.iterrows()}
+
+
+def print_workload_speedup(data, ds, u_rate, threads, x_axis, y_axis):
+    try:
+        speedup = analysis.compute_speedup(
+            analysis.split_list(data[data["list"] != ds + "-ubundle"]),
+            FLAGS.speedup_baseline,
+            y_axis,
+            "algorithm",
+            [x_axis],
+        )
+    except ValueError as e:
+        print(e)
+        return
+    print('Speedup over "' + FLAGS.speedup_baseline + '" for ' + ds + " @ " +
+          str(u_rate) + "% updates\n")
+    print(
+        analysis.format_speedup(speedup.drop(columns=FLAGS.speedup_baseline),
+                                threads))
+    print("\n")
+
+
+def render_workload(data, bands, fits, ds, max_key, u_rate, rq_rate, threads,
+                    ylabel, legend, save, save_dir):
+    """Builds the figure prepared by `plot_workload` and shows or saves it.
+
+    Fitted scalability models (see `fit_workload`) are drawn as dashed lines.
+    """
+    reset_base_config()
+    x_axis = "wrk_threads"
+    y_axis = "tot_thruput"
+
+    # Ignores rows in .csv with the following label
+    ignore = ["ubundle"]
+    algos = [k for k in plotconfig.keys() if k not in ignore]
 
     # Plot layout configuration.
     x_axis_layout_["title"] = None
@@ -198,8 +423,9 @@ def plot_workload(
         }
         line_ = {"width": 7}
         name_ = "<b>" + plotconfig[a]["label"] + "</b>"
+        add_error_band(fig, bands, ds + "-" + a, threads, plotconfig[a]["color"])
         y_ = data[data["list"] == ds + "-" + a]
-        y_ = y_[y_.wrk_threads.isin(threads)]["tot_thruput"]
+        y_ = y_.set_index(x_axis)[y_axis].reindex(threads)
         fig.add_scatter(
             x=threads,
             y=y_,
@@ -207,7 +433,22 @@ def plot_workload(
             marker=marker_,
             line=line_,
             showlegend=legend,
+            legendgroup=a,
         )
+        if fits is not None and ds + "-" + a in fits:
+            fig.add_scatter(
+                x=threads,
+                y=fits[ds + "-" + a],
+                mode="lines",
+                line={
+                    "width": 4,
+                    "dash": "dash",
+                    "color": color_
+                },
+                hoverinfo="x+y",
+                showlegend=False,
+                legendgroup=a,
+            )
 
     if not save:
         fig.show()
@@ -218,59 +459,693 @@ def plot_workload(
                     str(max_key) + ".html")
         fig.write_html(os.path.join(save_dir, filename))
 
-    # Print speedup for paper.
-    if FLAGS.print_speedup:
-        ignore = ["ubundle"]
-        overalgo = "unsafe"
-        overalgos = [
-            k for k in plotconfig.keys() if (k not in ignore and k != overalgo)
+
+def plot_latency_percentiles(
+    dirpath,
+    ds,
+    max_key,
+    u_rate,
+    rq_rate,
+    percentile,
+    threads,
+    ntrials,
+    ylabel=False,
+    legend=False,
+    save=False,
+    save_dir="",
+):
+    """ Prepares a plot of the given latency percentile of updates, searches and
+        range queries as a function of number of threads, returning the job that
+        renders it (see `plot_workload`).
+
+    Arguments:
+        percentile: One of ingest.PERCENTILES.
+        See `plot_workload` for the others.
+    """
+    csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, "workloads"), ds,
+                                     ntrials, FLAGS.ingest_processes)
+    y_axes = [
+        ingest.percentile_column(prefix, percentile)
+        for prefix in ["u_latency", "c_latency", "rq_latency"]
+    ]
+    csv = CSVFile.load(csvfile,
+                       columns=[
+                           "list", "max_key", "u_rate", "rq_rate",
+                           "wrk_threads"
+                       ] + y_axes)
+
+    data = csv.query(max_key=max_key, u_rate=u_rate, rq_rate=rq_rate)
+    if data.empty:
+        report_empty("ds={}, max_key={}, u_rate={}".format(
+            ds, max_key, u_rate))
+        return None  # If no data to plot, then don't
+
+    # Runs without a histogram have a percentile of 0, which cannot be shown on a
+    # log axis.
+    for y_axis in y_axes:
+        data[y_axis] = data[y_axis].where(data[y_axis] > 0)
+
+    return functools.partial(render_latency_percentiles, data, y_axes, ds,
+                             max_key, u_rate, rq_rate, percentile, threads,
+                             ylabel, legend, save, save_dir)
+
+
+def render_latency_percentiles(data, y_axes, ds, max_key, u_rate, rq_rate,
+                               percentile, threads, ylabel, legend, save,
+                               save_dir):
+    """Builds the figure prepared by `plot_latency_percentiles` and shows or saves
+    it."""
+    reset_base_config()
+    x_axis = "wrk_threads"
+    titles = ["Updates", "Searches", "Range queries"]
+
+    ignore = ["ubundle"]
+    algos = [k for k in plotconfig.keys() if k not in ignore]
+
+    legend_layout_ = ({
+        "font": legend_font_,
+        "orientation": "v",
+        "x": 1.05,
+        "y": 1
+    } if legend else {})
+    layout_["legend"] = legend_layout_
+    layout_["autosize"] = False
+    layout_["width"] = 1800
+    layout_["height"] = 450
+
+    fig = make_subplots(rows=1,
+                        cols=len(y_axes),
+                        horizontal_spacing=0.08,
+                        subplot_titles=titles)
+    fig.update_layout(layout_)
+    fig.update_xaxes(
+        title_text=None,
+        type="category",
+        tickfont=axis_font_,
+        tickfont_size=32,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    fig.update_yaxes(
+        type="log",
+        tickfont=axis_font_,
+        title_font=axis_font_,
+        title_standoff=30,
+        title_font_size=32,
+        tickfont_size=28,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    if ylabel:
+        fig.update_yaxes(title_text="p" + str(percentile) + " latency (ns)",
+                         col=1,
+                         row=1)
+    for y_axis, i in zip(y_axes, range(0, len(y_axes))):
+        for a in algos:
+            marker_ = {
+                "symbol": plotconfig[a]["symbol"],
+                "color": update_opacity(plotconfig[a]["color"], 1),
+                "size": 20,
+                "line": {
+                    "width": 3,
+                    "color": "black"
+                },
+            }
+            line_ = {"width": 5}
+            name_ = "<b>" + plotconfig[a]["label"] + "</b>"
+            y_ = data[data["list"] == ds + "-" + a]
+            y_ = y_.set_index(x_axis)[y_axis].reindex(threads)
+            fig.add_scatter(
+                x=threads,
+                y=y_,
+                name=name_,
+                marker=marker_,
+                line=line_,
+                showlegend=(legend if i == 0 else False),
+                legendgroup=a,
+                row=1,
+                col=i + 1,
+            )
+
+    if not save:
+        fig.show()
+    else:
+        save_dir = os.path.join(save_dir, "latency/" + ds)
+        os.makedirs(save_dir, exist_ok=True)
+        filename = ("p" + str(percentile).replace(".", "") + "_update" +
+                    str(u_rate) + "_rq" + str(rq_rate) + "_maxkey" +
+                    str(max_key) + ".html")
+        fig.write_html(os.path.join(save_dir, filename))
+
+
+# Panels of the hardware counter figure: (column, y-axis title, scale).
+COUNTER_PANELS = [
+    ("tot_thruput", "Mops/s", 1 / 1000000),
+    ("ipc", "Instructions per cycle", 1),
+    ("l1_dcm", "L1D misses / op", 1),
+    ("l2_tcm", "L2 misses / op", 1),
+    ("l3_tcm", "L3 misses / op", 1),
+    ("res_stl", "Stall cycles / op", 1),
+]
+
+
+def plot_counters(
+    dirpath,
+    ds,
+    max_key,
+    u_rate,
+    rq_rate,
+    threads,
+    ntrials,
+    legend=False,
+    save=False,
+    save_dir="",
+):
+    """ Prepares a plot lining up throughput with IPC, cache misses per operation
+        and stall cycles per operation as a function of number of threads.
+        Returns the job that renders it (see `plot_workload`).
+
+    Arguments:
+        See `plot_workload`.
+    """
+    csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, "workloads"), ds,
+                                     ntrials, FLAGS.ingest_processes)
+    csv = CSVFile.load(csvfile,
+                       columns=[
+                           "list", "max_key", "u_rate", "rq_rate",
+                           "wrk_threads", "tot_thruput"
+                       ] + ingest.PAPI_COLUMNS)
+    if "tot_cyc" not in csv.df.columns:
+        return None  # Generated before hardware counters were ingested.
+    data = csv.query(max_key=max_key, u_rate=u_rate, rq_rate=rq_rate)
+    if data.empty or data["tot_cyc"].isna().all():
+        report_empty("ds={}, max_key={}, u_rate={} (hardware counters)".format(
+            ds, max_key, u_rate))
+        return None
+    data = analysis.derive_counter_metrics(data)
+    for column, _, scale in COUNTER_PANELS:
+        data[column] = data[column] * scale
+
+    return functools.partial(render_counters, data, ds, max_key, u_rate,
+                             rq_rate, threads, legend, save, save_dir)
+
+
+def render_counters(data, ds, max_key, u_rate, rq_rate, threads, legend, save,
+                    save_dir):
+    """Builds the figure prepared by `plot_counters` and shows or saves it."""
+    reset_base_config()
+    x_axis = "wrk_threads"
+    ignore = ["ubundle"]
+    algos = [k for k in plotconfig.keys() if k not in ignore]
+
+    ncols = 3
+    nrows = (len(COUNTER_PANELS) + ncols - 1) // ncols
+    fig = make_subplots(rows=nrows,
+                        cols=ncols,
+                        horizontal_spacing=0.08,
+                        vertical_spacing=0.12,
+                        subplot_titles=[p[1] for p in COUNTER_PANELS])
+    layout_["legend"] = ({
+        "font": legend_font_,
+        "orientation": "h",
+        "x": 0,
+        "y": -0.1
+    } if legend else {})
+    layout_["autosize"] = False
+    layout_["width"] = 1500
+    layout_["height"] = 450 * nrows
+    fig.update_layout(layout_)
+    fig.update_xaxes(
+        type="category",
+        tickfont=axis_font_,
+        tickfont_size=24,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    fig.update_yaxes(
+        tickfont=axis_font_,
+        tickfont_size=24,
+        nticks=5,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    for i, (column, _, _) in enumerate(COUNTER_PANELS):
+        for a in algos:
+            y_ = data[data["list"] == ds + "-" + a]
+            y_ = y_.set_index(x_axis)[column].reindex(threads)
+            fig.add_scatter(
+                x=threads,
+                y=y_,
+                name="<b>" + plotconfig[a]["label"] + "</b>",
+                marker={
+                    "symbol": plotconfig[a]["symbol"],
+                    "color": update_opacity(plotconfig[a]["color"], 1),
+                    "size": 15,
+                    "line": {
+                        "width": 2,
+                        "color": "black"
+                    },
+                },
+                line={"width": 4},
+                showlegend=(legend if i == 0 else False),
+                legendgroup=a,
+                row=i // ncols + 1,
+                col=i % ncols + 1,
+            )
+
+    if not save:
+        fig.show()
+    else:
+        save_dir = os.path.join(save_dir, "counters/" + ds)
+        os.makedirs(save_dir, exist_ok=True)
+        filename = ("update" + str(u_rate) + "_rq" + str(rq_rate) + "_maxkey" +
+                    str(max_key) + ".html")
+        fig.write_html(os.path.join(save_dir, filename))
+
+
+# Panels of the bundle tuning figure: (column, y-axis title, scale).
+TUNING_PANELS = [
+    ("tot_thruput", "Mops/s", 1 / 1000000),
+    ("rq_latency", "Range query latency (ns)", 1),
+    ("avg_bundle_size", "Average bundle size", 1),
+]
+
+
+def plot_bundle_tuning(
+    dirpath,
+    experiment,
+    configs,
+    ds,
+    max_key,
+    u_rate,
+    rq_rate,
+    threads,
+    ntrials,
+    legend=False,
+    save=False,
+    save_dir="",
+):
+    """ Prepares a plot of throughput, range query latency and average bundle size
+        across the bundle variants of the 'relaxation' or 'cleanup' experiment,
+        with one line per number of threads. Returns the job that renders it (see
+        `plot_workload`).
+
+    Arguments:
+        experiment: The experiment, i.e., 'relaxation' or 'cleanup'.
+        configs: The variants to plot in order, with their labels (`relaxconfig`
+            or `delayconfig`).
+        See `plot_workload` for the others.
+    """
+    csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, experiment), ds,
+                                     ntrials, FLAGS.ingest_processes)
+    csv = CSVFile.load(csvfile,
+                       columns=[
+                           "list", "max_key", "u_rate", "rq_rate",
+                           "wrk_threads"
+                       ] + [p[0] for p in TUNING_PANELS])
+    data = csv.query(max_key=max_key, u_rate=u_rate, rq_rate=rq_rate)
+    if data.empty:
+        report_empty("ds={}, max_key={}, u_rate={} ({})".format(
+            ds, max_key, u_rate, experiment))
+        return None
+    # Variants built without BUNDLE_PRINT_BUNDLE_STATS (e.g., the unsafe bundle)
+    # report a bundle size of 0.
+    data["avg_bundle_size"] = data["avg_bundle_size"].where(
+        data["avg_bundle_size"] > 0)
+    for column, _, scale in TUNING_PANELS:
+        data[column] = data[column] * scale
+
+    return functools.partial(render_bundle_tuning, data, experiment, configs,
+                             ds, max_key, u_rate, rq_rate, threads, legend,
+                             save, save_dir)
+
+
+def render_bundle_tuning(data, experiment, configs, ds, max_key, u_rate,
+                         rq_rate, threads, legend, save, save_dir):
+    """Builds the figure prepared by `plot_bundle_tuning` and shows or saves it."""
+    reset_base_config()
+    variants = [v for v in configs.keys() if ds + "-" + v in set(data["list"])]
+    labels = [configs[v]["label"] for v in variants]
+    threads = [t for t in threads if t in set(data["wrk_threads"])]
+
+    fig = make_subplots(rows=1,
+                        cols=len(TUNING_PANELS),
+                        horizontal_spacing=0.08,
+                        subplot_titles=[p[1] for p in TUNING_PANELS])
+    layout_["legend"] = ({
+        "font": legend_font_,
+        "orientation": "v",
+        "x": 1.05,
+        "y": 1
+    } if legend else {})
+    layout_["autosize"] = False
+    layout_["width"] = 1800
+    layout_["height"] = 450
+    fig.update_layout(layout_)
+    fig.update_xaxes(
+        type="category",
+        tickfont=axis_font_,
+        tickfont_size=24,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    fig.update_yaxes(
+        tickfont=axis_font_,
+        tickfont_size=24,
+        nticks=5,
+        zerolinecolor="black",
+        gridcolor="black",
+        gridwidth=2,
+        linecolor="black",
+        linewidth=4,
+        mirror=True,
+    )
+    for i, (column, _, _) in enumerate(TUNING_PANELS):
+        for j, t in enumerate(threads):
+            y_ = data[data["wrk_threads"] == t].set_index("list")[column]
+            y_ = y_.reindex([ds + "-" + v for v in variants])
+            color = COLORS[j % len(COLORS)]
+            fig.add_scatter(
+                x=labels,
+                y=list(y_),
+                name="<b>" + str(t) + " threads</b>",
+                marker={
+                    "color": update_opacity(color, 1),
+                    "size": 15,
+                    "line": {
+                        "width": 2,
+                        "color": "black"
+                    },
+                },
+                line={"width": 4},
+                showlegend=(legend if i == 0 else False),
+                legendgroup=str(t),
+                row=1,
+                col=i + 1,
+            )
+
+    if not save:
+        fig.show()
+    else:
+        save_dir = os.path.join(save_dir, "tuning/" + experiment + "/" + ds)
+        os.makedirs(save_dir, exist_ok=True)
+        filename = ("update" + str(u_rate) + "_rq" + str(rq_rate) + "_maxkey" +
+                    str(max_key) + ".html")
+        fig.write_html(os.path.join(save_dir, filename))
+
+
+def get_numa_topology():
+    """Returns the mapping from logical processor to NUMA node (see --numa_node_cpus)."""
+    if FLAGS.numa_node_cpus is None:
+        return analysis.read_numa_topology()
+    topology = {}
+    for node, cpulist in enumerate(FLAGS.numa_node_cpus):
+        for cpu in analysis.parse_cpulist(cpulist):
+            topology[cpu] = node
+    return topology
+
+
+def plot_thread_heatmap(
+    dirpath,
+    ds,
+    max_key,
+    u_rate,
+    rq_rate,
+    threads,
+    ntrials,
+    legend=False,
+    save=False,
+    save_dir="",
+):
+    """ Prepares heatmaps of the throughput of every thread relative to the mean of
+        its run, one per algorithm, with a row per thread count. Returns the job
+        that renders them (see `plot_workload`).
+
+    The Jain fairness index of every thread count is shown next to its row, and
+    the NUMA node of every thread is reported on hover. With --print_numa, the
+    throughput of every NUMA node is also printed.
+
+    Arguments:
+        See `plot_workload`.
+    """
+    csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, "workloads"), ds,
+                                     ntrials, FLAGS.ingest_processes)
+    threadsfile = ingest.threads_path(csvfile)
+    if not os.path.exists(threadsfile):
+        return None
+    csv = CSVFile.load(threadsfile)
+    data = csv.query(max_key=max_key, u_rate=u_rate, rq_rate=rq_rate)
+    if data.empty:
+        report_empty("ds={}, max_key={}, u_rate={} (per-thread)".format(
+            ds, max_key, u_rate))
+        return None
+
+    topology = get_numa_topology()
+    data = data.assign(node=data["cpu"].map(lambda c: topology.get(c, -1)))
+    run = ["list", "wrk_threads", "trial"]
+    data["relative"] = data["operations"] / data.groupby(
+        run, observed=True)["operations"].transform("mean")
+
+    if FLAGS.print_numa:
+        numa = analysis.aggregate_numa(data, "operations",
+                                       ["list", "wrk_threads"], topology)
+        print("Per-NUMA node throughput for ds={}, max_key={}, u_rate={}".
+              format(ds, max_key, u_rate))
+        print(numa.to_string(float_format="{:.3f}".format))
+
+    fairness = analysis.summarize_threads(data, "operations",
+                                          ["list", "wrk_threads"])
+    fairness = fairness.groupby(["list", "wrk_threads"],
+                                observed=True)["jain"].mean()
+
+    ignore = ["ubundle"]
+    heatmaps = []
+    for a in [k for k in plotconfig.keys() if k not in ignore]:
+        name = ds + "-" + a
+        d = data[data["list"] == name]
+        if d.empty:
+            continue
+        z = d.pivot_table(index="wrk_threads",
+                          columns="thread",
+                          values="relative",
+                          aggfunc="mean",
+                          observed=True)
+        z = z.reindex([t for t in threads if t in z.index])
+        nodes = d.pivot_table(index="wrk_threads",
+                              columns="thread",
+                              values="node",
+                              aggfunc="first",
+                              observed=True).reindex(index=z.index,
+                                                     columns=z.columns)
+        labels = [
+            "{} (J={:.2f})".format(t, fairness.get((name, t), float("nan")))
+            for t in z.index
         ]
-        print('Speedup over "' + overalgo + '" for ' + ds + " @ " +
-              str(u_rate) + "% updates\n")
-        threads_printed = False
-        for o in overalgos:
-            o_name = ds + "-" + o
-            if not threads_printed:
-                print("{:<15}|".format("algorithm"), end="")
-                for i in range(len(threads) // 2):
-                    print("{:10}".format(""), end="")
-                print("# threads")
-                print("{:15}|".format("---------------"), end="")
-                for i in range(len(threads)):
-                    print("{:10}".format("----------"), end="")
-                print()
-                print("{:<15}|".format(""), end="")
-                for t in threads:
-                    print("{:>10}".format(t), end="")
-                print()
-                print("{:<15}|".format(""), end="")
-                for t in threads:
-                    print("{:>10}".format("-----"), end="")
-                threads_printed = True
-
-            if len(threads) == 0:
-                continue
-            print("\n{:15}|".format(""))
-            print("{:<15}{}".format(o, "|"), end="")
-            for t in threads:
-                numerator = data[data["list"] == o_name]
-                numerator = numerator[numerator["wrk_threads"] ==
-                                      t]["tot_thruput"]
-                denominator = data[data["list"] == ds + "-" + overalgo]
-                denominator = denominator[denominator["wrk_threads"] ==
-                                          t]["tot_thruput"]
-                try:
-                    print(
-                        "{:>10.3}".format(numerator.values[0] /
-                                          denominator.values[0]),
-                        end="",
-                    )
-                except:
-                    print(
-                        "{:>10}".format("-"),
-                        end="",
-                    )
-        print("\n\n")
+        heatmaps.append((plotconfig[a]["label"], z, nodes, labels))
+    if len(heatmaps) == 0 or not FLAGS.thread_heatmaps:
+        return None  # Only the NUMA summary was requested.
+
+    return functools.partial(render_thread_heatmap, heatmaps, ds, max_key,
+                             u_rate, rq_rate, legend, save, save_dir)
+
+
+def render_thread_heatmap(heatmaps, ds, max_key, u_rate, rq_rate, legend, save,
+                          save_dir):
+    """Builds the figure prepared by `plot_thread_heatmap` and shows or saves it."""
+    reset_base_config()
+    fig = make_subplots(rows=len(heatmaps),
+                        cols=1,
+                        shared_xaxes=True,
+                        vertical_spacing=0.03,
+                        subplot_titles=[h[0] for h in heatmaps])
+    for i, (label, z, nodes, labels) in enumerate(heatmaps):
+        fig.add_heatmap(
+            x=list(z.columns),
+            y=labels,
+            z=z.to_numpy(),
+            customdata=nodes.to_numpy(),
+            hovertemplate=
+            "thread %{x}<br>%{z:.2f}x mean<br>NUMA node %{customdata}<extra></extra>",
+            coloraxis="coloraxis",
+            row=i + 1,
+            col=1,
+        )
+        fig.update_yaxes(type="category", row=i + 1, col=1)
+    fig.update_layout(
+        plot_bgcolor="white",
+        width=1200,
+        height=180 + 140 * len(heatmaps),
+        margin=dict(l=0, r=10, t=40, b=0),
+        font=legend_font_,
+        coloraxis={
+            "colorscale": "RdBu",
+            "cmid": 1,
+            "showscale": legend,
+            "colorbar": {
+                "title": "x mean"
+            },
+        },
+    )
+    fig.update_xaxes(title_text="Thread", row=len(heatmaps), col=1)
+
+    if not save:
+        fig.show()
+    else:
+        save_dir = os.path.join(save_dir, "threads/" + ds)
+        os.makedirs(save_dir, exist_ok=True)
+        filename = ("update" + str(u_rate) + "_rq" + str(rq_rate) + "_maxkey" +
+                    str(max_key) + ".html")
+        fig.write_html(os.path.join(save_dir, filename))
+
+
+def plot_throughput_over_time(
+    dirpath,
+    ds,
+    max_key,
+    u_rate,
+    rq_rate,
+    threads,
+    ntrials,
+    legend=False,
+    save=False,
+    save_dir="",
+):
+    """ Prepares plots of the total throughput over the course of a trial, one
+        per algorithm, with a line per thread count. Returns the job that renders
+        them (see `plot_workload`).
+
+    Every line averages the trials of its thread count sample by sample. The
+    warm-up detected by ingest.py (the median over the trials of each
+    algorithm) is shaded, and thread counts with a trial whose throughput is not
+    stationary are marked in the legend.
+
+    Arguments:
+        See `plot_workload`.
+    """
+    csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, "workloads"), ds,
+                                     ntrials, FLAGS.ingest_processes)
+    samplesfile = ingest.samples_path(csvfile)
+    if not os.path.exists(samplesfile):
+        return None
+    data = CSVFile.load(samplesfile).query(max_key=max_key,
+                                           u_rate=u_rate,
+                                           rq_rate=rq_rate,
+                                           wrk_threads=threads)
+    if data.empty:
+        report_empty("ds={}, max_key={}, u_rate={} (time series)".format(
+            ds, max_key, u_rate))
+        return None
+    data = data.assign(sample=data.groupby(["list", "wrk_threads", "trial"],
+                                           observed=True).cumcount())
+    data = data.groupby(["list", "wrk_threads", "sample"],
+                        observed=True)[["time_ms", "tot_thruput"]].mean()
+    data["tot_thruput"] = data["tot_thruput"] / 1000000
+    trials = CSVFile.load(ingest.trials_path(csvfile)).query(
+        max_key=max_key, u_rate=u_rate, rq_rate=rq_rate, wrk_threads=threads)
+    trials = trials[trials["warmup_ms"].notna()]
+    warmup = trials.groupby("list", observed=True)["warmup_ms"].median()
+    unsteady = trials[trials["stationary"] == 0].groupby(
+        "list", observed=True)["wrk_threads"].unique()
+
+    ignore = ["ubundle"]
+    series = []
+    for a in [k for k in plotconfig.keys() if k not in ignore]:
+        name = ds + "-" + a
+        if name not in data.index.get_level_values(0):
+            continue
+        d = data.xs(name, level=0)
+        lines = []
+        for t in [t for t in threads if t in d.index.get_level_values(0)]:
+            label = str(t) + " threads"
+            if name in unsteady and t in unsteady[name]:
+                label += " (non-stationary)"
+            lines.append((label, d.xs(t, level=0)))
+        series.append((plotconfig[a]["label"], warmup.get(name, 0), lines))
+
+    return functools.partial(render_throughput_over_time, series, ds, max_key,
+                             u_rate, rq_rate, legend, save, save_dir)
+
+
+def render_throughput_over_time(series, ds, max_key, u_rate, rq_rate, legend,
+                                save, save_dir):
+    """Builds the figure prepared by `plot_throughput_over_time` and shows or
+    saves it."""
+    reset_base_config()
+    fig = make_subplots(rows=len(series),
+                        cols=1,
+                        shared_xaxes=True,
+                        vertical_spacing=0.04,
+                        subplot_titles=[s[0] for s in series])
+    colors = {}
+    for i, (_, warmup, lines) in enumerate(series):
+        if warmup > 0:
+            fig.add_vrect(x0=0,
+                          x1=warmup,
+                          fillcolor="lightgrey",
+                          opacity=0.5,
+                          line_width=0,
+                          row=i + 1,
+                          col=1)
+        for label, line in lines:
+            threads = label.split()[0]
+            color = colors.setdefault(
+                threads, DEFAULT_PLOTLY_COLORS[len(colors) %
+                                               len(DEFAULT_PLOTLY_COLORS)])
+            fig.add_scatter(
+                x=line["time_ms"],
+                y=line["tot_thruput"],
+                name=label,
+                mode="lines",
+                line={
+                    "width": 2,
+                    "color": color,
+                    "dash": "dot" if "(" in label else "solid"
+                },
+                legendgroup=threads,
+                showlegend=legend,
+                row=i + 1,
+                col=1,
+            )
+        fig.update_yaxes(title_text="Mops/s", row=i + 1, col=1)
+    fig.update_layout(
+        plot_bgcolor="white",
+        width=1200,
+        height=180 + 250 * len(series),
+        margin=dict(l=0, r=10, t=40, b=0),
+        font=legend_font_,
+    )
+    fig.update_xaxes(gridcolor="lightgrey")
+    fig.update_yaxes(gridcolor="lightgrey", rangemode="tozero")
+    fig.update_xaxes(title_text="Time (ms)", row=len(series), col=1)
+
+    if not save:
+        fig.show()
+    else:
+        save_dir = os.path.join(save_dir, "time/" + ds)
+        os.makedirs(save_dir, exist_ok=True)
+        filename = ("update" + str(u_rate) + "_rq" + str(rq_rate) + "_maxkey" +
+                    str(max_key) + ".html")
+        fig.write_html(os.path.join(save_dir, filename))
 
 
 def plot_rq_sizes(
@@ -284,27 +1159,54 @@ def plot_rq_sizes(
     save=False,
     save_dir="",
 ):
-    reset_base_config()
+    """ Prepares a plot of update and RQ throughput as a function of the range
+        query size, returning the job that renders it (see `plot_workload`).
+    """
     csv_path = os.path.join(dirpath, "rq_sizes")
-    csv_file = CSVFile.get_or_gen_csv(csv_path, ds, ntrials)
-    csv = CSVFile(csv_file)
+    csv_file = CSVFile.get_or_gen_csv(csv_path, ds, ntrials,
+                                      FLAGS.ingest_processes)
+    csv = CSVFile.load(csv_file,
+                       columns=[
+                           "list", "max_key", "rq_threads", "rq_size",
+                           "u_thruput", "rq_thruput"
+                       ])
 
     x_axis = "rq_size"
     y_axes = ["u_thruput", "rq_thruput"]
 
-    ignore = ["ubundle"]
-    algos = [k for k in plotconfig.keys() if k not in ignore]
-
-    count = 0
-    data = csv.getdata(["max_key", "rq_threads"],
-                       [max_key, FLAGS.rqsizes_numrqthreads])
+    data = csv.query(max_key=max_key, rq_threads=FLAGS.rqsizes_numrqthreads)
     # Normalize
     for y_axis in y_axes:
         data[y_axis] = data[y_axis] / 1000000
 
     if data.empty:
         report_empty("ds={}, max_key={}".format(ds, max_key))
-        return  # If no data to ploy, then don't
+        return None  # If no data to ploy, then don't
+
+    bands = {y_axis: None for y_axis in y_axes}
+    if FLAGS.error_bands:
+        for y_axis in y_axes:
+            bands[y_axis] = get_trial_summary(
+                csv_file,
+                y_axis,
+                x_axis,
+                max_key=max_key,
+                rq_threads=FLAGS.rqsizes_numrqthreads)
+
+    return functools.partial(render_rq_sizes, data, bands, ds, max_key,
+                             rqsizes, FLAGS.rqsizes_numrqthreads, ylabel,
+                             legend, save, save_dir)
+
+
+def render_rq_sizes(data, bands, ds, max_key, rqsizes, nrqthreads, ylabel,
+                    legend, save, save_dir):
+    """Builds the figure prepared by `plot_rq_sizes` and shows or saves it."""
+    reset_base_config()
+    x_axis = "rq_size"
+    y_axes = ["u_thruput", "rq_thruput"]
+
+    ignore = ["ubundle"]
+    algos = [k for k in plotconfig.keys() if k not in ignore]
 
     # Plot layout configuration.
     legend_layout_ = ({
@@ -370,8 +1272,15 @@ def plot_rq_sizes(
             line_ = {"width": 7}
             name_ = "<b>" + plotconfig[a]["label"] + "</b>"
             x_ = rqsizes
+            add_error_band(fig,
+                           bands[y_axis],
+                           ds + "-" + a,
+                           x_,
+                           plotconfig[a]["color"],
+                           row=1,
+                           col=i + 1)
             y_ = data[data["list"] == ds + "-" + a]
-            y_ = y_[y_.rq_size.isin(rqsizes)][y_axis]
+            y_ = y_.set_index(x_axis)[y_axis].reindex(rqsizes)
             fig.add_scatter(
                 x=x_,
                 y=y_,
@@ -389,8 +1298,8 @@ def plot_rq_sizes(
     else:
         save_dir = os.path.join(save_dir, "rq_sizes/" + ds)
         os.makedirs(save_dir, exist_ok=True)
-        filename = ("nrqthreads" + str(FLAGS.rqsizes_numrqthreads) +
-                    "_maxkey" + str(max_key) + ".html")
+        filename = ("nrqthreads" + str(nrqthreads) + "_maxkey" +
+                    str(max_key) + ".html")
         fig.write_html(os.path.join(save_dir, filename))
 
 
@@ -400,42 +1309,50 @@ def plot_macrobench(dirpath,
                     legend=False,
                     save=False,
                     save_dir=""):
-    if not os.path.exists(os.path.join(dirpath, "data.csv")):
-        subprocess.call(
-            "./macrobench/make_csv.sh " +
-            os.path.join(dirpath, "summary.txt") + " " +
-            os.path.join(dirpath, "data.csv"),
-            shell=True,
-        )
+    """ Prepares the macrobenchmark plot of the given data structure, returning
+        the job that renders it (see `plot_workload`).
+    """
+    ingest.gen_macrobench_csv(dirpath)
 
     xaxis = "nthreads"
     yaxis = "ixThroughput"
-    reset_base_config()
-    csv = CSVFile(os.path.join(dirpath, "data.csv"))
-    data = csv.getdata(["datastructure"], [ds])
+    csv = CSVFile.load(os.path.join(dirpath, "data.csv"),
+                       columns=["datastructure", "rqalg", xaxis, yaxis])
+    data = csv.query(datastructure=ds)
     data[yaxis] = data[yaxis] / 1000000  # Normalizes throughput.
 
-    ignore = ["rwlock"]
-    algos = [k for k in plotconfig.keys() if k not in ignore]
-
     if FLAGS.print_speedup:
         print("-----" + ds + "-----")
-        print(data["nthreads"].unique())
-        overalgo = plotconfig["unsafe"]["macrobench"]
-        for a in algos:
-            print(a)
-            try:
-                numerator = data[data["rqalg"] == plotconfig[a]["macrobench"]]
-                numerator = numerator[yaxis]
-                denominator = data[data["rqalg"] == overalgo]
-                denominator = denominator[yaxis]
-                newvals = numerator.values / denominator.values
-                print(newvals)
-                print("AVG: " + str(pandas.DataFrame(newvals).mean().values))
-                print("AVG (multithreaded-only): " +
-                      str(pandas.DataFrame(newvals[1:]).mean().values))
-            except:
-                print("-")
+        try:
+            speedup = analysis.compute_speedup(
+                data,
+                plotconfig[FLAGS.speedup_baseline]["macrobench"],
+                yaxis,
+                "rqalg",
+                analysis.MACROBENCH_CONFIG,
+            )
+            print(analysis.format_speedup(speedup))
+            print("AVG:")
+            print(speedup.mean().to_string(float_format="{:.3}".format))
+            print("AVG (multithreaded-only):")
+            multithreaded = speedup[
+                speedup.index.get_level_values(xaxis) > 1]
+            print(multithreaded.mean().to_string(float_format="{:.3}".format))
+        except ValueError as e:
+            print(e)
+
+    return functools.partial(render_macrobench, data, ds, ylabel, legend, save,
+                             save_dir)
+
+
+def render_macrobench(data, ds, ylabel, legend, save, save_dir):
+    """Builds the figure prepared by `plot_macrobench` and shows or saves it."""
+    reset_base_config()
+    xaxis = "nthreads"
+    yaxis = "ixThroughput"
+
+    ignore = ["rwlock"]
+    algos = [k for k in plotconfig.keys() if k not in ignore]
 
     x_axis_layout_["title"] = None
     x_axis_layout_["tickfont"]["size"] = 52
@@ -497,6 +1414,190 @@ def plot_macrobench(dirpath,
         fig.write_html(os.path.join(save_dir, filename))
 
 
+def plot_macrobench_bars(dirpath,
+                         ylabel=False,
+                         legend=False,
+                         save=False,
+                         save_dir=""):
+    """ Prepares the bar chart of the mean macrobenchmark throughput (over all
+        thread counts) of every range query algorithm, grouped by data structure.
+        Returns the job that renders it (see `plot_workload`).
+
+    The algorithms with HTM are only included where HTM is supported (see
+    plot_util.htm_supported).
+    """
+    ingest.gen_macrobench_csv(dirpath)
+    csv = CSVFile.load(os.path.join(dirpath, "data.csv"),
+                       columns=["datastructure", "rqalg", "throughput"])
+    data = pandas.pivot_table(csv.df,
+                              values="throughput",
+                              index="datastructure",
+                              columns="rqalg",
+                              aggfunc="mean",
+                              observed=True)
+    algorithms = macrobench_algorithms(htm_supported())
+    data = data[[a for a in algorithms if a in data.columns]]
+    return functools.partial(render_macrobench_bars, data, algorithms, ylabel,
+                             legend, save, save_dir)
+
+
+def render_macrobench_bars(data, algorithms, ylabel, legend, save, save_dir):
+    """Builds the figure prepared by `plot_macrobench_bars` and shows or saves it."""
+    reset_base_config()
+    x_axis_layout_["title"] = None
+    if ylabel:
+        y_axis_layout_["title"]["text"] = "txn/sec"
+    else:
+        y_axis_layout_["title"] = None
+    layout_["legend"] = {"font": legend_font_} if legend else {}
+    layout_["barmode"] = "group"
+
+    fig = go.Figure(layout=layout_)
+    for algo in data.columns:
+        fig.add_trace(
+            go.Bar(
+                x=[str(ds) for ds in data.index],
+                y=data[algo],
+                name="<b>" + algorithms[algo]["label"] + "</b>",
+                marker={
+                    "color": algorithms[algo]["color"],
+                    "line": {
+                        "color": "black",
+                        "width": 2
+                    },
+                },
+                showlegend=legend,
+            ))
+
+    if not save:
+        fig.show()
+    else:
+        fig.write_html(os.path.join(save_dir, "dbx.html"))
+
+
+def _render(figure):
+    return figure()
+
+
+def render_figures(figures, processes=None):
+    """ Builds and shows or saves the given figures.
+
+    Arguments:
+        figures: Jobs returned by the plot_* functions (None entries are skipped).
+        processes: Number of worker processes. Each job carries the data it
+            plots, so workers never touch the .csv files. Figures are rendered
+            in this process if processes is 1.
+    """
+    figures = [f for f in figures if f is not None]
+    if processes == 1 or len(figures) <= 1:
+        for f in figures:
+            f()
+        return
+    with multiprocessing.Pool(min(processes or os.cpu_count(),
+                                  len(figures))) as pool:
+        pool.map(_render, figures, chunksize=1)
+
+
+def write_speedups(dirpath, datastructures, experiments, ntrials, filepath):
+    """ Writes the speedup over FLAGS.speedup_baseline of every algorithm, for
+        every configuration of the given microbenchmark experiments, to a .csv file.
+
+    Arguments:
+        dirpath: A string indicating where the data lives.
+        datastructures: The data structures to include.
+        experiments: The experiments to include (e.g., 'run_workloads').
+        ntrials: Number of trials used to generate data.
+        filepath: The .csv file to write.
+    """
+    tables = []
+    for e in experiments:
+        experiment = e[len("run_"):] if e.startswith("run_") else e
+        for ds in datastructures:
+            csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, experiment),
+                                             ds, ntrials,
+                                             FLAGS.ingest_processes)
+            data = analysis.split_list(CSVFile.load(csvfile).df)
+            try:
+                speedup = analysis.compute_speedup(data,
+                                                   FLAGS.speedup_baseline,
+                                                   "tot_thruput", "algorithm",
+                                                   analysis.MICROBENCH_CONFIG)
+            except ValueError as err:
+                print("{} ({}, {})".format(err, experiment, ds))
+                continue
+            tables.append(
+                pandas.concat({experiment: speedup}, names=["experiment"]))
+    if len(tables) > 0:
+        analysis.write_speedup(pandas.concat(tables), filepath)
+        print("Speedups written to " + filepath)
+
+
+def write_scalability(dirpath, datastructures, experiments, ntrials, filepath):
+    """ Writes the scalability model of --scalability_model fitted to the
+        throughput of every algorithm and configuration of the given
+        microbenchmark experiments, as a function of the number of worker
+        threads, to a .csv file (see `write_speedups`).
+    """
+    tables = []
+    configuration = ["list"] + [
+        c for c in analysis.MICROBENCH_CONFIG
+        if c not in ["ds", "wrk_threads"]
+    ]
+    for e in experiments:
+        experiment = e[len("run_"):] if e.startswith("run_") else e
+        for ds in datastructures:
+            csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, experiment),
+                                             ds, ntrials,
+                                             FLAGS.ingest_processes)
+            fits = analysis.fit_scalability(
+                CSVFile.load(csvfile).df, "tot_thruput", "wrk_threads",
+                configuration, FLAGS.scalability_model,
+                FLAGS.predict_threads)
+            if not fits.empty:
+                tables.append(
+                    pandas.concat({experiment: fits}, names=["experiment"]))
+    if len(tables) > 0:
+        pandas.concat(tables).to_csv(filepath)
+        print("Scalability fits written to " + filepath)
+
+
+def write_memory(dirpath, datastructures, experiments, ntrials, filepath):
+    """ Writes the memory footprint and throughput per byte of the range query
+        techniques in analysis.MEMORY_ALGORITHMS, for every configuration of the
+        given microbenchmark experiments, to a .csv file (see `write_speedups`
+        and analysis.compare_memory).
+    """
+    tables = []
+    for e in experiments:
+        experiment = e[len("run_"):] if e.startswith("run_") else e
+        for ds in datastructures:
+            csvfile = CSVFile.get_or_gen_csv(os.path.join(dirpath, experiment),
+                                             ds, ntrials,
+                                             FLAGS.ingest_processes)
+            data = analysis.split_list(CSVFile.load(csvfile).df)
+            try:
+                table = analysis.compare_memory(
+                    data,
+                    analysis.MICROBENCH_CONFIG,
+                    baseline=FLAGS.memory_baseline)
+            except ValueError as err:
+                print("Warning: {} ({}, {})".format(err, experiment, ds))
+                continue
+            configs = table.index.droplevel("algorithm").unique()
+            missing = configs.difference(
+                table.xs(FLAGS.memory_baseline, level="algorithm").index)
+            if len(missing) > 0:
+                print("Warning: no results for baseline '{}' in {} of {} "
+                      "configurations ({}, {}), their ratios are empty".format(
+                          FLAGS.memory_baseline, len(missing), len(configs),
+                          experiment, ds))
+            tables.append(
+                pandas.concat({experiment: table}, names=["experiment"]))
+    if len(tables) > 0:
+        pandas.concat(tables).to_csv(filepath)
+        print("Memory comparison written to " + filepath)
+
+
 def get_threads_config():
     nthreads = []
     if FLAGS.detect_threads:
@@ -522,18 +1623,19 @@ def get_threads_config():
 def get_microbench_configs():
     if FLAGS.detect_experiments:
         print("Automatically detecting microbenchmark configurations")
-        return parse_experiment_list_generate(
-            FLAGS.generate_script,
-            ["run_workloads", "run_rq_sizes"],
+        threads_config = parse_config("./config.mk")
+        return experiments.plot_configs(
+            experiments.load_spec(FLAGS.experiment_spec),
+            threads_config["maxthreads"],
+            threads_config["threadincrement"],
         )
     else:
-        experiments = FLAGS.experiments
         experiment_configs = {}
         experiment_configs["datastructures"] = FLAGS.datastructures
         experiment_configs["ksizes"] = [
             int(max_key) for max_key in FLAGS.max_keys
         ]
-        return experiments, experiment_configs
+        return FLAGS.experiments, experiment_configs
 
 
 def main(argv):
@@ -543,10 +1645,17 @@ def main(argv):
         FLAGS.detect_experiments = True
         FLAGS.detect_trials = True
 
+    # Figures are prepared here and rendered together at the end.
+    figures = []
+
     # Plot microbench results.
     if FLAGS.microbench:
         assert FLAGS.microbench_dir is not None
         FLAGS.workloads_urates = [int(u) for u in FLAGS.workloads_urates]
+        FLAGS.latency_percentiles = [
+            float(p) if "." in p else int(p) for p in FLAGS.latency_percentiles
+        ]
+        FLAGS.predict_threads = [int(t) for t in FLAGS.predict_threads]
 
         nthreads = get_threads_config()
         print("Thread configuration: " + str(nthreads))
@@ -570,7 +1679,7 @@ def main(argv):
             for k in microbench_configs["ksizes"]:
                 if "run_workloads" in experiments:
                     for u in FLAGS.workloads_urates:
-                        plot_workload(
+                        figures.append(plot_workload(
                             FLAGS.microbench_dir,
                             ds,
                             k,
@@ -582,10 +1691,87 @@ def main(argv):
                             FLAGS.legends,
                             FLAGS.save_plots,
                             os.path.join(FLAGS.save_dir, "microbench"),
-                        )
+                        ))
+                        if FLAGS.hardware_counters:
+                            figures.append(
+                                plot_counters(
+                                    FLAGS.microbench_dir,
+                                    ds,
+                                    k,
+                                    u,
+                                    (FLAGS.workloads_rqrate if u != 100 else 0),
+                                    nthreads,
+                                    ntrials,
+                                    FLAGS.legends,
+                                    FLAGS.save_plots,
+                                    os.path.join(FLAGS.save_dir, "microbench"),
+                                ))
+                        if FLAGS.thread_heatmaps or FLAGS.print_numa:
+                            figures.append(
+                                plot_thread_heatmap(
+                                    FLAGS.microbench_dir,
+                                    ds,
+                                    k,
+                                    u,
+                                    (FLAGS.workloads_rqrate if u != 100 else 0),
+                                    nthreads,
+                                    ntrials,
+                                    FLAGS.legends,
+                                    FLAGS.save_plots,
+                                    os.path.join(FLAGS.save_dir, "microbench"),
+                                ))
+                        if FLAGS.throughput_over_time:
+                            figures.append(
+                                plot_throughput_over_time(
+                                    FLAGS.microbench_dir,
+                                    ds,
+                                    k,
+                                    u,
+                                    (FLAGS.workloads_rqrate if u != 100 else 0),
+                                    nthreads,
+                                    ntrials,
+                                    FLAGS.legends,
+                                    FLAGS.save_plots,
+                                    os.path.join(FLAGS.save_dir, "microbench"),
+                                ))
+                        for p in FLAGS.latency_percentiles:
+                            figures.append(
+                                plot_latency_percentiles(
+                                    FLAGS.microbench_dir,
+                                    ds,
+                                    k,
+                                    u,
+                                    (FLAGS.workloads_rqrate if u != 100 else 0),
+                                    p,
+                                    nthreads,
+                                    ntrials,
+                                    FLAGS.yaxis_titles,
+                                    FLAGS.legends,
+                                    FLAGS.save_plots,
+                                    os.path.join(FLAGS.save_dir, "microbench"),
+                                ))
+
+                for experiment, configs in [("relaxation", relaxconfig),
+                                            ("cleanup", delayconfig)]:
+                    if "run_" + experiment in experiments:
+                        figures.append(
+                            plot_bundle_tuning(
+                                FLAGS.microbench_dir,
+                                experiment,
+                                configs,
+                                ds,
+                                k,
+                                FLAGS.tuning_urate,
+                                FLAGS.tuning_rqrate,
+                                nthreads,
+                                ntrials,
+                                FLAGS.legends,
+                                FLAGS.save_plots,
+                                os.path.join(FLAGS.save_dir, "microbench"),
+                            ))
 
                 if "run_rq_sizes" in experiments:
-                    plot_rq_sizes(
+                    figures.append(plot_rq_sizes(
                         FLAGS.microbench_dir,
                         ds,
                         k,
@@ -595,30 +1781,73 @@ def main(argv):
                         FLAGS.legends,
                         FLAGS.save_plots,
                         os.path.join(FLAGS.save_dir, "microbench"),
-                    )
+                    ))
+
+        if FLAGS.speedup_csv is not None:
+            write_speedups(
+                FLAGS.microbench_dir,
+                microbench_configs["datastructures"],
+                experiments,
+                ntrials,
+                FLAGS.speedup_csv,
+            )
+
+        if FLAGS.scalability_csv is not None:
+            write_scalability(
+                FLAGS.microbench_dir,
+                microbench_configs["datastructures"],
+                experiments,
+                ntrials,
+                FLAGS.scalability_csv,
+            )
+
+        if FLAGS.memory_csv is not None:
+            write_memory(
+                FLAGS.microbench_dir,
+                microbench_configs["datastructures"],
+                experiments,
+                ntrials,
+                FLAGS.memory_csv,
+            )
 
     # Plot macrobench results (corresponds to Figure 4)
     if FLAGS.macrobench:
         save_dir = os.path.join(FLAGS.save_dir, "macrobench/skiplistlock")
         os.makedirs(save_dir, exist_ok=True)
-        plot_macrobench(
-            os.path.join(FLAGS.macrobench_dir, "rq_tpcc"),
-            "SKIPLISTLOCK",
-            ylabel=FLAGS.yaxis_titles,
-            legend=FLAGS.legends,
-            save=FLAGS.save_plots,
-            save_dir=save_dir,
-        )
+        figures.append(
+            plot_macrobench(
+                os.path.join(FLAGS.macrobench_dir, "rq_tpcc"),
+                "SKIPLISTLOCK",
+                ylabel=FLAGS.yaxis_titles,
+                legend=FLAGS.legends,
+                save=FLAGS.save_plots,
+                save_dir=save_dir,
+            ))
         save_dir = os.path.join(FLAGS.save_dir, "macrobench/citrus")
         os.makedirs(save_dir, exist_ok=True)
-        plot_macrobench(
-            os.path.join(FLAGS.macrobench_dir, "rq_tpcc"),
-            "CITRUS",
-            ylabel=FLAGS.yaxis_titles,
-            legend=FLAGS.legends,
-            save=FLAGS.save_plots,
-            save_dir=save_dir,
-        )
+        figures.append(
+            plot_macrobench(
+                os.path.join(FLAGS.macrobench_dir, "rq_tpcc"),
+                "CITRUS",
+                ylabel=FLAGS.yaxis_titles,
+                legend=FLAGS.legends,
+                save=FLAGS.save_plots,
+                save_dir=save_dir,
+            ))
+
+        if FLAGS.macrobench_bars:
+            figures.append(
+                plot_macrobench_bars(
+                    os.path.join(FLAGS.macrobench_dir, "rq_tpcc"),
+                    ylabel=FLAGS.yaxis_titles,
+                    legend=FLAGS.legends,
+                    save=FLAGS.save_plots,
+                    save_dir=os.path.join(FLAGS.save_dir, "macrobench"),
+                ))
+
+    # Figures that are only shown are opened one at a time.
+    render_figures(figures,
+                   FLAGS.render_processes if FLAGS.save_plots else 1)
 
 
 if __name__ == "__main__":
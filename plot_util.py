@@ -1,6 +1,12 @@
+import collections
+import json
+import numpy
 import pandas
 import os
+import shutil
+import socket
 import subprocess
+import ingest
 
 # General configuration.
 COLORS = [
@@ -95,7 +101,7 @@ relaxconfig = {
         "color": COLORS[4],
         "symbol": 6
     },
-    "relax1k": {
+    "relax1000": {
         "label": "T=1000",
         "color": COLORS[5],
         "symbol": 7
@@ -120,17 +126,17 @@ delayconfig = {
         "symbol": 0
     },
     "delay5000": {
-        "label": "T=5ms",
+        "label": "d=5ms",
         "color": COLORS[2],
         "symbol": 3
     },
     "delay10000": {
-        "label": "T=10ms",
+        "label": "d=10ms",
         "color": COLORS[3],
         "symbol": 4
     },
     "delay100000": {
-        "label": "T=100ms",
+        "label": "d=100ms",
         "color": COLORS[4],
         "symbol": 6
     },
@@ -141,6 +147,92 @@ delayconfig = {
     },
 }
 
+# Range query algorithms of the macrobenchmark without a plotconfig entry. The
+# HTM variant is only built where hardware transactional memory is supported.
+MACROBENCH_RWLOCK = "RQ_RWLOCK"
+MACROBENCH_HTM_RWLOCK = "RQ_HTM_RWLOCK"
+MACROBENCH_EXTRA = {
+    MACROBENCH_RWLOCK: {
+        "label": "RWLock",
+        "color": COLORS[7],
+    },
+    MACROBENCH_HTM_RWLOCK: {
+        "label": "HTM-RWLock",
+        "color": COLORS[8],
+    },
+}
+
+# Where the result of `htm_supported` is remembered, per host.
+HTM_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "common",
+                         "test_htm_support.json")
+
+
+def htm_supported(cache=HTM_CACHE):
+    """ Whether this machine supports Intel RTM, which RQ_HTM_RWLOCK relies on.
+
+    The answer is read from the cpu flags in /proc/cpuinfo, or found by building
+    and running common/test_htm_support.cpp where that file is not available. It
+    is remembered per host in cache, so this only happens once per machine.
+    """
+    host = socket.gethostname()
+    try:
+        with open(cache, "r") as f:
+            known = json.load(f)
+    except (OSError, ValueError):
+        known = {}
+    if host in known:
+        return known[host]
+
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            supported = any(
+                line.startswith("flags") and "rtm" in line.split()
+                for line in f)
+    except OSError:
+        common = os.path.dirname(cache)
+        binary = os.path.join(common, "test_htm_support")
+        try:
+            subprocess.check_call([
+                "g++",
+                os.path.join(common, "test_htm_support.cpp"), "-o", binary
+            ],
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+            subprocess.check_call([binary],
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+            supported = True
+        except (OSError, subprocess.CalledProcessError):
+            supported = False
+
+    known[host] = supported
+    try:
+        with open(cache + ".tmp", "w") as f:
+            json.dump(known, f, indent=1)
+        os.replace(cache + ".tmp", cache)
+    except OSError:
+        pass  # The cache is only an optimization.
+    return supported
+
+
+def macrobench_algorithms(htm=False):
+    """ Returns the range query algorithms of the macrobenchmark in plotting order,
+        as a dictionary mapping the rqalg column to a label and color.
+    """
+    algorithms = collections.OrderedDict()
+    algorithms[MACROBENCH_RWLOCK] = MACROBENCH_EXTRA[MACROBENCH_RWLOCK]
+    if htm:
+        algorithms[MACROBENCH_HTM_RWLOCK] = MACROBENCH_EXTRA[
+            MACROBENCH_HTM_RWLOCK]
+    for config in plotconfig.values():
+        if config["macrobench"] != "":
+            algorithms[config["macrobench"]] = {
+                "label": config["label"],
+                "color": config["color"],
+            }
+    return algorithms
+
+
 separate_unsafe = True
 
 # Global variables used for formatting.
@@ -210,41 +302,6 @@ def parse_config(filepath):
     return config
 
 
-def parse_experiment_list_generate(filepath, experiment_commands):
-    experiments = []
-    configs = {"datastructures": None, "ksizes": None}
-    done = {"datastructures": False, "ksizes": False}
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line == "" or line.startswith("#"):
-                continue
-
-            # Check whether this line indicates an experiment to run skip parsing the configuration if so
-            if len(experiment_commands) > 0:
-                detected = False
-                for e in experiment_commands:
-                    if e in line and "#<" in line:
-                        experiments.append(e)
-                        detected = True
-                        break
-                if detected:
-                    continue
-
-            for k in configs.keys():
-                if k in line and "=" in line:
-                    entry = line.split("=", maxsplit=1)
-                    filtered = "".join((filter(lambda x: x not in ['"'],
-                                               entry[1])))
-                    value = filtered.split(" ")  # list is space separated
-                    if k == "ksizes":
-                        configs[entry[0]] = [int(v) for v in value]
-                    else:
-                        configs[entry[0]] = value
-                    done[entry[0]] = True
-    return experiments, configs
-
-
 def parse_runscript(filepath, config_list):
     configs = {}
     done = {}
@@ -278,34 +335,243 @@ def report_empty(run):
     #     .format(run))
 
 
+# Maximum number of parsed files kept in memory by `CSVFile.load`.
+CSV_CACHE_SIZE = 32
+
+# Columns identifying a configuration, which `CSVFile.query` indexes (in this order).
+INDEX_COLUMNS = [
+    "machine",
+    "list",
+    "datastructure",
+    "rqalg",
+    "workload",
+    "max_key",
+    "u_rate",
+    "rq_rate",
+    "rq_threads",
+    "wrk_threads",
+    "nthreads",
+    "rq_size",
+]
+
+# Columns holding names, which are stored as categories in the columnar store.
+CATEGORICAL_COLUMNS = [
+    "list", "workload", "datastructure", "rqalg", "role", "machine"
+]
+
+
+def store_path(filepath):
+    """Returns the location of the columnar store derived from the given .csv file."""
+    return os.path.splitext(filepath)[0] + ".cols"
+
+
+def _file_signature(filepath):
+    st = os.stat(filepath)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def write_store(df, path, source=None):
+    """ Saves a data frame as a directory of .npy files (one per column).
+
+    Columns in CATEGORICAL_COLUMNS are stored as integer codes along with a
+    separate array of categories. A manifest records the column order and the
+    signature of the source .csv file, if any, so stale stores are detected.
+
+    Arguments:
+        df: The data frame to save.
+        path: Directory to save the store to (replaced if it exists).
+        source: The .csv file the data frame was read from.
+    """
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    manifest = {"columns": [], "categorical": [], "source": None}
+    for c in df.columns:
+        values = df[c]
+        if c in CATEGORICAL_COLUMNS or not pandas.api.types.is_numeric_dtype(
+                values):
+            cat = pandas.Categorical(values.astype(str))
+            numpy.save(os.path.join(tmp, c + ".npy"),
+                       cat.codes.astype(numpy.int32))
+            numpy.save(os.path.join(tmp, c + ".categories.npy"),
+                       numpy.array(cat.categories, dtype=str))
+            manifest["categorical"].append(c)
+        else:
+            numpy.save(os.path.join(tmp, c + ".npy"), values.to_numpy())
+        manifest["columns"].append(c)
+    if source is not None:
+        manifest["source"] = _file_signature(source)
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp, path)
+
+
+def read_store(path, columns=None, source=None):
+    """ Loads a data frame saved by `write_store`, memory-mapping its columns.
+
+    Arguments:
+        path: Directory of the store.
+        columns: Names of the columns to load (default: all).
+        source: If given, the store is only used if it was built from this
+            version of the .csv file.
+
+    Returns:
+        The data frame, or None if the store is missing or stale.
+    """
+    try:
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        if source is not None and manifest["source"] != _file_signature(
+                source):
+            return None
+        data = {}
+        for c in manifest["columns"]:
+            if columns is not None and c not in columns:
+                continue
+            values = numpy.load(os.path.join(path, c + ".npy"), mmap_mode="r")
+            if c in manifest["categorical"]:
+                categories = numpy.load(
+                    os.path.join(path, c + ".categories.npy"))
+                values = pandas.Categorical.from_codes(values, categories)
+            data[c] = values
+    except (OSError, ValueError, KeyError):
+        return None
+    return pandas.DataFrame(data, copy=False)
+
+
 class CSVFile:
-    """A wrapper class to read and manipulate data from output produced by make_csv.sh"""
-    def __init__(self, filepath):
+    """A wrapper class to read and manipulate data from output produced by ingest.py
+
+    The first time a .csv file is read it is converted to a columnar store (see
+    `write_store`), which is used instead of the .csv file for as long as the
+    latter does not change. Passing `columns` only loads the given columns.
+    """
+    def __init__(self, filepath, columns=None):
         self.filepath = filepath
-        self.df = pandas.read_csv(filepath,
-                                  sep=",",
-                                  engine="c",
-                                  index_col=False)
+        self.df = read_store(store_path(filepath), columns, source=filepath)
+        if self.df is None:
+            df = pandas.read_csv(filepath,
+                                 sep=",",
+                                 engine="c",
+                                 index_col=False)
+            for c in CATEGORICAL_COLUMNS:
+                if c in df.columns:
+                    df[c] = df[c].astype("category")
+            try:
+                write_store(df, store_path(filepath), source=filepath)
+            except OSError:
+                pass  # The store is only an optimization.
+            if columns is not None:
+                df = df[[c for c in df.columns if c in columns]]
+            self.df = df
+
+    # Parsed files, keyed by absolute path and ordered from least to most recently used.
+    # Each entry holds the signature of the file, the CSVFile and the loaded columns.
+    _cache = collections.OrderedDict()
+
+    @staticmethod
+    def load(filepath, columns=None):
+        """ Returns a CSVFile for the given path, reusing a previously parsed one if
+            the file has not changed since. At most CSV_CACHE_SIZE files are kept,
+            evicting the least recently used one first.
+
+        Arguments:
+            filepath: The .csv file to load.
+            columns: Names of the columns that are needed (default: all). The
+                returned CSVFile may contain additional columns.
+        """
+        key = os.path.abspath(filepath)
+        signature = _file_signature(filepath)
+        cache = CSVFile._cache
+        entry = cache.get(key)
+        if entry is not None and entry[0] == signature:
+            loaded = entry[2]
+            if loaded is None or (columns is not None
+                                  and set(columns) <= loaded):
+                cache.move_to_end(key)
+                return entry[1]
+            if columns is not None:
+                columns = sorted(loaded | set(columns))
+        csv = CSVFile(filepath, columns)
+        cache[key] = (signature, csv,
+                      None if columns is None else set(columns))
+        cache.move_to_end(key)
+        while len(cache) > CSV_CACHE_SIZE:
+            cache.popitem(last=False)
+        return csv
+
+    @staticmethod
+    def clear_cache():
+        CSVFile._cache.clear()
 
     def __str__(self):
         return str(self.df.columns)
 
     def getdata(self, filter_col, filter_with):
-        data = self.df.copy()  # Make a copy of the data frame to return.
-        for o, w in zip(filter_col, filter_with):
-            # Filter the data for the rows matching the column.
-            data = data[data[o] == w]
+        return self.query(**dict(zip(filter_col, filter_with)))
+
+    def _build_index(self):
+        # Sort the rows once by the configuration columns, so that selections only
+        # need to binary search a sorted MultiIndex.
+        cols = [c for c in INDEX_COLUMNS if c in self.df.columns]
+        self._sorted = self.df.sort_values(cols, kind="stable")
+        self._index = pandas.MultiIndex.from_frame(self._sorted[cols])
+
+    def query(self, **criteria):
+        """ Selects the rows matching all of the given criteria.
+
+        Each criterion maps a column to a single value, a list of accepted values
+        or a slice giving an inclusive range (e.g., wrk_threads=slice(24, 96)).
+        Criteria on the columns in INDEX_COLUMNS are answered using an index that
+        is built on first use; any other column is filtered directly.
+
+        Returns:
+            A data frame holding only the selected rows, ordered by the index.
+        """
+        if not hasattr(self, "_index"):
+            self._build_index()
+        key = []
+        for level, name in zip(self._index.levels, self._index.names):
+            if name not in criteria:
+                key.append(slice(None))
+                continue
+            value = criteria[name]
+            if isinstance(value, slice):
+                key.append(value)
+                continue
+            if not isinstance(value, (list, tuple, set, pandas.Series)):
+                value = [value]
+            value = [v for v in value if v in level]
+            if len(value) == 0:
+                return self._sorted.iloc[0:0]
+            key.append(value)
+        if len(key) > 0:
+            data = self._sorted.iloc[self._index.get_locs(key)]
+        else:
+            data = self._sorted
+        for name, value in criteria.items():
+            if name in self._index.names:
+                continue
+            if isinstance(value, slice):
+                data = data[data[name].between(value.start, value.stop)]
+            elif isinstance(value, (list, tuple, set, pandas.Series)):
+                data = data[data[name].isin(value)]
+            else:
+                data = data[data[name] == value]
         return data
 
-    # Tries to create a csv file for the given data structure (ds) and number of trials (n).
+    # Files already refreshed by `get_or_gen_csv` during this run.
+    _refreshed = set()
+
+    # Creates or refreshes the csv file for the given data structure (ds) and number of trials (n).
+    # Only trial files that are new or changed since the last call are parsed, using
+    # `processes` worker processes (default: one per core). Each file is refreshed once per run.
     @staticmethod
-    def get_or_gen_csv(dirpath, ds, n):
+    def get_or_gen_csv(dirpath, ds, n, processes=None):
         filepath = os.path.join(dirpath, ds + ".csv")
-        assert os.path.exists(os.path.join("./microbench", "make_csv.sh"))
-        if not os.path.exists(filepath):
-            subprocess.call(
-                "./microbench/make_csv.sh " + dirpath + " " + str(n) + " " +
-                ds,
-                shell=True,
-            )
+        key = os.path.abspath(filepath)
+        if key not in CSVFile._refreshed or not os.path.exists(filepath):
+            ingest.gen_csv(dirpath, n, ds, filepath, processes)
+            CSVFile._refreshed.add(key)
         return filepath
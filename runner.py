@@ -0,0 +1,782 @@
+"""Runs the microbenchmark experiments listed in microbench/experiment_list.txt.
+
+This replaces `microbench/runscript.sh`. Every (configuration, trial) pair that
+completes is recorded in a manifest next to the results, so that an interrupted
+sweep can be restarted and only the remaining trials are run. A trial whose
+output lacks the completion marker (see ingest.COMPLETE_MARKER) is re-queued.
+
+With --adaptive, --trials is only the minimum number of trials per
+configuration: more are added, up to --max_trials, until the confidence
+interval of the mean throughput is narrow enough (see
+analysis.trial_decision). The decision made for every configuration is
+recorded in the manifest.
+
+With --pack, trials small enough to fit on one NUMA node run concurrently, each
+bound with '-bind' to its own node (or to disjoint physical cores of a node, see
+--max_trials_per_node). Trials that need more than a node run alone with the
+pinning policy of config.mk once no other trial is running.
+
+While a trial runs, its resident set size is sampled from /proc, and the peak
+and steady values are appended to its output (see `memory_lines`), where
+ingest.py picks them up. The hardware of the machine is recorded in
+'topology.<machine>.json' (see ingest.machine_topology).
+"""
+
+import analysis
+import collections
+import experiments
+import ingest
+import json
+import numpy
+import os
+import re
+import shutil
+import socket
+import subprocess
+import time
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("microbench_dir", "./microbench",
+                    "Directory of the microbenchmark binaries and scripts")
+flags.DEFINE_string(
+    "outdir", "data",
+    "Where results are saved, relative to the microbenchmark directory")
+flags.DEFINE_string("config", "./config.mk", "Shared configuration file")
+flags.DEFINE_string("spec", "./microbench/experiments.toml",
+                    "Declarative description of the experiments")
+flags.DEFINE_bool(
+    "generate", True,
+    "Regenerate experiment_list.txt from --spec before running")
+flags.DEFINE_integer("trials", 3, "Number of trials per configuration")
+flags.DEFINE_integer("millis", 3000, "Duration of every trial in milliseconds")
+flags.DEFINE_integer(
+    "sample_millis", 0,
+    "If positive, every trial also reports its operation counts every this many milliseconds (-sample), so that warm-up and stalls can be seen"
+)
+flags.DEFINE_bool(
+    "testing", False,
+    "Run every configuration once for 1ms without prefilling, to check that all binaries work"
+)
+flags.DEFINE_bool(
+    "fresh", False,
+    "Ignore previous progress: move the existing results to <outdir>.old and start over"
+)
+flags.DEFINE_integer(
+    "max_attempts", 3,
+    "Number of times a trial is run before it is given up on if it does not complete"
+)
+flags.DEFINE_string(
+    "machine", None,
+    "Machine name used in binary and output file names (defaults to the hostname)"
+)
+flags.DEFINE_bool(
+    "adaptive", False,
+    "Add trials to configurations whose throughput varies too much (see --max_trials and --ci_width)"
+)
+flags.DEFINE_integer(
+    "max_trials", 10,
+    "With --adaptive, the number of trials after which a configuration is left as it is"
+)
+flags.DEFINE_float(
+    "ci_width", 0.05,
+    "With --adaptive, the target width of the confidence interval of the mean throughput, relative to the mean"
+)
+flags.DEFINE_float("confidence", 0.95,
+                   "Confidence level of the interval used by --adaptive")
+flags.DEFINE_bool(
+    "pack", False,
+    "Run trials that fit on one NUMA node concurrently, on disjoint sets of cores")
+flags.DEFINE_integer(
+    "max_trials_per_node", 1,
+    "With --pack, how many trials may share a NUMA node (on disjoint physical cores). Trials on the same node still share its last-level cache and memory bandwidth"
+)
+flags.DEFINE_multi_string(
+    "numa_node_cpus",
+    None,
+    "Logical processors of each NUMA node, as one cpulist (e.g., '0-47') per node. Defaults to the topology of this machine",
+)
+
+# A single trial of one line of experiment_list.txt. 'experiment' is the
+# directory created by the last 'prepare' line before it.
+Run = collections.namedtuple("Run", [
+    "experiment", "u", "rq", "rqsize", "k", "nrq", "nwork", "ds", "alg", "trial"
+])
+
+# Settings of adaptive trial counts (see analysis.trial_decision).
+Adaptive = collections.namedtuple(
+    "Adaptive", ["min_trials", "max_trials", "max_ci_width", "confidence"])
+
+MANIFEST_VERSION = 1
+
+# Columns of summary.txt (same as runscript.sh).
+SUMMARY_FORMAT = "{:>6} {:>12} {:>12} {:>12} {:>8} {:>6} {:>6} {:>8} {:>6} {:>6} {:>8} {:>12} {:>12} {:>12} {:>12}"
+SUMMARY_HEADERS = [
+    "step", "machine", "ds", "alg", "k", "u", "rq", "rqsize", "nrq", "nwork",
+    "trial", "throughput", "rqs", "updates", "finds"
+]
+
+# First step number, as in runscript.sh.
+FIRST_STEP = 10001
+
+_STEP_RE = re.compile(r"step([0-9]+)[.]")
+
+# How often running trials are checked for completion and have their memory
+# sampled, in seconds.
+POLL_INTERVAL = 0.05
+
+# A trial that has been started. 'reservation' is what it holds in the CorePool,
+# or None if it runs alone on the machine. 'memory' collects the (VmRSS, VmHWM)
+# samples of its process, in kB (see `read_memory`).
+Job = collections.namedtuple("Job", [
+    "step", "run", "process", "output", "filepath", "reservation", "memory"
+])
+
+
+def read_experiment_list(filepath, trials):
+    """ Reads experiment_list.txt into the list of runs to perform.
+
+    Every line holds 'u rq rqsize k nrq nwork ds alg'. Lines whose alg is
+    'prepare' start a new experiment, named by their ds field.
+
+    Arguments:
+        filepath: Path to experiment_list.txt.
+        trials: Number of trials per configuration.
+
+    Returns:
+        A list of (step, Run) pairs in the order runscript.sh would run them.
+        Steps are numbered like in runscript.sh so that output file names match.
+    """
+    runs = []
+    experiment = ""
+    step = FIRST_STEP
+    with open(filepath, "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 8:
+                continue
+            u, rq, rqsize, k, nrq, nwork, ds, alg = fields
+            if alg == "prepare":
+                experiment = ds
+                continue
+            for trial in range(trials):
+                runs.append((step,
+                             Run(experiment, int(u), int(rq), int(rqsize),
+                                 int(k), int(nrq), int(nwork), ds, alg,
+                                 trial)))
+                step += 1
+    return runs
+
+
+def config_key(run):
+    """Returns the key identifying the configuration of a run, shared by all of
+    its trials."""
+    return "{}/{}.{}.k{}.u{}.rq{}.rqsize{}.nrq{}.nwork{}".format(
+        run.experiment, run.ds, run.alg, run.k, run.u, run.rq, run.rqsize,
+        run.nrq, run.nwork)
+
+
+def run_key(run):
+    """Returns the key identifying a run in the manifest."""
+    return "{}.trial{}".format(config_key(run), run.trial)
+
+
+def output_path(outdir, step, machine, run):
+    """Returns the output file of a run, named as in runscript.sh."""
+    return os.path.join(
+        outdir, run.experiment, run.alg,
+        "step{}.{}.{}.{}.k{}.u{}.rq{}.rqsize{}.nrq{}.nwork{}.trial{}.out".format(
+            step, machine, run.ds, run.alg, run.k, run.u, run.rq, run.rqsize,
+            run.nrq, run.nwork, run.trial))
+
+
+def trial_command(run,
+                  machine,
+                  config,
+                  millis,
+                  testing,
+                  extra_args=(),
+                  binding=None):
+    """ Returns the command line of a run (relative to the microbenchmark directory).
+
+    The threads are bound to the logical processors in binding if given, and
+    according to the pinning policy of config.mk otherwise.
+    """
+    cmd = [
+        "./{}.{}.rq_{}.out".format(machine, run.ds, run.alg), "-i",
+        str(run.u), "-d",
+        str(run.u), "-k",
+        str(run.k), "-rq",
+        str(run.rq), "-rqsize",
+        str(run.rqsize)
+    ]
+    if not testing:
+        cmd.append("-p")
+    cmd += ["-t", str(millis), "-nrq", str(run.nrq), "-nwork", str(run.nwork)]
+    cmd += list(extra_args)
+    if binding is None:
+        cmd += config.get("pinning_policy", "").split()
+    else:
+        cmd += ["-bind", ",".join(str(cpu) for cpu in binding)]
+    return cmd
+
+
+def policy_order(config):
+    """Returns the logical processors listed by the '-bind' pinning policy of
+    config.mk, in order, or an empty list if it has none."""
+    args = config.get("pinning_policy", "").split()
+    if "-bind" not in args or args.index("-bind") + 1 >= len(args):
+        return []
+    return analysis.parse_cpulist(args[args.index("-bind") + 1])
+
+
+def read_core_siblings(cpus, root="/sys/devices/system/cpu"):
+    """Maps every logical processor to the logical processors sharing its physical
+    core (itself only if the topology is not available)."""
+    siblings = {}
+    for cpu in cpus:
+        path = os.path.join(root, "cpu{}".format(cpu), "topology",
+                            "thread_siblings_list")
+        try:
+            with open(path, "r") as f:
+                siblings[cpu] = set(analysis.parse_cpulist(f.read()))
+        except OSError:
+            siblings[cpu] = set()
+        siblings[cpu].add(cpu)
+    return siblings
+
+
+class CorePool:
+    """ Hands out disjoint sets of logical processors to trials that run at the
+    same time.
+
+    A trial gets processors of a single NUMA node, taken in the order of the
+    pinning policy so that it is placed on its node the way it would be placed on
+    the first node when running alone. Whole physical cores are reserved, so that
+    concurrent trials never share a core through hyperthreading.
+    """
+
+    def __init__(self, nodes, siblings, max_trials_per_node):
+        """
+        Arguments:
+            nodes: The logical processors of every NUMA node, in binding order.
+            siblings: Processors sharing a core (see `read_core_siblings`).
+            max_trials_per_node: How many trials may run on a node at once.
+        """
+        self.nodes = nodes
+        self.siblings = siblings
+        self.max_trials_per_node = max_trials_per_node
+        self.busy = set()
+        self.trials = [0] * len(nodes)
+
+    @classmethod
+    def for_machine(cls, config, node_cpus, max_trials_per_node):
+        """ Builds the pool of this machine, or of the nodes given as cpulists.
+
+        Only the processors this process may run on are used. Returns None if the
+        NUMA topology is unknown.
+        """
+        if node_cpus is None:
+            topology = analysis.read_numa_topology()
+        else:
+            topology = {}
+            for node, cpulist in enumerate(node_cpus):
+                for cpu in analysis.parse_cpulist(cpulist):
+                    topology[cpu] = node
+        allowed = os.sched_getaffinity(0)
+        topology = {
+            cpu: node for cpu, node in topology.items() if cpu in allowed
+        }
+        if len(topology) == 0:
+            return None
+        order = {cpu: i for i, cpu in enumerate(policy_order(config))}
+        nodes = []
+        for node in sorted(set(topology.values())):
+            cpus = [cpu for cpu in topology if topology[cpu] == node]
+            nodes.append(
+                sorted(cpus, key=lambda cpu: (order.get(cpu, len(order)), cpu)))
+        return cls(nodes, read_core_siblings(topology.keys()),
+                   max_trials_per_node)
+
+    def reserve(self, nthreads):
+        """ Reserves processors for a trial with nthreads threads on the least
+        loaded node that has enough of them free.
+
+        Returns:
+            A pair (node, cpus) where cpus lists the processors to bind the
+            threads to, or None if no node can take the trial right now.
+        """
+        for node in sorted(range(len(self.nodes)), key=self.trials.__getitem__):
+            cpus = self.nodes[node]
+            if self.trials[node] >= self.max_trials_per_node:
+                continue
+            free = [cpu for cpu in cpus if cpu not in self.busy]
+            if len(free) < nthreads:
+                continue
+            binding = free[:nthreads]
+            for cpu in binding:
+                self.busy |= self.siblings[cpu]
+            self.trials[node] += 1
+            return node, binding
+        return None
+
+    def release(self, reservation):
+        node, binding = reservation
+        for cpu in binding:
+            self.busy -= self.siblings[cpu]
+        self.trials[node] -= 1
+
+
+def manifest_path(outdir):
+    return os.path.join(outdir, "manifest.json")
+
+
+def load_manifest(outdir):
+    """Loads the record of finished runs, or an empty one if there is none."""
+    empty = {"version": MANIFEST_VERSION, "runs": {}, "decisions": {}}
+    try:
+        with open(manifest_path(outdir), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty
+    manifest.setdefault("decisions", {})
+    return manifest
+
+
+def save_manifest(outdir, manifest):
+    path = manifest_path(outdir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def is_done(entry, outdir):
+    """Whether a manifest entry is a completed run whose output still exists."""
+    return (entry is not None and entry.get("complete", False) and
+            os.path.exists(os.path.join(outdir, entry["file"])))
+
+
+def start_trial(step,
+                run,
+                machine,
+                config,
+                workdir,
+                outdir,
+                millis,
+                testing,
+                extra_args=(),
+                reservation=None):
+    """ Starts a single trial, writing its command line followed by its output to
+        the file runscript.sh would write it to.
+
+    Arguments:
+        step: Step number of the run (see `read_experiment_list`).
+        run: The run to perform.
+        machine: Machine name, used to find the binary.
+        config: Variables of config.mk (see experiments.read_config_mk).
+        workdir: The microbenchmark directory, where the binaries are.
+        outdir: Results directory, relative to workdir.
+        millis: Duration of the trial.
+        testing: Whether to skip prefilling.
+        extra_args: Additional arguments for the benchmark.
+        reservation: Processors reserved for the trial (see `CorePool.reserve`),
+            or None to use the pinning policy of config.mk.
+
+    Returns:
+        The started Job. Call `finish_trial` once its process has exited.
+    """
+    binding = None if reservation is None else reservation[1]
+    cmd = trial_command(run, machine, config, millis, testing, extra_args,
+                        binding)
+    env = dict(os.environ)
+    prefix = ""
+    if config.get("allocator", "") != "":
+        env["LD_PRELOAD"] = config["allocator"]
+        env["TREE_MALLOC"] = config["allocator"]
+        prefix = "env LD_PRELOAD={0} TREE_MALLOC={0} ".format(
+            config["allocator"])
+    filepath = output_path(outdir, step, machine, run)
+    fullpath = os.path.join(workdir, filepath)
+    os.makedirs(os.path.dirname(fullpath), exist_ok=True)
+    output = open(fullpath, "w")
+    output.write(prefix + " ".join(cmd) + "\n")
+    output.flush()
+    process = subprocess.Popen(cmd,
+                               cwd=workdir,
+                               env=env,
+                               stdout=output,
+                               stderr=subprocess.STDOUT)
+    filepath = os.path.relpath(fullpath, os.path.join(workdir, outdir))
+    return Job(step, run, process, output, filepath, reservation, [])
+
+
+def read_memory(pid, root="/proc"):
+    """ Reads the current (VmRSS) and peak (VmHWM) resident set size of a process.
+
+    Returns:
+        A pair of sizes in kB, or None if they are unavailable (e.g., the process
+        has exited or the platform has no /proc).
+    """
+    sizes = {}
+    try:
+        with open(os.path.join(root, str(pid), "status"), "r") as f:
+            for line in f:
+                key, sep, value = line.partition(":")
+                if sep and key in ("VmRSS", "VmHWM"):
+                    sizes[key] = int(value.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    if len(sizes) < 2:
+        return None
+    return sizes["VmRSS"], sizes["VmHWM"]
+
+
+def wait_any(jobs):
+    """Waits until one of the running jobs exits and returns it, sampling the
+    memory of every job still running each POLL_INTERVAL."""
+    while True:
+        for job in jobs:
+            if job.process.poll() is not None:
+                return job
+            sample = read_memory(job.process.pid)
+            if sample is not None:
+                job.memory.append(sample)
+        time.sleep(POLL_INTERVAL)
+
+
+def memory_lines(samples):
+    """ Formats the memory statistics appended to the output of a trial.
+
+    The peak is the largest VmHWM sampled. The steady value is the median VmRSS
+    of the second half of the samples, which leaves out the prefilling and the
+    start of the trial.
+
+    Returns:
+        The lines to append (none if there are no samples).
+    """
+    if len(samples) == 0:
+        return []
+    peak = max(hwm for _, hwm in samples)
+    steady = numpy.median([rss for rss, _ in samples[len(samples) // 2:]])
+    return [
+        "{:<30}: {}".format("peak rss kb", peak),
+        "{:<30}: {}".format("steady rss kb", int(steady)),
+    ]
+
+
+def finish_trial(job):
+    """ Appends the memory sampled while a job ran to its output (see
+        `memory_lines`) and closes it once its process has exited.
+
+    Returns:
+        A pair (filepath, trial) where filepath is relative to outdir and trial
+        is the parsed output (see ingest.parse_trial).
+    """
+    for line in memory_lines(job.memory):
+        job.output.write(line + "\n")
+    job.output.close()
+    return job.filepath, ingest.parse_trial(job.output.name)
+
+
+def summary_lines(step, machine, run, filepath, workdir):
+    """Formats the lines of summary.txt describing a finished run, whose output is
+    at filepath (relative to workdir)."""
+    stats = {}
+    with open(os.path.join(workdir, filepath), "r", errors="replace") as f:
+        command = f.readline().strip()
+        for line in f:
+            key, sep, value = line.partition(":")
+            if sep and key.strip() in [
+                    "total throughput", "total rq", "total updates",
+                    "total find"
+            ]:
+                stats[key.strip()] = value.strip()
+    line = SUMMARY_FORMAT.format(step, machine, run.ds, run.alg, run.k, run.u,
+                                 run.rq, run.rqsize, run.nrq, run.nwork,
+                                 run.trial, stats.get("total throughput", ""),
+                                 stats.get("total rq", ""),
+                                 stats.get("total updates", ""),
+                                 stats.get("total find", ""))
+    return line, "{:>120}          {}".format(filepath, command)
+
+
+def start_outdir(workdir, outdir, fresh):
+    """ Prepares the results directory. A fresh start moves previous results to
+        <outdir>.old, like runscript.sh; otherwise they are kept and resumed.
+    """
+    path = os.path.join(workdir, outdir)
+    if fresh and os.path.exists(path):
+        shutil.rmtree(path + ".old", ignore_errors=True)
+        os.rename(path, path + ".old")
+    os.makedirs(path, exist_ok=True)
+
+
+def pending_runs(runs, manifest, outdir, machine):
+    """ Returns the (step, run) pairs that have not completed yet.
+
+    Complete output files that are missing from the manifest (e.g., written by
+    runscript.sh, or before a crash) are adopted instead of being run again.
+    They are matched regardless of their step number, which changes whenever
+    the experiment list or the number of trials does.
+    """
+    existing = {}
+    for dirpath, _, filenames in os.walk(outdir):
+        for f in filenames:
+            if f.startswith("step") and f.endswith(".out"):
+                existing[_STEP_RE.sub("", f, count=1)] = os.path.relpath(
+                    os.path.join(dirpath, f), outdir)
+
+    pending = []
+    for step, run in runs:
+        key = run_key(run)
+        if is_done(manifest["runs"].get(key), outdir):
+            continue
+        name = _STEP_RE.sub("",
+                            os.path.basename(
+                                output_path(outdir, step, machine, run)),
+                            count=1)
+        filepath = existing.get(name)
+        if key not in manifest["runs"] and filepath is not None:
+            trial = ingest.parse_trial(os.path.join(outdir, filepath))
+            if trial["complete"]:
+                manifest["runs"][key] = {
+                    "attempts": 1,
+                    "file": filepath,
+                    "step": int(_STEP_RE.match(
+                        os.path.basename(filepath)).group(1)),
+                    "complete": True,
+                    "throughput": trial["tot_thruput"],
+                }
+                continue
+        pending.append((step, run))
+    return pending
+
+
+def execute(runs,
+            machine,
+            config,
+            workdir,
+            outdir,
+            millis,
+            testing,
+            max_attempts,
+            pool=None,
+            adaptive=None,
+            extra_args=()):
+    """ Runs the given trials, recording every finished run in the manifest.
+
+    Runs that do not complete are re-queued at the end until they have been
+    attempted max_attempts times.
+
+    If a CorePool is given, every pending trial that fits on a node is started as
+    soon as the pool has room for it. Trials that do not fit wait until nothing
+    else is running and then run alone with the pinning policy of config.mk, as
+    do all trials without a pool.
+
+    With Adaptive settings, every configuration whose trials have all finished
+    gets another trial as long as analysis.trial_decision asks for more.
+
+    extra_args are passed to the benchmark in every trial (see `start_trial`).
+
+    Returns:
+        The keys of the runs that never completed.
+    """
+    resultdir = os.path.join(workdir, outdir)
+    manifest = load_manifest(resultdir)
+    queue = collections.deque(
+        pending_runs(runs, manifest, resultdir, machine))
+    save_manifest(resultdir, manifest)
+    print("{} of {} trials remaining".format(len(queue), len(runs)))
+    summary = os.path.join(resultdir, "summary.txt")
+    if not os.path.exists(summary):
+        with open(summary, "w") as f:
+            f.write(SUMMARY_FORMAT.format(*SUMMARY_HEADERS) + "\n")
+
+    def start(step, run, reservation):
+        entry = manifest["runs"].get(run_key(run), {})
+        # Retries overwrite the output of previous attempts.
+        return start_trial(entry.get("step", step), run, machine, config,
+                           workdir, outdir, millis, testing, extra_args,
+                           reservation)
+
+    outstanding = collections.Counter(config_key(run) for _, run in queue)
+    next_step = max([step for step, _ in runs] + [
+        entry["step"] for entry in manifest["runs"].values()
+    ] + [FIRST_STEP - 1]) + 1
+
+    def decide(run):
+        # Queues the next trial of the configuration of run if it needs one.
+        nonlocal next_step
+        pending = {run_key(r) for _, r in queue}
+        pending.update(run_key(job.run) for job in running)
+        values = []
+        missing = None
+        for trial in range(adaptive.max_trials):
+            key = run_key(run._replace(trial=trial))
+            entry = manifest["runs"].get(key)
+            if is_done(entry, resultdir):
+                values.append(entry["throughput"])
+            elif missing is None and key not in pending and (
+                    entry is None or entry["attempts"] < max_attempts):
+                missing = trial
+        decision, width = analysis.trial_decision(values, adaptive.min_trials,
+                                                  adaptive.max_trials,
+                                                  adaptive.max_ci_width,
+                                                  adaptive.confidence)
+        if decision == analysis.MORE_TRIALS and missing is None:
+            decision = analysis.CAPPED
+        manifest["decisions"][config_key(run)] = {
+            "trials": len(values),
+            "ci_width": width,
+            "decision": decision,
+        }
+        save_manifest(resultdir, manifest)
+        if decision == analysis.MORE_TRIALS:
+            print("CI width {:.1%} with {} trials, adding trial {}: {}".format(
+                width, len(values), missing, config_key(run)))
+            queue.append((next_step, run._replace(trial=missing)))
+            outstanding[config_key(run)] += 1
+            next_step += 1
+
+    running = []
+    if adaptive is not None:
+        # Configurations finished by a previous invocation may still need trials.
+        decided = set()
+        for _, run in runs:
+            if outstanding[config_key(run)] == 0 and config_key(
+                    run) not in decided:
+                decided.add(config_key(run))
+                decide(run)
+
+    failed = []
+    started = time.time()
+    done = 0
+    while queue or running:
+        if pool is not None:
+            for step, run in list(queue):
+                reservation = pool.reserve(run.nwork + run.nrq)
+                if reservation is not None:
+                    queue.remove((step, run))
+                    running.append(start(step, run, reservation))
+        if not running:
+            running.append(start(*queue.popleft(), None))
+        job = wait_any(running)
+        running.remove(job)
+        if job.reservation is not None:
+            pool.release(job.reservation)
+
+        filepath, trial = finish_trial(job)
+        step, run = job.step, job.run
+        key = run_key(run)
+        entry = manifest["runs"].get(key, {"attempts": 0})
+        entry["attempts"] += 1
+        entry["file"] = filepath
+        entry["step"] = step
+        entry["binding"] = (None if job.reservation is None else ",".join(
+            str(cpu) for cpu in job.reservation[1]))
+        entry["complete"] = trial["complete"]
+        entry["throughput"] = trial["tot_thruput"]
+        manifest["runs"][key] = entry
+        save_manifest(resultdir, manifest)
+
+        line, command = summary_lines(step, machine, run,
+                                      os.path.join(outdir, filepath), workdir)
+        with open(summary, "a") as f:
+            f.write(line + "\n" + command + "\n")
+        print(line)
+        if trial["tot_thruput"] <= 0:
+            warn(workdir, "WARNING: throughput {} in file {}".format(
+                trial["tot_thruput"], filepath))
+        if trial["validation_failed"]:
+            warn(workdir, "WARNING: validation failure in file " + filepath)
+
+        requeued = False
+        if trial["complete"]:
+            done += 1
+        elif entry["attempts"] < max_attempts:
+            warn(workdir,
+                 "WARNING: incomplete run (attempt {}), re-queued: {}".format(
+                     entry["attempts"], filepath))
+            queue.append((step, run))
+            requeued = True
+        else:
+            warn(workdir, "WARNING: giving up after {} attempts: {}".format(
+                entry["attempts"], filepath))
+            failed.append(key)
+        # A re-queued run is still outstanding until it completes or is given up.
+        if not requeued:
+            outstanding[config_key(run)] -= 1
+            if adaptive is not None and outstanding[config_key(run)] == 0:
+                decide(run)
+        if done > 0:
+            remaining = (time.time() - started) / done * (len(queue) +
+                                                          len(running))
+            print("Estimated remaining time: {}h{}m".format(
+                int(remaining // 3600), int(remaining % 3600 // 60)))
+    return failed
+
+
+def warn(workdir, message):
+    with open(os.path.join(workdir, "warnings.txt"), "a") as f:
+        f.write(message + "\n")
+    print(message)
+
+
+def main(argv):
+    config = experiments.read_config_mk(FLAGS.config)
+    workdir = FLAGS.microbench_dir
+    machine = FLAGS.machine or socket.gethostname()
+    trials = 1 if FLAGS.testing else FLAGS.trials
+    millis = 1 if FLAGS.testing else FLAGS.millis
+
+    if FLAGS.generate:
+        print("Generating 'experiment_list.txt' according to '" + FLAGS.spec +
+              "' and '" + FLAGS.config + "'...")
+        experiments.write_experiment_list(
+            experiments.generate(experiments.load_spec(FLAGS.spec),
+                                 int(config["maxthreads"]),
+                                 int(config["threadincrement"])),
+            os.path.join(workdir, "experiment_list.txt"))
+    runs = read_experiment_list(
+        os.path.join(workdir, "experiment_list.txt"), trials)
+
+    start_outdir(workdir, FLAGS.outdir, FLAGS.fresh)
+    # Results of several machines can be merged (see federate.py), so every
+    # machine records the hardware its trials ran on.
+    ingest.write_topology(os.path.join(workdir, FLAGS.outdir),
+                          ingest.machine_topology(machine, config))
+    if FLAGS.fresh:
+        try:
+            os.remove(os.path.join(workdir, "warnings.txt"))
+        except OSError:
+            pass
+    pool = None
+    if FLAGS.pack:
+        pool = CorePool.for_machine(config, FLAGS.numa_node_cpus,
+                                    FLAGS.max_trials_per_node)
+        if pool is None:
+            print("NOTE: NUMA topology unknown, running trials one at a time. "
+                  "See --numa_node_cpus.")
+    adaptive = None
+    if FLAGS.adaptive and not FLAGS.testing:
+        adaptive = Adaptive(trials, max(trials, FLAGS.max_trials),
+                            FLAGS.ci_width, FLAGS.confidence)
+    extra_args = []
+    if FLAGS.sample_millis > 0 and not FLAGS.testing:
+        extra_args += ["-sample", str(FLAGS.sample_millis)]
+    failed = execute(runs, machine, config, workdir, FLAGS.outdir, millis,
+                     FLAGS.testing, FLAGS.max_attempts, pool, adaptive,
+                     extra_args)
+    if len(failed) > 0:
+        print("NOTE: {} trials never completed. See warnings.txt.".format(
+            len(failed)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    app.run(main)
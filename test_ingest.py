@@ -0,0 +1,183 @@
+import ingest
+import os
+import tempfile
+import unittest
+
+# Output of a short trial, trimmed from one written by runscript.sh and runner.py.
+TRIAL_OUTPUT = """\
+INS=25
+DEL=25
+RQ=10
+RQSIZE=50
+MAXKEY=10000
+WORK_THREADS=2
+RQ_THREADS=1
+sizes: node=56 including header=8
+ACTUAL_THREAD_BINDINGS=0,1,2
+
+###############################################################################
+################################ BEGIN RUNNING ################################
+###############################################################################
+
+joining thread 0
+
+###############################################################################
+################################# END RUNNING #################################
+###############################################################################
+
+sum num_operations by_thread=5684 4300 90
+average num_operations total=3358
+
+log histogram of none latency_updates full_data=1:0 2:5 4:12 8:100 16:40 32:3
+    [2^00, 2^01]: 0
+    (2^01, 2^02]: 5
+average latency_updates total=36085
+average latency_searches total=29567
+average latency_rqs total=51333
+average length_rqs total=24
+sum bundle_restarts total=3
+
+total find                    : 2227
+rq throughput                 : 2860
+update throughput             : 14425
+total throughput              : 28420
+
+data structure size           : 4979 nodes in data structure
+
+total reachable nodes         : 4981
+average bundle size           : 2.80948
+
+begin papi_print_counters...
+end papi_print_counters.
+begin delete ds...
+reclaim     : 46 in epoch bags
+unreclaimed : 0
+reclaim     : 4 in epoch bags
+unreclaimed : 1
+
+end delete ds.
+garbage=5752659
+peak rss kb : 10240
+steady rss kb : 9216
+"""
+
+
+class ParseHistogramTest(unittest.TestCase):
+
+    def test_log_buckets(self):
+        name, h = ingest.parse_histogram(
+            "log histogram of none latency_rqs full_data=1:0 2:5 4:12 8:100 16:40 32:3"
+        )
+        self.assertEqual(name, "latency_rqs")
+        self.assertEqual(h["lower"], [0, 2, 4, 8, 16, 32])
+        self.assertEqual(h["upper"], [2, 4, 8, 16, 32, 64])
+        self.assertEqual(h["counts"], [0, 5, 12, 100, 40, 3])
+
+    def test_log_percentiles(self):
+        _, h = ingest.parse_histogram(
+            "log histogram of none latency_rqs full_data=1:0 2:5 4:12 8:100 16:40 32:3"
+        )
+        p50, p99 = ingest.histogram_percentiles(ingest.to_histogram(h),
+                                                [50, 99])
+        # 160 values: the 80th lies in [8, 16) after 17 smaller ones, and the
+        # 158.4th in [32, 64) after 157 smaller ones.
+        self.assertAlmostEqual(p50, 8 + (80 - 17) / 100 * 8)
+        self.assertAlmostEqual(p99, 32 + (158.4 - 157) / 3 * 32)
+
+    def test_linear_buckets(self):
+        _, h = ingest.parse_histogram(
+            "linear histogram of none length_rqs full_data=10:1 20:3 30:0")
+        self.assertEqual(h["lower"], [0, 10, 20])
+        self.assertEqual(h["upper"], [10, 20, 30])
+
+
+class ParseTrialTest(unittest.TestCase):
+
+    def test_config_and_stats(self):
+        trial = ingest._parse_lines(TRIAL_OUTPUT.splitlines(keepends=True))
+        self.assertEqual(trial["MAXKEY"], 10000)
+        self.assertEqual(trial["INS"], 25.0)
+        self.assertEqual(trial["DEL"], 25.0)
+        self.assertEqual(trial["RQ"], 10.0)
+        self.assertEqual(trial["RQSIZE"], 50)
+        self.assertEqual(trial["WORK_THREADS"], 2)
+        self.assertEqual(trial["RQ_THREADS"], 1)
+        self.assertEqual(trial["ACTUAL_THREAD_BINDINGS"], [0, 1, 2])
+        self.assertEqual(trial["u_latency"], 36085)
+        self.assertEqual(trial["c_latency"], 29567)
+        self.assertEqual(trial["rq_latency"], 51333)
+        self.assertEqual(trial["rq_len"], 24)
+        self.assertEqual(trial["tot_restarts"], 3)
+        self.assertEqual(trial["tot_thruput"], 28420)
+        self.assertEqual(trial["u_thruput"], 14425)
+        self.assertEqual(trial["rq_thruput"], 2860)
+        self.assertEqual(trial["reachable_nodes"], 4981)
+        self.assertAlmostEqual(trial["avg_bundle_size"], 2.80948)
+        # Statistics missing from the output are 0.
+        self.assertEqual(trial["avg_in_bags"], 0)
+        self.assertEqual(trial["by_thread"], {"operations": [5684, 4300, 90]})
+        self.assertEqual(trial["histograms"]["latency_updates"]["counts"],
+                         [0, 5, 12, 100, 40, 3])
+        self.assertTrue(trial["complete"])
+        self.assertFalse(trial["validation_failed"])
+
+    def test_memory(self):
+        trial = ingest._parse_lines(TRIAL_OUTPUT.splitlines(keepends=True))
+        self.assertEqual(trial["node_size"], 56)
+        self.assertIsNone(trial["descriptor_size"])
+        self.assertEqual(trial["ds_size"], 4979)
+        # Added up over the types of objects.
+        self.assertEqual(trial["garbage"], 50)
+        self.assertEqual(trial["unreclaimed"], 1)
+        self.assertEqual(trial["peak_rss_kb"], 10240)
+        self.assertEqual(trial["steady_rss_kb"], 9216)
+
+    def test_incomplete(self):
+        lines = TRIAL_OUTPUT.split("begin delete ds")[0].splitlines(
+            keepends=True)
+        trial = ingest._parse_lines(lines + ["Validation FAILURE\n"])
+        self.assertFalse(trial["complete"])
+        self.assertTrue(trial["validation_failed"])
+
+    def test_csv(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            algodir = os.path.join(tmpdir, "bundle")
+            os.mkdir(algodir)
+            files = []
+            for t, output in enumerate([
+                    TRIAL_OUTPUT,
+                    TRIAL_OUTPUT.replace("28420", "28422"),
+                    TRIAL_OUTPUT.replace("end delete ds.", "")
+            ]):
+                filepath = os.path.join(
+                    algodir, "step1.host.lazylist.bundle.k10000.u50.rq10."
+                    "rqsize50.nrq1.nwork2.trial{}.out".format(t))
+                with open(filepath, "w") as f:
+                    f.write(output)
+                files.append(filepath)
+            trials = [ingest.parse_trial(f) for f in files]
+            rows = ingest.aggregate_trials(files, trials, "lazylist", 2)
+            self.assertEqual(len(rows), 1)
+            row = rows[0]
+            self.assertEqual(row["list"], "lazylist-bundle")
+            self.assertEqual(row["machine"], "host")
+            self.assertEqual(row["u_rate"], 50.0)
+            # The incomplete trial is left out of the averages.
+            self.assertEqual(row["tot_thruput"], 28421)
+            self.assertEqual(row["c_thruput"], 28421 - 14425 - 2860)
+
+            outfile = os.path.join(tmpdir, "lazylist.csv")
+            ingest.write_csv(rows, outfile)
+            with open(outfile) as f:
+                header = f.readline().strip().split(",")
+                values = f.readline().strip().split(",")
+            self.assertEqual(header[:len(ingest.MICROBENCH_COLUMNS)],
+                             ingest.MICROBENCH_COLUMNS)
+            self.assertEqual(len(values), len(header))
+            self.assertEqual(values[:7], [
+                "lazylist-bundle", "10000", "50.00", "10.00", "2", "1", "50"
+            ])
+
+
+if __name__ == "__main__":
+    unittest.main()